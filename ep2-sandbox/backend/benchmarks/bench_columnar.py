@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Benchmark the financials cash-flow analytics (cashflow, average_cashflow) on
+the columnar transaction store against the previous list-comprehension path.
+
+The list-comprehension path is timed on already-parsed rows, i.e. without the
+json.load it used to pay per request, so the comparison favours it.
+
+Usage:
+    python benchmarks/bench_columnar.py --sizes 100000 1000000 2000000
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "code")))
+
+from api.models import Account, Transaction  # noqa: E402
+from core.columnar import SECONDS_PER_DAY, TransactionColumns  # noqa: E402
+
+USERS = 1000
+ACCOUNTS_PER_USER = 4
+PROBE_USER = "user-000000"
+
+
+def make_dataset(num_transactions: int, seed: int = 7):
+    rng = random.Random(seed)
+    accounts = [
+        Account(
+            account_id=f"acc-{u:06d}-{a}",
+            user_id=f"user-{u:06d}",
+            category="liability" if a == 3 else "asset",
+            type="cash",
+            sub_type="checking",
+            description="Checking",
+            balance=rng.uniform(-5000, 50000),
+        )
+        for u in range(USERS)
+        for a in range(ACCOUNTS_PER_USER)
+    ]
+    now = datetime.now(timezone.utc)
+    transactions = [
+        Transaction(
+            transaction_id=f"txn_{i}",
+            account_id=accounts[rng.randrange(len(accounts))].account_id,
+            merchant_id=f"merch_{rng.randrange(500)}",
+            date=(now - timedelta(days=rng.randrange(730))).strftime("%Y-%m-%dT00:00:00Z"),
+            description="Benchmark",
+            amount=round(rng.uniform(-500, 500), 2),
+            category=rng.choice(["Dining", "Housing", "Income", "Shopping", "Transport"]),
+        )
+        for i in range(num_transactions)
+    ]
+    return accounts, transactions
+
+
+def list_comprehension_path(accounts, transactions):
+    """The financials.py implementation before the columnar store."""
+    user_account_ids = [acc["account_id"] for acc in accounts if acc["user_id"] == PROBE_USER]
+    results = []
+    for days in (30, 90):
+        cutoff = datetime.now() - timedelta(days=days)
+        recent = [
+            t for t in transactions
+            if t["account_id"] in user_account_ids and datetime.fromisoformat(t["date"].replace("Z", "")) > cutoff
+        ]
+        results.append(sum(t["amount"] for t in recent))
+    return results
+
+
+def columnar_path(transaction_columns: TransactionColumns):
+    """Whole-day windows answered from the daily prefix sums, as financials.py does."""
+    today = int(datetime.now(timezone.utc).timestamp()) // SECONDS_PER_DAY
+    return [transaction_columns.flow_between_days(PROBE_USER, today - days + 1, today) for days in (30, 90)]
+
+
+def time_call(fn, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'transactions':>12} {'build s':>8} {'list ms':>10} {'columnar us':>12} {'speedup':>9}")
+    for size in args.sizes:
+        accounts, transactions = make_dataset(size)
+        account_rows = [acc.model_dump() for acc in accounts]
+        transaction_rows = [tx.model_dump() for tx in transactions]
+
+        start = time.perf_counter()
+        transaction_columns = TransactionColumns(accounts, transactions)
+        build_s = time.perf_counter() - start
+
+        expected = list_comprehension_path(account_rows, transaction_rows)
+        actual = columnar_path(transaction_columns)
+        assert all(abs(a - b) < 0.01 for a, b in zip(expected, actual)), (expected, actual)
+
+        slow = time_call(lambda: list_comprehension_path(account_rows, transaction_rows), args.repeat)
+        fast = time_call(lambda: columnar_path(transaction_columns), args.repeat * 100)
+        print(f"{size:>12} {build_s:>8.2f} {slow * 1e3:>10.1f} {fast * 1e6:>12.1f} {slow / fast:>8.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Benchmark per-user account/transaction lookups as transactions.json grows.
+
+Compares the per-user timeline in core/indexes.py against the previous linear
+scan (`tx.account_id in user_account_ids`) for a probe user whose own
+transaction count is fixed, so a flat line means O(result size).
+
+Usage:
+    python benchmarks/bench_indexes.py --sizes 10000 100000 1000000
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+CODE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "code"))
+DATA_DIR = tempfile.mkdtemp(prefix="bench-indexes-")
+os.environ["DATA_DIR"] = DATA_DIR
+sys.path.insert(0, CODE_DIR)
+
+from core import indexes, repository  # noqa: E402
+
+USERS = 1000
+ACCOUNTS_PER_USER = 4
+PROBE_USER = "user-000000"
+PROBE_TRANSACTIONS = 50
+
+
+def write_dataset(num_transactions: int, seed: int = 7):
+    rng = random.Random(seed)
+    accounts = [
+        {
+            "account_id": f"acc-{u:06d}-{a}",
+            "user_id": f"user-{u:06d}",
+            "category": "asset",
+            "type": "cash",
+            "sub_type": "checking",
+            "description": "Checking",
+            "balance": 1000.0,
+        }
+        for u in range(USERS)
+        for a in range(ACCOUNTS_PER_USER)
+    ]
+    probe_accounts = [acc["account_id"] for acc in accounts if acc["user_id"] == PROBE_USER]
+    other_accounts = [acc["account_id"] for acc in accounts if acc["user_id"] != PROBE_USER]
+
+    with open(os.path.join(DATA_DIR, "accounts.json"), "w") as f:
+        json.dump(accounts, f)
+    with open(os.path.join(DATA_DIR, "transactions.json"), "w") as f:
+        f.write("[")
+        for i in range(num_transactions):
+            account_id = probe_accounts[i % len(probe_accounts)] if i < PROBE_TRANSACTIONS else rng.choice(other_accounts)
+            row = {
+                "transaction_id": f"txn_{i}",
+                "account_id": account_id,
+                "merchant_id": "merch_999",
+                "date": "2025-01-01T00:00:00Z",
+                "description": "Benchmark",
+                "amount": -10.0,
+                "category": "Shopping",
+            }
+            f.write(("," if i else "") + json.dumps(row))
+        f.write("]")
+
+
+def time_call(fn, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def linear_scan():
+    user_account_ids = [acc.account_id for acc in repository.accounts.all() if acc.user_id == PROBE_USER]
+    return [tx for tx in repository.transactions.all() if tx.account_id in user_account_ids]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"{'transactions':>12} {'load s':>8} {'build s':>8} {'indexed us':>11} {'linear ms':>10}")
+    for size in args.sizes:
+        write_dataset(size)
+
+        start = time.perf_counter()
+        repository.transactions.all()
+        load_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        indexes.transaction_timeline(PROBE_USER)
+        build_s = time.perf_counter() - start
+
+        assert len(indexes.transaction_timeline(PROBE_USER)) == min(size, PROBE_TRANSACTIONS)
+        indexed = time_call(lambda: indexes.transaction_timeline(PROBE_USER), args.repeat)
+        linear = time_call(linear_scan, max(3, args.repeat // 100))
+        print(f"{size:>12} {load_s:>8.2f} {build_s:>8.2f} {indexed * 1e6:>11.1f} {linear * 1e3:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
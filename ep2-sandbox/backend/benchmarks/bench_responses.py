@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Benchmark GET /api/users/{id}/transactions?history=365 throughput.
+
+Compares the endpoint, which writes cached per-row JSON straight into the
+response, against the previous path where FastAPI re-validated the returned
+Transaction models through response_model and encoded them with json.dumps.
+Both run in-process through the TestClient, so absolute numbers include its
+overhead; the ratio is what matters.
+
+Usage:
+    python benchmarks/bench_responses.py --sizes 100 1000 10000
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from typing import List
+
+CODE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "code"))
+DATA_DIR = tempfile.mkdtemp(prefix="bench-responses-")
+os.environ["DATA_DIR"] = DATA_DIR
+sys.path.insert(0, CODE_DIR)
+
+from fastapi.responses import JSONResponse  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+from api.models import Transaction  # noqa: E402
+from core import indexes  # noqa: E402
+from main import app  # noqa: E402
+
+PROBE_USER = "user-000000"
+
+
+@app.get("/bench/validated/{user_id}", response_model=List[Transaction], response_class=JSONResponse)
+def validated_transactions(user_id: str, history: int = 30):
+    """The transactions endpoint before the fast response path."""
+    start = datetime.now(timezone.utc) - timedelta(days=history)
+    return indexes.transaction_timeline(user_id).window(start=indexes.epoch_seconds(start))
+
+
+def write_dataset(num_transactions: int, seed: int = 7):
+    rng = random.Random(seed)
+    accounts = [
+        {
+            "account_id": f"acc-{PROBE_USER}-{a}",
+            "user_id": PROBE_USER,
+            "category": "asset",
+            "type": "cash",
+            "sub_type": "checking",
+            "description": "Checking",
+            "balance": 1000.0,
+        }
+        for a in range(4)
+    ]
+    now = datetime.now(timezone.utc)
+    transactions = [
+        {
+            "transaction_id": f"txn_{i}",
+            "account_id": rng.choice(accounts)["account_id"],
+            "merchant_id": f"merch_{rng.randrange(500)}",
+            "date": (now - timedelta(days=rng.randrange(365))).strftime("%Y-%m-%dT00:00:00Z"),
+            "description": "Benchmark purchase",
+            "amount": round(rng.uniform(-500, 500), 2),
+            "category": rng.choice(["Dining", "Housing", "Income", "Shopping", "Transport"]),
+        }
+        for i in range(num_transactions)
+    ]
+    with open(os.path.join(DATA_DIR, "accounts.json"), "w") as f:
+        json.dump(accounts, f)
+    with open(os.path.join(DATA_DIR, "transactions.json"), "w") as f:
+        json.dump(transactions, f)
+
+
+def throughput(client: TestClient, url: str, seconds: float) -> float:
+    client.get(url)  # warm caches
+    count = 0
+    deadline = time.perf_counter() + seconds
+    start = time.perf_counter()
+    while time.perf_counter() < deadline:
+        client.get(url)
+        count += 1
+    return count / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1_000, 10_000])
+    parser.add_argument("--seconds", type=float, default=3.0)
+    args = parser.parse_args()
+
+    client = TestClient(app)
+    print(f"{'transactions':>12} {'before req/s':>13} {'after req/s':>12} {'speedup':>8}")
+    for size in args.sizes:
+        write_dataset(size)
+        fast_url = f"/api/users/{PROBE_USER}/transactions?history=365"
+        slow_url = f"/bench/validated/{PROBE_USER}?history=365"
+        assert client.get(fast_url).json() == client.get(slow_url).json()
+
+        before = throughput(client, slow_url, args.seconds)
+        after = throughput(client, fast_url, args.seconds)
+        print(f"{size:>12} {before:>13.0f} {after:>12.0f} {after / before:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
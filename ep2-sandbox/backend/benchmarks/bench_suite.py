@@ -0,0 +1,324 @@
+#!/usr/bin/env python3
+"""
+Benchmark every router's endpoints against generated datasets.
+
+For each dataset (small, medium, large by default) the data is generated
+with generate_data.py, or reused from --data-root, and served by one
+uvicorn worker. Each endpoint is then driven on its own for --seconds at
+--concurrency. The suite reports req/s, p50/p95/p99 latency and the
+server's peak RSS while that endpoint ran, and writes everything to
+--output as JSON.
+
+With --baseline, the run is compared to a saved results file. The exit
+status is 1 when any endpoint's throughput drops, or its latency grows, by
+more than --threshold.
+
+Usage:
+    python benchmarks/bench_suite.py --datasets small medium --output bench.json
+    python benchmarks/bench_suite.py --baseline bench.json --threshold 0.2
+"""
+
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from typing import List, NamedTuple, Optional
+
+from generate_data import Generator
+from load_test import DEFAULT_CODE_DIR, encode_request, free_port, percentile, read_response, start_server
+
+# name -> (users, transactions)
+DATASETS = {
+    "small": (100, 10_000),
+    "medium": (1_000, 100_000),
+    "large": (10_000, 1_000_000),
+}
+
+
+class Endpoint(NamedTuple):
+    router: str
+    name: str
+    method: str
+    path: str  # formatted with {user}
+
+
+ENDPOINTS = [
+    Endpoint("users", "profile", "GET", "/api/users/{user}"),
+    Endpoint("users", "dashboard", "GET", "/api/users/{user}/dashboard"),
+    Endpoint("accounts", "list", "GET", "/api/users/{user}/accounts"),
+    Endpoint("transactions", "history-90d", "GET", "/api/users/{user}/transactions?history=90"),
+    Endpoint("financials", "networth", "GET", "/api/users/{user}/networth"),
+    Endpoint("financials", "cashflow", "GET", "/api/users/{user}/cashflow"),
+    Endpoint("financials", "cashflow-monthly", "GET", "/api/users/{user}/cashflow?days=365&granularity=month"),
+    Endpoint("financials", "average-cashflow", "GET", "/api/users/{user}/average_cashflow"),
+    Endpoint("financials", "debts", "GET", "/api/users/{user}/debts"),
+    Endpoint("financials", "investments", "GET", "/api/users/{user}/investments"),
+    Endpoint("goals", "list", "GET", "/api/goals/{user}"),
+    Endpoint("goals", "projections", "GET", "/api/goals/{user}/projections"),
+    Endpoint("goals", "create", "POST", "/api/goals"),
+    Endpoint("partners", "list", "GET", "/api/partners"),
+    Endpoint("partners", "user-benefits", "GET", "/api/partners/user/{user}"),
+    Endpoint("partners", "eligible-users", "GET", "/api/partners/partner_005/eligible-users"),
+    Endpoint("partners", "partner-savings", "GET", "/api/users/{user}/partner-savings"),
+    Endpoint("schedule", "list", "GET", "/api/users/{user}/schedules"),
+    Endpoint("schedule", "occurrences", "GET", "/api/users/{user}/schedules/occurrences"),
+    Endpoint("meeting", "advisors", "GET", "/api/advisors"),
+    Endpoint("meeting", "user-meetings", "GET", "/api/meetings/{user}"),
+    Endpoint("meeting", "free-slots", "GET", "/api/advisors/adv-mortgage-001/free-slots"),
+]
+
+# Metrics compared against a baseline, and whether higher is better
+COMPARED_METRICS = {"rps": True, "p50_ms": False, "p95_ms": False}
+
+
+def request_for(endpoint: Endpoint, user: str) -> bytes:
+    if endpoint.method == "POST":
+        goal = {
+            "user_id": user,
+            "description": "Benchmark",
+            "target_amount": 1000.0,
+            "target_date": "2030-01-01",
+            "current_amount_saved": 0.0,
+        }
+        return encode_request("POST", endpoint.path, json.dumps(goal).encode())
+    return encode_request(endpoint.method, endpoint.path.format(user=user))
+
+
+def rss_mb(pid: int, field: str = "VmRSS") -> Optional[float]:
+    """Reads a memory field of a process from /proc, in MB; None where /proc is unavailable."""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith(field + ":"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+async def measure(port: int, pid: int, endpoint: Endpoint, users: List[str], concurrency: int, seconds: float) -> dict:
+    """Drives one endpoint until the deadline and summarizes the latencies and server RSS."""
+    latencies: List[float] = []
+    errors = 0
+    counter = 0
+    peak_rss = rss_mb(pid)
+    deadline = time.perf_counter() + seconds
+
+    async def connection():
+        nonlocal errors, counter
+        reader, writer = await asyncio.open_connection("127.0.0.1", port, limit=2**26)
+        try:
+            while time.perf_counter() < deadline:
+                counter += 1
+                request = request_for(endpoint, users[counter % len(users)])
+                started = time.perf_counter()
+                writer.write(request)
+                status = await read_response(reader)
+                latencies.append(time.perf_counter() - started)
+                if status >= 500:
+                    errors += 1
+        finally:
+            writer.close()
+
+    async def sample_rss():
+        nonlocal peak_rss
+        while time.perf_counter() < deadline:
+            current = rss_mb(pid)
+            if current is not None:
+                peak_rss = max(peak_rss or 0.0, current)
+            await asyncio.sleep(0.05)
+
+    started = time.perf_counter()
+    await asyncio.gather(sample_rss(), *(connection() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "router": endpoint.router,
+        "method": endpoint.method,
+        "path": endpoint.path,
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+        "peak_rss_mb": None if peak_rss is None else round(peak_rss, 1),
+    }
+
+
+async def warm_up(port: int, endpoints: List[Endpoint], users: List[str]):
+    """
+    Requests every endpoint once so collections load and indexes build before
+    measuring, and warns about endpoints that do not succeed.
+    """
+    reader, writer = await asyncio.open_connection("127.0.0.1", port, limit=2**26)
+    try:
+        for endpoint in endpoints:
+            writer.write(request_for(endpoint, users[0]))
+            status = await read_response(reader)
+            if status >= 300:
+                print(f"  warning: {endpoint.method} {endpoint.path} returned {status}")
+    finally:
+        writer.close()
+
+
+def dataset_dir(data_root: str, name: str, users: int, transactions: int, seed: int, end: datetime.date) -> str:
+    """Returns the directory holding a generated dataset, generating it on first use."""
+    path = os.path.join(data_root, f"{name}-{users}u-{transactions}t-seed{seed}-{end}")
+    if not os.path.isdir(path):
+        print(f"Generating {name} dataset ({users} users, {transactions} transactions) in {path}")
+        # Generated aside and renamed, so an interrupted run never leaves a partial dataset behind
+        os.makedirs(data_root, exist_ok=True)
+        partial = tempfile.mkdtemp(prefix=f"{name}-", dir=data_root)
+        Generator(partial, users, transactions, seed, end, days=365, meetings=0.2).run()
+        os.rename(partial, path)
+    return path
+
+
+def benchmark_users(data_dir: str) -> List[str]:
+    """
+    Returns the users requests are spread over: those with both a debt and an
+    investment account, so /debts and /investments are measured answering 200
+    rather than a cheaper 404. Falls back to every user if none qualifies.
+    """
+    with open(os.path.join(data_dir, "users.json")) as f:
+        users = [user["user_id"] for user in json.load(f)]
+    with open(os.path.join(data_dir, "accounts.json")) as f:
+        accounts = json.load(f)
+    with_debts = {acc["user_id"] for acc in accounts if acc["category"] == "liability"}
+    with_investments = {acc["user_id"] for acc in accounts if acc["category"] == "asset" and acc["type"] == "investment"}
+    return [user for user in users if user in with_debts and user in with_investments] or users
+
+
+def run_dataset(code_dir: str, source_dir: str, endpoints: List[Endpoint], concurrency: int, seconds: float) -> dict:
+    # Endpoints that write would otherwise change the cached dataset
+    data_dir = tempfile.mkdtemp(prefix="bench-suite-")
+    shutil.copytree(source_dir, data_dir, dirs_exist_ok=True)
+    port = free_port()
+    server = start_server(code_dir, data_dir, port)
+    try:
+        users = benchmark_users(data_dir)
+        asyncio.run(warm_up(port, endpoints, users))
+        results = {}
+        for endpoint in endpoints:
+            result = asyncio.run(measure(port, server.pid, endpoint, users, concurrency, seconds))
+            results[f"{endpoint.router}:{endpoint.name}"] = result
+            print(
+                f"  {endpoint.router + ':' + endpoint.name:<32} {result['rps']:>8.0f} {result['p50_ms']:>8.1f} "
+                f"{result['p95_ms']:>8.1f} {result['p99_ms']:>8.1f} {result['peak_rss_mb'] or 0:>8.0f}"
+                + (f"  {result['errors']} errors" if result["errors"] else "")
+            )
+        return results
+    finally:
+        server.terminate()
+        server.wait()
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+
+def find_regressions(current: dict, baseline: dict, threshold: float) -> List[str]:
+    """
+    Lists the endpoints whose compared metrics are more than `threshold`
+    (a fraction) worse than in the baseline, or that newly return errors.
+    Endpoints missing from either run are not compared.
+    """
+    regressions = []
+    for dataset, endpoints in current["results"].items():
+        for key, result in endpoints.items():
+            before = baseline.get("results", {}).get(dataset, {}).get(key)
+            if before is None:
+                continue
+            for metric, higher_is_better in COMPARED_METRICS.items():
+                old, new = before[metric], result[metric]
+                if not old:
+                    continue
+                change = (new - old) / old
+                if (-change if higher_is_better else change) > threshold:
+                    regressions.append(f"{dataset} {key} {metric}: {old} -> {new} ({change:+.0%})")
+            if result["errors"] and not before["errors"]:
+                regressions.append(f"{dataset} {key} errors: 0 -> {result['errors']}")
+    return regressions
+
+
+def git_commit(code_dir: str) -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=code_dir, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--code-dir", default=DEFAULT_CODE_DIR)
+    parser.add_argument("--datasets", nargs="+", default=list(DATASETS), choices=list(DATASETS))
+    parser.add_argument("--data-root", default=os.path.join(tempfile.gettempdir(), "ep2-bench-data"),
+                        help="Where generated datasets are kept between runs")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--end", type=datetime.date.fromisoformat, default=datetime.datetime.now(datetime.timezone.utc).date(),
+                        help="Last day of generated transaction history (default: today, so recent-window endpoints see data)")
+    parser.add_argument("--routers", nargs="+", help="Only benchmark these routers")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--seconds", type=float, default=3.0, help="Measurement time per endpoint")
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--baseline", help="Results file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="Largest tolerated relative regression versus the baseline (default 0.2 = 20%%)")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    code_dir = os.path.abspath(args.code_dir)
+    endpoints = [endpoint for endpoint in ENDPOINTS if not args.routers or endpoint.router in args.routers]
+
+    report = {
+        "meta": {
+            "started_at": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+            "commit": git_commit(code_dir),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "concurrency": args.concurrency,
+            "seconds": args.seconds,
+            "seed": args.seed,
+            "data_end": args.end.isoformat(),
+        },
+        "datasets": {},
+        "results": {},
+    }
+    for name in args.datasets:
+        users, transactions = DATASETS[name]
+        source_dir = dataset_dir(args.data_root, name, users, transactions, args.seed, args.end)
+        report["datasets"][name] = {"users": users, "transactions": transactions}
+        print(f"{name}: {users} users, {transactions} transactions")
+        print(f"  {'endpoint':<32} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'RSS MB':>8}")
+        report["results"][name] = run_dataset(code_dir, source_dir, endpoints, args.concurrency, args.seconds)
+
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Wrote {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = find_regressions(report, baseline, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} regressions beyond {args.threshold:.0%} versus {args.baseline}:")
+            for regression in regressions:
+                print(f"  {regression}")
+            return 1
+        print(f"No regressions beyond {args.threshold:.0%} versus {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
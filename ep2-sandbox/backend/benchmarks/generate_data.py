@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+"""
+Generate a synthetic data directory at production scale.
+
+Writes users.json, accounts.json, transactions.json, schedule.json,
+life_goals.json and meetings.json shaped like the models in api/models.py,
+and copies the static partner and advisor fixtures from code/db, so the
+output can be served directly with DATA_DIR=<out>. Account IDs follow
+create_account_for_user: acc-<initials>-<type code>-<NNN>, numbered per
+prefix across all users.
+
+Users are generated one at a time and every file is written as a streaming
+JSON array, so memory stays bounded however many transactions are
+requested. The output depends only on the seed, the sizes and --end.
+
+Usage:
+    python benchmarks/generate_data.py --out /tmp/ep2-large --users 10000 --transactions 10000000
+"""
+
+import argparse
+import itertools
+import json
+import os
+import random
+import shutil
+import sys
+import time
+import uuid
+from datetime import date, datetime, time as dt_time, timedelta, timezone
+from typing import Dict, List, Optional, TextIO
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+CODE_DIR = os.path.join(BACKEND_DIR, "code")
+FIXTURE_DIR = os.path.join(CODE_DIR, "db")
+sys.path.insert(0, CODE_DIR)
+
+from api.endpoints.accounts import ACCOUNT_TYPE_MAP  # noqa: E402
+
+# Files copied unchanged from code/db
+STATIC_FILES = ["bank_partners.json", "advisors.json"]
+
+FIRST_NAMES = [
+    "Marcus", "Jane", "Akira", "Sofia", "Liam", "Priya", "Noah", "Amara", "Mateo", "Chloe",
+    "Omar", "Hana", "Lucas", "Zoe", "Ethan", "Mei", "Diego", "Nora", "Kofi", "Ingrid",
+]
+LAST_INITIALS = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+RISK_TOLERANCES = ["low", "moderate-low", "moderate", "moderate-high", "high"]
+STREETS = ["Tech Lane", "Oak Street", "Maple Avenue", "Harbor Drive", "Hillcrest Road", "Elm Court"]
+INSTITUTIONS = ["Acme Bank", "Cymbal Bank", "Summit Credit Union"]
+
+# (category, type, sub_type, description, balance range); the type maps to the
+# ID type code through ACCOUNT_TYPE_MAP like accounts created through the API
+CHECKING = ("asset", "checking", "checking", "Checking", (500, 20000))
+SAVINGS = ("asset", "savings", "savings", "Savings", (1000, 150000))
+OPTIONAL_ACCOUNTS = [
+    (0.6, ("asset", "investment", "401k", "401(k)", (5000, 800000))),
+    (0.3, ("asset", "investment", "brokerage", "Brokerage", (1000, 500000))),
+    (0.1, ("asset", "pension", "pension", "Pension", (0, 300000))),
+    (0.7, ("liability", "credit card", "credit_card", "Credit Card", (-15000, 0))),
+    (0.3, ("liability", "loan", "student_loan", "Student Loan", (-90000, -1000))),
+    (0.2, ("liability", "loan", "auto_loan", "Auto Loan", (-40000, -2000))),
+    (0.3, ("liability", "loan", "mortgage", "Mortgage", (-600000, -50000))),
+]
+INTEREST_RATES = {"credit_card": (0.12, 0.28), "student_loan": (0.03, 0.08), "auto_loan": (0.03, 0.09), "mortgage": (0.025, 0.07)}
+
+# (merchant_id, category, description, amount range, weight); spending is negative
+SPENDING = [
+    ("merch_101", "Dining", "The Daily Grind", (-12, -3), 10),
+    ("merch_102", "Dining", "Blue Mountain Coffee", (-10, -3), 6),
+    ("merch_701", "Dining", "Dinner Out", (-150, -25), 6),
+    ("merch_201", "Subscriptions", "Streamify", (-20, -10), 2),
+    ("merch_202", "Subscriptions", "FitLife Gym App", (-30, -10), 2),
+    ("merch_501", "Food", "Groceries", (-250, -20), 10),
+    ("merch_601", "Transportation", "Gas", (-80, -25), 6),
+    ("merch_801", "Shopping", "Online Shopping", (-300, -10), 6),
+    ("merch_401", "Automotive", "Precision Auto Repair", (-900, -100), 1),
+    ("merch_402", "Travel", "Travel", (-2000, -200), 1),
+    ("merch_999", "Housing", "Rent", (-3000, -900), 2),
+]
+SPENDING_CUM_WEIGHTS = list(itertools.accumulate(weight for *_, weight in SPENDING))
+INCOME = ("merch_999", "Income", "Paycheck", (1500, 6000))
+# Share of transactions that are income deposits into checking
+INCOME_SHARE = 0.08
+
+GOALS = [
+    ("Build a six-month emergency fund.", (5000, 40000)),
+    ("Save for a down payment on a home.", (20000, 120000)),
+    ("Buy a new car.", (8000, 45000)),
+    ("Take a family vacation.", (2000, 15000)),
+    ("Pay for a child's college education.", (30000, 200000)),
+]
+FREQUENCIES = ["weekly", "biweekly", "monthly", "monthly", "quarterly"]
+
+
+_encode = json.JSONEncoder(separators=(",", ":")).encode
+
+
+class JsonArrayWriter:
+    """Writes a JSON array one element per line without holding it in memory."""
+
+    def __init__(self, path: str):
+        self.file: TextIO = open(path, "w")
+        self.file.write("[")
+        self.count = 0
+
+    def write(self, item: dict):
+        self.file.write(",\n" if self.count else "\n")
+        self.file.write(_encode(item))
+        self.count += 1
+
+    def close(self):
+        self.file.write("\n]\n" if self.count else "]\n")
+        self.file.close()
+
+
+def iso(moment: datetime) -> str:
+    return moment.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def seeded_uuid(rng: random.Random) -> str:
+    return str(uuid.UUID(int=rng.getrandbits(128), version=4))
+
+
+class Generator:
+    def __init__(self, out_dir: str, users: int, transactions: int, seed: int, end: date, days: int, meetings: float):
+        self.out_dir = out_dir
+        self.users = users
+        self.transactions = transactions
+        self.seed = seed
+        self.end = datetime.combine(end, dt_time(), timezone.utc)
+        self.start = self.end - timedelta(days=days)
+        self.span = days * 86400
+        # Transaction dates are formatted from these instead of with strftime for each row
+        self.day_prefixes = [(self.start + timedelta(days=day)).strftime("%Y-%m-%dT") for day in range(days)]
+        self.meeting_rate = meetings
+        self.id_width = max(3, len(str(users)))
+        # Next number per account ID prefix, as create_account_for_user allocates them
+        self.account_numbers: Dict[str, int] = {}
+        self.next_transaction = 1
+        with open(os.path.join(FIXTURE_DIR, "advisors.json")) as f:
+            self.advisors = json.load(f)
+        # Each advisor's meetings take consecutive hours from here, so they never overlap
+        self.advisor_slots = [0] * len(self.advisors)
+        self.meetings_start = self.end + timedelta(days=1, hours=9)
+
+    def run(self) -> Dict[str, int]:
+        os.makedirs(self.out_dir, exist_ok=True)
+        for name in STATIC_FILES:
+            shutil.copy(os.path.join(FIXTURE_DIR, name), os.path.join(self.out_dir, name))
+        writers = {
+            name: JsonArrayWriter(os.path.join(self.out_dir, f"{name}.json"))
+            for name in ("users", "accounts", "transactions", "schedule", "life_goals", "meetings")
+        }
+        try:
+            per_user, extra = divmod(self.transactions, self.users) if self.users else (0, 0)
+            for index in range(self.users):
+                # Each user has its own stream, so their data does not depend on any other user's
+                rng = random.Random(f"{self.seed}:{index}")
+                self.write_user(rng, index, per_user + (index < extra), writers)
+        finally:
+            for writer in writers.values():
+                writer.close()
+        return {name: writer.count for name, writer in writers.items()}
+
+    def write_user(self, rng: random.Random, index: int, transaction_count: int, writers: Dict[str, JsonArrayWriter]):
+        user_id = f"user-{index + 1:0{self.id_width}d}"
+        first = rng.choice(FIRST_NAMES)
+        name = f"{first} {rng.choice(LAST_INITIALS)}."
+        goals = rng.sample(GOALS, rng.randint(1, 3))
+        writers["users"].write({
+            "user_id": user_id,
+            "name": name,
+            "age": rng.randint(21, 80),
+            "risk_tolerance": rng.choice(RISK_TOLERANCES),
+            "profile_picture": None,
+            "address": f"{rng.randint(1, 9999)} {rng.choice(STREETS)}",
+            "credit_score": rng.randint(300, 850),
+            "member_since": rng.randint(2000, self.end.year),
+            "financial_blurb": f"{first} is a synthetic customer generated for load testing.",
+            "goals": [description for description, _ in goals],
+        })
+
+        initials = "".join(part[0] for part in name.split()).lower()
+        templates = [CHECKING, SAVINGS] + [template for share, template in OPTIONAL_ACCOUNTS if rng.random() < share]
+        accounts = [self.write_account(rng, user_id, initials, template, writers["accounts"]) for template in templates]
+        checking, savings = accounts[0], accounts[1]
+        spending = [account for account in accounts if account["sub_type"] in ("checking", "credit_card")]
+
+        # Transactions are written in date order within each user
+        offsets = sorted(rng.randrange(self.span) for _ in range(transaction_count))
+        for offset in offsets:
+            if rng.random() < INCOME_SHARE:
+                merchant_id, category, description, (low, high) = INCOME
+                account = checking
+            else:
+                merchant_id, category, description, (low, high), _ = rng.choices(SPENDING, cum_weights=SPENDING_CUM_WEIGHTS)[0]
+                account = rng.choice(spending)
+            writers["transactions"].write({
+                "transaction_id": f"txn_id_{self.next_transaction:09d}",
+                "account_id": account["account_id"],
+                "merchant_id": merchant_id,
+                "date": self.transaction_date(offset),
+                "description": description,
+                "amount": round(rng.uniform(low, high), 2),
+                "category": category,
+            })
+            self.next_transaction += 1
+
+        for description, (low, high) in goals:
+            target = round(rng.uniform(low, high), -2)
+            target_date = self.end + timedelta(days=rng.randint(180, 3650))
+            linked = rng.random() < 0.5
+            writers["life_goals"].write({
+                "goal_id": f"goal-{seeded_uuid(rng)}",
+                "user_id": user_id,
+                "description": description,
+                "target_amount": target,
+                "target_date": target_date.date().isoformat(),
+                "current_amount_saved": round(target * rng.uniform(0, 0.6), 2),
+                "account_id": savings["account_id"] if linked else None,
+            })
+
+        destinations = [savings] + [account for account in accounts if account["type"] == "investment"]
+        for _ in range(rng.randint(0, 2)):
+            destination = rng.choice(destinations)
+            start_date = self.start + timedelta(days=rng.randint(0, 365))
+            writers["schedule"].write({
+                "user_id": user_id,
+                "schedule_id": seeded_uuid(rng),
+                "source_account_id": checking["account_id"],
+                "destination_account_id": destination["account_id"],
+                "description": f"{destination['description']} Contribution",
+                "frequency": rng.choice(FREQUENCIES),
+                "start_date": iso(start_date),
+                "end_date": iso(start_date + timedelta(days=rng.randint(365, 3650))),
+                "amount": float(rng.randrange(50, 2000, 25)),
+            })
+
+        if self.advisors and rng.random() < self.meeting_rate:
+            advisor_index = rng.randrange(len(self.advisors))
+            advisor = self.advisors[advisor_index]
+            slot = self.advisor_slots[advisor_index]
+            self.advisor_slots[advisor_index] += 1
+            writers["meetings"].write({
+                "meeting_id": f"meet-{seeded_uuid(rng)}",
+                "user_id": user_id,
+                "advisor_name": advisor["name"],
+                "advisor_type": advisor["advisor_type"],
+                "meeting_time": iso(self.meetings_start + timedelta(hours=slot)),
+                "duration_minutes": 60,
+                "notes": None,
+            })
+
+    def transaction_date(self, offset: int) -> str:
+        """Formats `offset` seconds after the start of the history like iso()."""
+        day, seconds = divmod(offset, 86400)
+        hours, seconds = divmod(seconds, 3600)
+        minutes, seconds = divmod(seconds, 60)
+        return f"{self.day_prefixes[day]}{hours:02d}:{minutes:02d}:{seconds:02d}Z"
+
+    def write_account(self, rng: random.Random, user_id: str, initials: str, template, writer: JsonArrayWriter) -> dict:
+        category, account_type, sub_type, description, (low, high) = template
+        prefix = f"acc-{initials}-{ACCOUNT_TYPE_MAP.get(account_type, 'x')}-"
+        number = self.account_numbers.get(prefix, 0) + 1
+        self.account_numbers[prefix] = number
+        account = {
+            "account_id": f"{prefix}{number:03d}",
+            "user_id": user_id,
+            "category": category,
+            "type": account_type,
+            "sub_type": sub_type,
+            "description": description,
+            "balance": round(rng.uniform(low, high), 2),
+            "institution": rng.choice(INSTITUTIONS),
+        }
+        if sub_type in INTEREST_RATES:
+            account["interest_rate"] = round(rng.uniform(*INTEREST_RATES[sub_type]), 4)
+        if sub_type == "brokerage":
+            account["holdings"] = [{"symbol": "SPY", "value": round(account["balance"] * 0.6, 2)}]
+        writer.write(account)
+        return account
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--out", required=True, help="Directory to write the data files to")
+    parser.add_argument("--users", type=int, default=10000)
+    parser.add_argument("--transactions", type=int, default=10_000_000, help="Total transactions, spread evenly over users")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--end", type=date.fromisoformat, default=datetime.now(timezone.utc).date(),
+                        help="Last day of transaction history, YYYY-MM-DD (default: today, UTC)")
+    parser.add_argument("--days", type=int, default=365, help="Days of transaction history before --end")
+    parser.add_argument("--meetings", type=float, default=0.2, help="Share of users with a booked advisor meeting")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> Dict[str, int]:
+    args = parse_args(argv)
+    started = time.perf_counter()
+    counts = Generator(args.out, args.users, args.transactions, args.seed, args.end, args.days, args.meetings).run()
+    elapsed = time.perf_counter() - started
+    print(f"Wrote {args.out} in {elapsed:.1f}s (seed {args.seed}, history ending {args.end}):")
+    for name, count in counts.items():
+        print(f"  {name}.json: {count}")
+    return counts
+
+
+if __name__ == "__main__":
+    main()
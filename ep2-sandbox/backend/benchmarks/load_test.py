@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Load test one uvicorn worker at high concurrency.
+
+Starts the API in a single uvicorn worker on a copy of the sample data, then
+keeps `--concurrency` keep-alive connections busy for `--seconds`, cycling
+through a mix of read endpoints plus an occasional goal write. Reports
+requests/sec and latency percentiles.
+
+Pass `--code-dir` to load test another checkout of backend/code (for example
+a git worktree of an earlier commit) against the same data and mix.
+
+Usage:
+    python benchmarks/load_test.py --concurrency 200 --seconds 15
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from typing import List
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+DEFAULT_CODE_DIR = os.path.join(BACKEND_DIR, "code")
+DEFAULT_DATA_DIR = os.path.join(DEFAULT_CODE_DIR, "db")
+
+READ_PATHS = [
+    "/api/users/{user}",
+    "/api/users/{user}/accounts",
+    "/api/users/{user}/transactions?history=90",
+    "/api/users/{user}/networth",
+    "/api/users/{user}/cashflow",
+    "/api/users/{user}/debts",
+    "/api/users/{user}/investments",
+    "/api/goals/{user}",
+    "/api/partners",
+    "/api/advisors",
+]
+# One request in WRITE_EVERY creates a goal
+WRITE_EVERY = 50
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(code_dir: str, data_dir: str, port: int) -> subprocess.Popen:
+    env = dict(os.environ, DATA_DIR=data_dir)
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--workers", "1", "--log-level", "warning"],
+        cwd=code_dir,
+        env=env,
+    )
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1.0).close()
+            return server
+        except OSError:
+            time.sleep(0.2)
+    server.kill()
+    raise RuntimeError("uvicorn did not start")
+
+
+def user_ids(data_dir: str) -> List[str]:
+    with open(os.path.join(data_dir, "users.json")) as f:
+        return [user["user_id"] for user in json.load(f)]
+
+
+async def read_response(reader: asyncio.StreamReader) -> int:
+    """Reads one HTTP/1.1 response and returns its status code."""
+    head = await reader.readuntil(b"\r\n\r\n")
+    lines = head.decode("latin-1").split("\r\n")
+    status = int(lines[0].split(" ", 2)[1])
+    headers = dict(line.split(": ", 1) for line in lines[1:] if ": " in line)
+    length = int(headers.get("content-length", headers.get("Content-Length", 0)))
+    if length:
+        await reader.readexactly(length)
+    return status
+
+
+def encode_request(method: str, path: str, body: bytes = b"") -> bytes:
+    head = f"{method} {path} HTTP/1.1\r\nHost: localhost\r\nContent-Length: {len(body)}\r\n"
+    if body:
+        head += "Content-Type: application/json\r\n"
+    return head.encode() + b"\r\n" + body
+
+
+async def drive(port: int, users: List[str], concurrency: int, seconds: float):
+    """
+    Keeps `concurrency` keep-alive connections busy until the deadline. The
+    client speaks HTTP/1.1 directly over asyncio streams so that, on a small
+    machine, it leaves as much CPU as possible to the server being measured.
+    """
+    latencies: List[float] = []
+    errors = 0
+    counter = 0
+    deadline = time.perf_counter() + seconds
+
+    async def connection():
+        nonlocal errors, counter
+        reader, writer = await asyncio.open_connection("127.0.0.1", port, limit=2**24)
+        try:
+            while time.perf_counter() < deadline:
+                counter += 1
+                user = users[counter % len(users)]
+                if counter % WRITE_EVERY == 0:
+                    goal = {
+                        "user_id": user,
+                        "description": "Load test",
+                        "target_amount": 1000.0,
+                        "target_date": "2030-01-01",
+                        "current_amount_saved": 0.0,
+                    }
+                    request = encode_request("POST", "/api/goals", json.dumps(goal).encode())
+                else:
+                    request = encode_request("GET", READ_PATHS[counter % len(READ_PATHS)].format(user=user))
+                started = time.perf_counter()
+                writer.write(request)
+                status = await read_response(reader)
+                latencies.append(time.perf_counter() - started)
+                if status >= 500:
+                    errors += 1
+        finally:
+            writer.close()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(connection() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return len(latencies) / elapsed, latencies, errors
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--code-dir", default=DEFAULT_CODE_DIR)
+    parser.add_argument("--data-dir", default=DEFAULT_DATA_DIR)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--seconds", type=float, default=15.0)
+    args = parser.parse_args()
+
+    data_dir = tempfile.mkdtemp(prefix="load-test-")
+    shutil.copytree(args.data_dir, data_dir, dirs_exist_ok=True)
+    port = free_port()
+    server = start_server(os.path.abspath(args.code_dir), data_dir, port)
+    try:
+        users = user_ids(data_dir)
+        # Warm up caches and derived indexes before measuring
+        asyncio.run(drive(port, users, 10, 2.0))
+        rate, latencies, errors = asyncio.run(drive(port, users, args.concurrency, args.seconds))
+    finally:
+        server.terminate()
+        server.wait()
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+    print(f"concurrency {args.concurrency}, {len(latencies)} requests in {args.seconds:.0f}s, {errors} errors")
+    print(f"{'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    print(
+        f"{rate:>8.0f} {percentile(latencies, 0.50) * 1000:>8.1f} "
+        f"{percentile(latencies, 0.95) * 1000:>8.1f} {percentile(latencies, 0.99) * 1000:>8.1f}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+# app/api/conditional.py
+
+import hashlib
+import time
+import uuid
+from datetime import datetime, timezone
+from email.utils import formatdate
+from typing import Callable, Optional, Tuple
+from urllib.parse import urlencode
+
+from fastapi import HTTPException, Request, Response
+from fastapi.routing import APIRoute
+
+from core import aio
+from core.repository import Collection
+
+# Collection versions are per-process counters, so ETags are scoped to this
+# process. A client that reaches another worker just gets a full response.
+_PROCESS_TOKEN = uuid.uuid4().hex
+
+
+def _matches(if_none_match: str, etag: str) -> bool:
+    """Weak comparison of an ETag against an If-None-Match header value."""
+    if if_none_match.strip() == "*":
+        return True
+    candidates = (tag.strip() for tag in if_none_match.split(","))
+    return any(tag.removeprefix("W/") == etag for tag in candidates)
+
+
+class ConditionalGet:
+    """
+    A route dependency that validates GET requests against the version of the
+    collections the response is computed from.
+
+    The ETag is a hash of the request path and query and those collections'
+    change counters, plus the current UTC date for responses that depend on it
+    (rolling windows), so every user and parameter variant of a route gets its
+    own tag. A request whose If-None-Match matches is answered with 304 before
+    the endpoint runs, so nothing is computed or serialized; otherwise
+    ConditionalRoute adds the ETag and Last-Modified headers to the endpoint's
+    response.
+    """
+
+    def __init__(self, *sources: Collection, daily: bool = False):
+        self.sources = sources
+        self.daily = daily
+        self._versions: Optional[Tuple] = None
+        self._last_modified = ""
+
+    def validator(self, resource: str = "") -> Tuple[str, str]:
+        """Returns the current (ETag, Last-Modified) pair for `resource`, the request path and sorted query."""
+        # Called on the event loop after aio.ready(), so read the versions without locking
+        versions = tuple(source.cached()[0] for source in self.sources)
+        if self.daily:
+            versions += (datetime.now(timezone.utc).date().isoformat(),)
+        if versions != self._versions:
+            # Last-Modified is when this process first saw the current versions
+            self._last_modified = formatdate(time.time(), usegmt=True)
+            self._versions = versions
+        digest = hashlib.blake2b(f"{_PROCESS_TOKEN}{id(self)}{resource}{versions}".encode(), digest_size=8).hexdigest()
+        return f'"{digest}"', self._last_modified
+
+    async def __call__(self, request: Request):
+        try:
+            await aio.ready(*self.sources)
+            resource = f"{request.url.path}?{urlencode(sorted(request.query_params.multi_items()))}"
+            etag, last_modified = self.validator(resource)
+        except (OSError, ValueError):
+            # Missing or unreadable data; let the endpoint report it
+            return
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match and _matches(if_none_match, etag):
+            raise HTTPException(status_code=304, headers={"ETag": etag, "Last-Modified": last_modified})
+        request.state.validator = (etag, last_modified)
+
+
+class ConditionalRoute(APIRoute):
+    """Adds the ETag and Last-Modified computed by a ConditionalGet dependency to successful responses."""
+
+    def get_route_handler(self) -> Callable:
+        handler = super().get_route_handler()
+
+        async def conditional_handler(request: Request) -> Response:
+            response = await handler(request)
+            validator = getattr(request.state, "validator", None)
+            if validator is not None and response.status_code == 200:
+                response.headers["ETag"], response.headers["Last-Modified"] = validator
+            return response
+
+        return conditional_handler
@@ -1,13 +1,16 @@
 # backend/api/endpoints/accounts.py
 
-import json
-from fastapi import APIRouter, status, HTTPException
+from fastapi import APIRouter, Depends, status, HTTPException
 from typing import List
-from api.models import Account, User
+from api.conditional import ConditionalGet, ConditionalRoute
+from api.models import Account
+from api.responses import model_list_response
+from core import aio, indexes, repository
+from core.sequences import account_sequences
 
-router = APIRouter()
-USERS_FILE = "db/users.json"
-DATA_FILE = "db/accounts.json"
+router = APIRouter(route_class=ConditionalRoute)
+
+accounts_version = ConditionalGet(repository.accounts)
 
 # Map account types to their corresponding code letters
 ACCOUNT_TYPE_MAP = {
@@ -18,52 +21,30 @@ ACCOUNT_TYPE_MAP = {
     "pension": "p"
 }
 
-def read_users_data() -> List[User]:
-    """Reads user data from the JSON file."""
-    try:
-        with open(USERS_FILE, "r") as f:
-            users_data = json.load(f)
-        return [User(**user) for user in users_data]
-    except (FileNotFoundError, json.JSONDecodeError):
-        return []
-
-def read_accounts_data() -> List[Account]:
-    with open(DATA_FILE, "r") as f:
-        accounts_data = json.load(f)
-    return [Account(**acc) for acc in accounts_data]
-
-def write_accounts_data(accounts: List[Account]):
-    """Writes the list of accounts back to the JSON file."""
-    with open(DATA_FILE, "w") as f:
-        json_data = [acc.model_dump() for acc in accounts]
-        json.dump(json_data, f, indent=4)
-
-
-@router.get("/users/{user_id}/accounts", response_model=List[Account])
-def get_user_accounts(user_id: str):
+@router.get("/users/{user_id}/accounts", response_model=List[Account], dependencies=[Depends(accounts_version)])
+async def get_user_accounts(user_id: str):
     """
     Get all accounts for a user.
     """
     normalized_user_id = user_id.replace("_", "-")
-    accounts = read_accounts_data()
-    user_accounts = [acc for acc in accounts if acc.user_id == normalized_user_id]
-    return user_accounts
+    await aio.ready(indexes.accounts_by_user)
+    return model_list_response(indexes.accounts_for_user(normalized_user_id))
 
 @router.post("/users/{user_id}/accounts", response_model=Account, status_code=status.HTTP_201_CREATED)
-def create_account_for_user(user_id: str, account_in: Account):
+async def create_account_for_user(user_id: str, account_in: Account):
     """
     Create a new account for a specific user.
     The account_id is generated automatically based on user initials,
     account type, and an incremental number (e.g., acc-mw-i-001).
     """
     normalized_user_id = user_id.replace("_", "-")
-    
+
     # 1. Get user's initials
-    users = read_users_data()
-    user = next((u for u in users if u.user_id == normalized_user_id), None)
+    await aio.ready(indexes.users_by_id)
+    user = indexes.user_by_id(normalized_user_id)
     if not user:
         raise HTTPException(status_code=404, detail=f"User with ID '{normalized_user_id}' not found")
-    
+
     name_parts = user.name.split()
     initials = "".join(part[0] for part in name_parts).lower()
 
@@ -71,35 +52,14 @@ def create_account_for_user(user_id: str, account_in: Account):
     account_type = account_in.type.lower()
     type_code = ACCOUNT_TYPE_MAP.get(account_type, 'x')
 
-    # 3. Find the next incremental number for this user and account type
-    accounts = read_accounts_data()
+    # 3. Allocate the next number for this user and account type, and save.
+    # Another worker may have taken the same number; then allocate the next one.
     id_prefix = f"acc-{initials}-{type_code}-"
-    
-    relevant_accounts = [acc for acc in accounts if acc.account_id.startswith(id_prefix)]
-    
-    max_num = 0
-    for acc in relevant_accounts:
-        try:
-            num_part = int(acc.account_id.split('-')[-1])
-            if num_part > max_num:
-                max_num = num_part
-        except (ValueError, IndexError):
-            # Ignore malformed IDs
-            continue
-            
-    new_num = max_num + 1
-    new_formatted_num = f"{new_num:03d}"
-    
-    # 4. Construct the new Account object
-    new_account_id = f"{id_prefix}{new_formatted_num}"
-    
-    new_account = account_in.model_copy(update={
-        "user_id": normalized_user_id,
-        "account_id": new_account_id
-    })
-    
-    # 5. Save and return the new account
-    accounts.append(new_account)
-    write_accounts_data(accounts)
-    
-    return new_account
\ No newline at end of file
+    while True:
+        await aio.ready(repository.accounts)
+        new_account = account_in.model_copy(update={
+            "user_id": normalized_user_id,
+            "account_id": f"{id_prefix}{account_sequences.allocate(id_prefix):03d}"
+        })
+        if await repository.accounts.ainsert_new(new_account):
+            return new_account
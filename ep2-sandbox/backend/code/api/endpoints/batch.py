@@ -0,0 +1,110 @@
+# backend/api/endpoints/batch.py
+
+import asyncio
+import json
+from fastapi import APIRouter, HTTPException, Request, Response
+from typing import List, Tuple
+from api.models import BatchRequest, BatchResponse
+from core.config import API_PREFIX, BATCH_MAX_REQUESTS
+
+router = APIRouter()
+
+BATCH_PATH = f"{API_PREFIX}/batch"
+READ_METHODS = {"GET"}
+
+
+async def run_sub_request(request: Request, sub_request: BatchRequest) -> Tuple[int, bytes]:
+    """
+    Runs one sub-request through the application in-process and returns its
+    status and a JSON encoding of its body (null when there is none).
+    """
+    path, _, query = sub_request.path.partition("?")
+    body = b"" if sub_request.body is None else json.dumps(sub_request.body).encode()
+    scope = {
+        "type": "http",
+        "asgi": request.scope.get("asgi", {"version": "3.0"}),
+        "http_version": "1.1",
+        "method": sub_request.method,
+        "scheme": request.url.scheme,
+        "server": request.scope.get("server"),
+        "client": request.scope.get("client"),
+        "root_path": request.scope.get("root_path", ""),
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": query.encode(),
+        "headers": [
+            (b"accept", b"application/json"),
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+        ],
+    }
+    received = False
+
+    async def receive():
+        nonlocal received
+        if received:
+            # Nothing more to read; only asked for when waiting for a disconnect
+            await asyncio.Event().wait()
+        received = True
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    status = 500
+    content_type = b""
+    chunks: List[bytes] = []
+
+    async def send(message):
+        nonlocal status, content_type
+        if message["type"] == "http.response.start":
+            status = message["status"]
+            content_type = dict(message.get("headers", [])).get(b"content-type", b"")
+        elif message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+
+    try:
+        await request.app(scope, receive, send)
+    except Exception:
+        # The error middleware has already sent a 500 response, or nothing at all
+        if not chunks:
+            return 500, b'{"detail":"Internal Server Error"}'
+
+    content = b"".join(chunks)
+    if not content:
+        return status, b"null"
+    if content_type.startswith(b"application/json"):
+        return status, content
+    return status, json.dumps(content.decode("utf-8", errors="replace")).encode()
+
+
+@router.post("/batch", response_model=List[BatchResponse])
+async def run_batch(request: Request, sub_requests: List[BatchRequest]):
+    """
+    Runs several API requests in one call and returns their results in order.
+
+    Each sub-request is dispatched to the API's routers in-process. Consecutive
+    reads (GET) run concurrently; a write waits for the requests before it and
+    the requests after it wait for the write, so a batch behaves as if it were
+    sent one request at a time.
+    """
+    if len(sub_requests) > BATCH_MAX_REQUESTS:
+        raise HTTPException(status_code=413, detail=f"A batch may contain at most {BATCH_MAX_REQUESTS} requests")
+    for sub_request in sub_requests:
+        path = sub_request.path.partition("?")[0]
+        if not path.startswith(f"{API_PREFIX}/"):
+            raise HTTPException(status_code=422, detail=f"Batch paths must start with {API_PREFIX}/: {sub_request.path}")
+        if path.rstrip("/") == BATCH_PATH:
+            raise HTTPException(status_code=422, detail="Batches cannot be nested")
+
+    results: List[Tuple[int, bytes]] = []
+    reads: List[BatchRequest] = []
+    for sub_request in [*sub_requests, None]:
+        if sub_request is not None and sub_request.method in READ_METHODS:
+            reads.append(sub_request)
+            continue
+        if reads:
+            results.extend(await asyncio.gather(*(run_sub_request(request, read) for read in reads)))
+            reads = []
+        if sub_request is not None:
+            results.append(await run_sub_request(request, sub_request))
+
+    content = b"[" + b",".join(b'{"status":%d,"body":%s}' % result for result in results) + b"]"
+    return Response(content=content, media_type="application/json")
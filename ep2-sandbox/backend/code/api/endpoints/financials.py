@@ -1,104 +1,140 @@
-import json
-from fastapi import APIRouter, HTTPException
-from typing import List, Dict, Any
-from datetime import datetime, timedelta
-from api.models import Account, NetWorth, CashFlow, AverageCashFlow
+from fastapi import APIRouter, Depends, HTTPException, Query
+from typing import List, Literal, Optional
+from datetime import date, datetime, timedelta, timezone
+from api.conditional import ConditionalGet, ConditionalRoute
+from api.models import Account, NetWorth, CashFlow, CashFlowBucket, AverageCashFlow
+from api.responses import model_list_response
+from core import aggregates, aio, columnar, indexes, repository
 
-router = APIRouter()
+router = APIRouter(route_class=ConditionalRoute)
 
+accounts_version = ConditionalGet(repository.accounts)
+# Cash flow windows end today, so their responses also change at midnight UTC
+cash_flow_version = ConditionalGet(repository.accounts, repository.transactions, daily=True)
 
-def load_data(file_name: str) -> List[Dict[str, Any]]:
+
+async def load_user_accounts(user_id: str) -> List[Account]:
     try:
-        with open(f"db/{file_name}", "r") as f:
-            return json.load(f)
+        await aio.ready(indexes.accounts_by_user)
+        return indexes.accounts_for_user(user_id)
     except FileNotFoundError:
-        raise HTTPException(status_code=404, detail=f"{file_name} not found")
+        raise HTTPException(status_code=404, detail="accounts.json not found")
+
+async def load_transaction_columns() -> columnar.TransactionColumns:
+    try:
+        await aio.ready(columnar.transaction_columns)
+        return columnar.transaction_columns.get()
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="transactions.json not found")
+
+def day_number(day: date) -> int:
+    """Returns the UTC day number (epoch seconds // 86400) of a calendar date."""
+    return (day - date(1970, 1, 1)).days
 
-@router.get("/users/{user_id}/debts", response_model=List[Account], tags=["Financials"])
-def get_user_debts(user_id: str) -> List[Account]:
+def bucket_starts(first: date, last: date, granularity: str) -> List[date]:
+    """Returns the first day of each day/week/month bucket overlapping [first, last], starting with `first`."""
+    starts = [first]
+    while True:
+        current = starts[-1]
+        if granularity == "day":
+            following = current + timedelta(days=1)
+        elif granularity == "week":
+            following = current + timedelta(days=7 - current.weekday())
+        else:
+            following = (current.replace(day=1) + timedelta(days=32)).replace(day=1)
+        if following > last:
+            return starts
+        starts.append(following)
+
+async def sum_user_cash_flow(user_id: str, days: int) -> float:
+    """Returns the sum of the user's transaction amounts over the last `days` UTC days, today included."""
+    today = day_number(datetime.now(timezone.utc).date())
+    columns = await load_transaction_columns()
+    return columns.flow_between_days(user_id, today - days + 1, today)
+
+@router.get("/users/{user_id}/debts", response_model=List[Account], dependencies=[Depends(accounts_version)], tags=["Financials"])
+async def get_user_debts(user_id: str):
     """
     Retrieves all debt accounts for a specific user.
     """
     normalized_user_id = user_id.replace("_", "-")
-    accounts = load_data("accounts.json")
-    debt_accounts = [
-        acc for acc in accounts if acc["user_id"] == normalized_user_id and acc["category"] == "liability"
-    ]
+    accounts = await load_user_accounts(normalized_user_id)
+    debt_accounts = [acc for acc in accounts if acc.category == "liability"]
     if not debt_accounts:
         raise HTTPException(status_code=404, detail="No debt accounts found for this user")
-    return debt_accounts
+    return model_list_response(debt_accounts)
 
-@router.get("/users/{user_id}/investments", response_model=List[Account], tags=["Financials"])
-def get_user_investments(user_id: str) -> List[Account]:
+@router.get("/users/{user_id}/investments", response_model=List[Account], dependencies=[Depends(accounts_version)], tags=["Financials"])
+async def get_user_investments(user_id: str):
     """
     Retrieves all investment accounts for a specific user.
     """
     normalized_user_id = user_id.replace("_", "-")
-    accounts = load_data("accounts.json")
+    accounts = await load_user_accounts(normalized_user_id)
     investment_accounts = [
-        acc for acc in accounts if acc["user_id"] == normalized_user_id and acc["category"] == "asset" and acc["type"] == "investment"
+        acc for acc in accounts if acc.category == "asset" and acc.type == "investment"
     ]
     if not investment_accounts:
         raise HTTPException(status_code=404, detail="No investment accounts found for this user")
-    return investment_accounts
+    return model_list_response(investment_accounts)
 
-@router.get("/users/{user_id}/networth", response_model=NetWorth, tags=["Financials"])
-def get_user_net_worth(user_id: str) -> NetWorth:
+@router.get("/users/{user_id}/networth", response_model=NetWorth, dependencies=[Depends(accounts_version)], tags=["Financials"])
+async def get_user_net_worth(user_id: str) -> NetWorth:
     """
     Calculates the net worth of a specific user.
     """
     normalized_user_id = user_id.replace("_", "-")
-    accounts = load_data("accounts.json")
-    user_accounts = [acc for acc in accounts if acc["user_id"] == normalized_user_id]
-    if not user_accounts:
+    try:
+        await aio.ready(aggregates.user_balances)
+        totals = aggregates.user_balances.get(normalized_user_id)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="accounts.json not found")
+
+    if totals is None:
         raise HTTPException(status_code=404, detail="No accounts found for this user")
 
-    net_worth = sum(acc["balance"] for acc in user_accounts)
-    return NetWorth(net_worth=net_worth)
+    return NetWorth(
+        net_worth=totals.net_worth,
+        total_assets=totals.total_assets,
+        total_liabilities=totals.total_liabilities,
+    )
 
-@router.get("/users/{user_id}/cashflow", response_model=CashFlow, tags=["Financials"])
-def get_user_cash_flow(user_id: str) -> CashFlow:
+@router.get("/users/{user_id}/cashflow", response_model=CashFlow, response_model_exclude_none=True, dependencies=[Depends(cash_flow_version)], tags=["Financials"])
+async def get_user_cash_flow(
+    user_id: str,
+    days: int = Query(30, ge=1, le=3660),
+    granularity: Optional[Literal["day", "week", "month"]] = None,
+) -> CashFlow:
     """
-    Calculates the cash flow for a specific user over the last 30 days.
+    Calculates the cash flow for a specific user over the last `days` days (30 by default).
+    With `granularity`, the window is also broken down into daily, weekly (Monday to
+    Sunday) or calendar-month buckets; the first and last buckets may be partial.
     """
     normalized_user_id = user_id.replace("_", "-")
-    transactions = load_data("transactions.json")
-    accounts = load_data("accounts.json")
-    user_account_ids = [
-        acc["account_id"] for acc in accounts if acc["user_id"] == normalized_user_id
-    ]
-
-    thirty_days_ago = datetime.now() - timedelta(days=30)
-    recent_transactions = [
-        t
-        for t in transactions
-        if t["account_id"] in user_account_ids
-        and datetime.fromisoformat(t["date"].replace("Z", "")) > thirty_days_ago
-    ]
+    columns = await load_transaction_columns()
+    last = datetime.now(timezone.utc).date()
+    first = last - timedelta(days=days - 1)
+    total = columns.flow_between_days(normalized_user_id, day_number(first), day_number(last))
+    cash_flow = CashFlow(cash_flow_last_30_days=total if days == 30 else None, days=days, cash_flow=total)
 
-    cash_flow = sum(t["amount"] for t in recent_transactions)
-    return CashFlow(cash_flow_last_30_days=cash_flow)
+    if granularity:
+        starts = bucket_starts(first, last, granularity)
+        ends = [start - timedelta(days=1) for start in starts[1:]] + [last]
+        boundaries = [day_number(start) for start in starts] + [day_number(last) + 1]
+        flows = columns.bucketed_flow(normalized_user_id, boundaries)
+        cash_flow.granularity = granularity
+        cash_flow.buckets = [
+            CashFlowBucket(start=start, end=end, cash_flow=flow)
+            for start, end, flow in zip(starts, ends, flows)
+        ]
+    return cash_flow
 
-@router.get("/users/{user_id}/average_cashflow", response_model=AverageCashFlow, tags=["Financials"])
-def get_user_average_cash_flow(user_id: str) -> AverageCashFlow:
+@router.get("/users/{user_id}/average_cashflow", response_model=AverageCashFlow, dependencies=[Depends(cash_flow_version)], tags=["Financials"])
+async def get_user_average_cash_flow(user_id: str) -> AverageCashFlow:
     """
     Calculates the average monthly cash flow for a specific user over the last 3 months.
     """
     normalized_user_id = user_id.replace("_", "-")
-    transactions = load_data("transactions.json")
-    accounts = load_data("accounts.json")
-    user_account_ids = [
-        acc["account_id"] for acc in accounts if acc["user_id"] == normalized_user_id
-    ]
-
-    ninety_days_ago = datetime.now() - timedelta(days=90)
-    recent_transactions = [
-        t
-        for t in transactions
-        if t["account_id"] in user_account_ids
-        and datetime.fromisoformat(t["date"].replace("Z", "")) > ninety_days_ago
-    ]
-
-    total_cash_flow = sum(t["amount"] for t in recent_transactions)
+    total_cash_flow = await sum_user_cash_flow(normalized_user_id, days=90)
     average_cash_flow = total_cash_flow / 3 if total_cash_flow else 0
     return AverageCashFlow(average_monthly_cash_flow=average_cash_flow)
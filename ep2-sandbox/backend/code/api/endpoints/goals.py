@@ -1,80 +1,100 @@
 # backend/api/endpoints/goals.py
 
-import json
 from fastapi import APIRouter, HTTPException, status
 from typing import List
-from api.models import LifeGoal
-import uuid
+from datetime import datetime, timezone
+from api.endpoints.financials import sum_user_cash_flow
+from api.models import GoalProjection, LifeGoal
+from core import aio, indexes, repository
+from core.projections import project_goals
+from core.recurrence import add_months
 
 router = APIRouter()
 
-DATA_FILE = "db/life_goals.json"
-
-def read_goals_data() -> List[LifeGoal]:
-    with open(DATA_FILE, "r") as f:
-        goals_data = json.load(f)
-    return [LifeGoal(**goal) for goal in goals_data]
-
-def write_goals_data(goals: List[LifeGoal]):
-    with open(DATA_FILE, "w") as f:
-        json.dump([goal.model_dump() for goal in goals], f, indent=2)
-
 @router.get("/goals/{user_id}", response_model=List[LifeGoal])
-def get_user_goals(user_id: str):
+async def get_user_goals(user_id: str):
     """
     Get user's financial goals.
     """
     normalized_user_id = user_id.replace("_", "-")
-    goals = read_goals_data()
-    user_goals = [goal for goal in goals if goal.user_id == normalized_user_id]
-    return user_goals
+    await aio.ready(indexes.goals_by_user)
+    return indexes.goals_for_user(normalized_user_id)
+
+@router.get("/goals/{user_id}/projections", response_model=List[GoalProjection], response_model_exclude_none=True)
+async def get_user_goal_projections(user_id: str, series: bool = False):
+    """
+    Project whether each of the user's goals will be reached by its target date.
+
+    Savings grow each month by the recurring schedules paying into the goal's
+    account_id plus an even share of the user's average monthly cash flow
+    (last 3 months) across unfunded goals. With `series=true`, the projected
+    balance at the end of every month up to the target date is included.
+    """
+    normalized_user_id = user_id.replace("_", "-")
+    await aio.ready(indexes.goals_by_user, indexes.schedules_by_user)
+    goals = indexes.goals_for_user(normalized_user_id)
+    if not goals:
+        return []
+    schedules = indexes.schedules_for_user(normalized_user_id)
+    monthly_cash_flow = await sum_user_cash_flow(normalized_user_id, days=90) / 3
+
+    today = datetime.now(timezone.utc)
+    projections = project_goals(goals, schedules, monthly_cash_flow, today)
+    results = []
+    for g, goal in enumerate(goals):
+        months = int(projections.months_remaining[g])
+        months_to_target = int(projections.months_to_target[g])
+        results.append(GoalProjection(
+            goal_id=goal.goal_id,
+            description=goal.description,
+            target_amount=goal.target_amount,
+            target_date=goal.target_date,
+            current_amount_saved=goal.current_amount_saved,
+            months_remaining=months,
+            monthly_contribution=round(float(projections.monthly_contribution[g]), 2),
+            projected_amount=round(float(projections.projected_amount[g]), 2),
+            on_track=bool(projections.on_track[g]),
+            shortfall=round(float(projections.shortfall[g]), 2),
+            required_monthly_contribution=round(float(projections.required_monthly_contribution[g]), 2),
+            projected_completion_date=add_months(today, months_to_target).date() if months_to_target >= 0 else None,
+            monthly_balances=projections.balances[g, :months].round(2).tolist() if series else None,
+        ))
+    return results
 
 @router.post("/goals", response_model=LifeGoal, status_code=status.HTTP_201_CREATED)
-def create_goal(goal_payload: LifeGoal):
+async def create_goal(goal_payload: LifeGoal):
     """
     Create a new financial goal. The goal_id is generated automatically.
     """
-    goals = read_goals_data()
-    
     # Create a new LifeGoal instance to ensure a server-generated UUID
     new_goal = LifeGoal(
         user_id=goal_payload.user_id,
         description=goal_payload.description,
         target_date=goal_payload.target_date,
         target_amount=goal_payload.target_amount,
-        current_amount_saved=goal_payload.current_amount_saved
+        current_amount_saved=goal_payload.current_amount_saved,
+        account_id=goal_payload.account_id
     )
     
-    goals.append(new_goal)
-    write_goals_data(goals)
+    await repository.goals.ainsert(new_goal)
     return new_goal
 
 @router.put("/goals/{goal_id}", response_model=LifeGoal)
-def update_goal(goal_id: str, updated_goal: LifeGoal):
+async def update_goal(goal_id: str, updated_goal: LifeGoal):
     """
     Update a financial goal.
     """
-    goals = read_goals_data()
-    goal_index = next((i for i, goal in enumerate(goals) if goal.goal_id == goal_id), None)
-
-    if goal_index is None:
+    if not await repository.goals.aupdate(goal_id, updated_goal):
         raise HTTPException(status_code=404, detail="Goal not found")
 
-    goals[goal_index] = updated_goal
-    write_goals_data(goals)
     return updated_goal
 
 @router.delete("/goals/{goal_id}", status_code=204)
-def cancel_goal(goal_id: str):
+async def cancel_goal(goal_id: str):
     """
     Cancel a customer goal.
     """
-    goals = read_goals_data()
-    goal_to_delete = next((g for g in goals if g.goal_id == goal_id), None)
-
-    if not goal_to_delete:
+    if not await repository.goals.adelete(goal_id):
         raise HTTPException(status_code=404, detail="Goal not found")
 
-    updated_goals = [g.model_dump() for g in goals if g.goal_id != goal_id]
-    write_goals_data(updated_goals)
     return
\ No newline at end of file
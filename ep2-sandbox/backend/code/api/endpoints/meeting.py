@@ -1,93 +1,126 @@
 import json
-from fastapi import APIRouter, HTTPException, Body
-from typing import List
-from api.models import Advisor, Meeting
+from fastapi import APIRouter, Depends, HTTPException, Body, Query
+from typing import List, Optional
+from api.conditional import ConditionalGet, ConditionalRoute
+from api.models import Advisor, Meeting, TimeSlot
+from core import aio, repository
+from core.bookings import advisor_bookings, availability_intervals, meeting_interval, parse_availability
+from core.indexes import epoch_seconds
+from core.repository import Collection
 import datetime
 
-router = APIRouter()
+router = APIRouter(route_class=ConditionalRoute)
 
-ADVISOR_DATA_FILE = "db/advisors.json"
-MEETING_DATA_FILE = "db/meetings.json"
+advisors_version = ConditionalGet(repository.advisors)
+meetings_version = ConditionalGet(repository.meetings)
+free_slots_version = ConditionalGet(repository.advisors, repository.meetings)
+
+# Longest range a free-slots query may cover
+MAX_FREE_SLOT_DAYS = 92
 
 # Helper functions for data handling
-def read_data(file_path: str) -> list:
+async def read_data(collection: Collection, **filters) -> list:
     try:
-        with open(file_path, "r") as f:
-            return json.load(f)
+        return await (collection.afind(**filters) if filters else collection.aall())
     except (FileNotFoundError, json.JSONDecodeError):
         return []
 
-def write_data(file_path: str, data: list):
-    with open(file_path, "w") as f:
-        json.dump(data, f, indent=2, default=str) # Use default=str for datetime
-
-def get_advisors() -> List[Advisor]:
-    advisors_data = read_data(ADVISOR_DATA_FILE)
-    return [Advisor(**advisor) for advisor in advisors_data]
+async def get_advisors() -> List[Advisor]:
+    return await read_data(repository.advisors)
 
-def get_meetings() -> List[Meeting]:
-    meetings_data = read_data(MEETING_DATA_FILE)
-    return [Meeting(**meeting) for meeting in meetings_data]
+async def get_meetings() -> List[Meeting]:
+    return await read_data(repository.meetings)
 
 # --- API Endpoints ---
 
-@router.get("/advisors", response_model=List[Advisor])
-def list_advisors():
+@router.get("/advisors", response_model=List[Advisor], dependencies=[Depends(advisors_version)])
+async def list_advisors():
     """
     Get a list of all available financial advisors.
     """
-    return get_advisors()
+    return await get_advisors()
 
-@router.get("/advisors/{advisor_type}", response_model=List[Advisor])
-def get_advisors_by_type(advisor_type: str):
+@router.get("/advisors/{advisor_type}", response_model=List[Advisor], dependencies=[Depends(advisors_version)])
+async def get_advisors_by_type(advisor_type: str):
     """
     Get advisors by their specialization type.
     """
-    advisors = get_advisors()
+    advisors = await get_advisors()
     filtered_advisors = [adv for adv in advisors if adv.advisor_type.lower() == advisor_type.lower()]
     if not filtered_advisors:
         raise HTTPException(status_code=404, detail=f"No advisors found for type: {advisor_type}")
     return filtered_advisors
 
+@router.get("/advisors/{advisor_id}/free-slots", response_model=List[TimeSlot], dependencies=[Depends(free_slots_version)])
+async def get_advisor_free_slots(
+    advisor_id: str,
+    start: Optional[datetime.datetime] = Query(None, alias="from"),
+    end: Optional[datetime.datetime] = Query(None, alias="to"),
+):
+    """
+    Get the times an advisor is available and not booked, as UTC intervals.
+
+    The range defaults to the next 14 days from now and may span at most
+    MAX_FREE_SLOT_DAYS days.
+    """
+    advisors = await read_data(repository.advisors, advisor_id=advisor_id)
+    if not advisors:
+        raise HTTPException(status_code=404, detail=f"Advisor not found: {advisor_id}")
+    advisor = advisors[0]
+
+    range_start = epoch_seconds(start) if start else datetime.datetime.now(datetime.timezone.utc).timestamp()
+    range_end = epoch_seconds(end) if end else range_start + 14 * 86400
+    if range_end <= range_start:
+        raise HTTPException(status_code=400, detail="'to' must be after 'from'")
+    if range_end - range_start > MAX_FREE_SLOT_DAYS * 86400:
+        raise HTTPException(status_code=400, detail=f"The range may span at most {MAX_FREE_SLOT_DAYS} days")
+
+    await aio.ready(advisor_bookings)
+    slots = []
+    for opens, closes in availability_intervals(parse_availability(advisor.availability), range_start, range_end):
+        for free_start, free_end in advisor_bookings.free_intervals(advisor.name, opens, closes):
+            slots.append(TimeSlot(
+                start=datetime.datetime.fromtimestamp(free_start, datetime.timezone.utc),
+                end=datetime.datetime.fromtimestamp(free_end, datetime.timezone.utc),
+            ))
+    return slots
+
 @router.post("/meetings", response_model=Meeting, status_code=201)
-def schedule_meeting(meeting_request: Meeting):
+async def schedule_meeting(meeting_request: Meeting):
     """
     Schedule a new meeting with an advisor.
+    Fails with 409 if it overlaps another meeting with the same advisor, or if
+    a meeting with the same ID exists.
     """
-    meetings = [m.model_dump() for m in get_meetings()]
-    
-    # Simple validation to prevent double booking the exact same time
-    for existing_meeting in meetings:
-        if existing_meeting['name'] == meeting_request.name and \
-           existing_meeting['meeting_time'] == meeting_request.meeting_time.isoformat():
-            raise HTTPException(status_code=409, detail="This time slot is already booked with the advisor.")
+    booking = meeting_interval(meeting_request)
+    slot_taken = False
 
-    new_meeting = meeting_request.model_dump()
-    meetings.append(new_meeting)
-    write_data(MEETING_DATA_FILE, meetings)
-    return Meeting(**new_meeting)
+    def slot_is_free() -> bool:
+        # Runs under the meetings collection's write lock, so no other worker can book in between
+        nonlocal slot_taken
+        slot_taken = advisor_bookings.conflict(meeting_request.advisor_name, booking.start, booking.end) is not None
+        return not slot_taken
 
+    if not await repository.meetings.ainsert_if(meeting_request, slot_is_free):
+        if slot_taken:
+            raise HTTPException(status_code=409, detail="This time slot is already booked with the advisor.")
+        raise HTTPException(status_code=409, detail=f"Meeting already exists: {meeting_request.meeting_id}")
+    return meeting_request
 
-@router.get("/meetings/{user_id}", response_model=List[Meeting])
-def get_user_meetings(user_id: str):
+
+@router.get("/meetings/{user_id}", response_model=List[Meeting], dependencies=[Depends(meetings_version)])
+async def get_user_meetings(user_id: str):
     """
     Get all scheduled meetings for a specific user.
     """
-    meetings = get_meetings()
-    user_meetings = [meeting for meeting in meetings if meeting.user_id == user_id]
-    return user_meetings
+    return await read_data(repository.meetings, user_id=user_id)
 
 @router.delete("/meetings/{meeting_id}", status_code=204)
-def cancel_meeting(meeting_id: str):
+async def cancel_meeting(meeting_id: str):
     """
     Cancel a scheduled meeting.
     """
-    meetings = get_meetings()
-    meeting_to_delete = next((m for m in meetings if m.meeting_id == meeting_id), None)
-
-    if not meeting_to_delete:
+    if not await repository.meetings.adelete(meeting_id):
         raise HTTPException(status_code=404, detail="Meeting not found")
 
-    updated_meetings = [m.model_dump() for m in meetings if m.meeting_id != meeting_id]
-    write_data(MEETING_DATA_FILE, updated_meetings)
     return
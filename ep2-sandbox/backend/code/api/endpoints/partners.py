@@ -1,51 +1,129 @@
 import json
-from fastapi import APIRouter, HTTPException
-from pathlib import Path
+from typing import List
+from fastapi import APIRouter, Depends, HTTPException
+from api.conditional import ConditionalGet, ConditionalRoute
+from api.models import BankPartner, PartnerSavings, PartnerSavingsReport, User
+from api.responses import model_list_response
+from core import aggregates, aio, indexes, repository
+from core.eligibility import (
+    cash_benefit,
+    eligible_partners,
+    eligible_users,
+    partner_by_id,
+    partner_tiers,
+    partners_for_merchant,
+    users_by_credit_score,
+)
 
-router = APIRouter()
+router = APIRouter(route_class=ConditionalRoute)
 
-@router.get("/partners", tags=["Partners"])
-def get_bank_partners():
+partners_version = ConditionalGet(repository.partners)
+benefits_version = ConditionalGet(repository.users, repository.partners)
+savings_version = ConditionalGet(repository.users, repository.partners, repository.accounts, repository.transactions)
+
+@router.get("/partners", dependencies=[Depends(partners_version)], tags=["Partners"])
+async def get_bank_partners():
     """
     Retrieves a list of all available bank partners and their associated benefits.
     """
     try:
-        with open(f"db/bank_partners.json", "r") as f:
-            partners_data = json.load(f)
-        return partners_data
+        return await repository.partners.aall()
     except FileNotFoundError:
         raise HTTPException(status_code=404, detail="Bank partners file not found.")
     except json.JSONDecodeError:
         raise HTTPException(status_code=500, detail="Error decoding bank partners JSON.")
 
-@router.get("/partners/user/{user_id}", tags=["Partners"])
-def get_user_benefits(user_id: str):
+@router.get("/partners/user/{user_id}", response_model=List[BankPartner], dependencies=[Depends(benefits_version)], tags=["Partners"])
+async def get_user_benefits(user_id: str):
     """
     Identifies and returns a list of partners a specific user can benefit from.
     """
     try:
-        with open(f"db/users.json", "r") as f:
-            users_data = json.load(f)
-        with open(f"db/bank_partners.json", "r") as f:
-            partners_data = json.load(f)
+        await aio.ready(indexes.users_by_id, partner_tiers)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Data file not found.")
+    except json.JSONDecodeError:
+        raise HTTPException(status_code=500, detail="Error decoding JSON.")
 
-        user = next((user for user in users_data if user["user_id"] == user_id), None)
-        if not user:
-            raise HTTPException(status_code=404, detail="User not found.")
+    user = indexes.user_by_id(user_id)
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found.")
 
-        user_credit_score = user.get("credit_score")
+    return model_list_response(eligible_partners(user.credit_score))
+
+@router.get("/partners/{partner_id}/eligible-users", response_model=List[User], dependencies=[Depends(benefits_version)], tags=["Partners"])
+async def get_eligible_users(partner_id: str):
+    """
+    Returns the users who can benefit from a partner, highest credit score first.
+    Partners without a minimum credit score are open to every user.
+    """
+    try:
+        await aio.ready(partner_tiers, users_by_credit_score)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Data file not found.")
+    except json.JSONDecodeError:
+        raise HTTPException(status_code=500, detail="Error decoding JSON.")
 
-        eligible_partners = []
-        for partner in partners_data:
-            eligibility = partner.get("eligibility_criteria")
-            if not eligibility or "minimum_credit_score" not in eligibility:
-                eligible_partners.append(partner)
-            elif user_credit_score and user_credit_score >= eligibility["minimum_credit_score"]:
-                eligible_partners.append(partner)
+    partner = partner_by_id(partner_id)
+    if not partner:
+        raise HTTPException(status_code=404, detail="Partner not found.")
 
-        return eligible_partners
+    return model_list_response(eligible_users(partner))
 
+@router.get("/users/{user_id}/partner-savings", response_model=PartnerSavingsReport, dependencies=[Depends(savings_version)], tags=["Partners"])
+async def get_partner_savings(user_id: str):
+    """
+    Reports the user's spend at each partner merchant, the benefit realized at
+    partners the user is eligible for, and the benefit missed at partners they
+    are not yet eligible for. Only percentage discounts have a cash benefit,
+    the spend times the partner's benefit_value; other partners (e.g. APR
+    reductions) are listed without one. Partners the user has not spent at are
+    omitted.
+    """
+    normalized_user_id = user_id.replace("_", "-")
+    try:
+        await aio.ready(indexes.users_by_id, indexes.accounts_by_user, partner_tiers, aggregates.merchant_spend)
     except FileNotFoundError:
         raise HTTPException(status_code=404, detail="Data file not found.")
     except json.JSONDecodeError:
         raise HTTPException(status_code=500, detail="Error decoding JSON.")
+
+    user = indexes.user_by_id(normalized_user_id)
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found.")
+
+    eligible_ids = {partner.partner_id for partner in eligible_partners(user.credit_score)}
+    accounts = indexes.accounts_for_user(normalized_user_id)
+    spend_by_merchant = aggregates.merchant_spend.for_accounts(account.account_id for account in accounts)
+
+    # Hash join of the user's per-merchant spend against the merchant -> partner index
+    savings: List[PartnerSavings] = []
+    total_spend = 0.0
+    for merchant_id, totals in spend_by_merchant.items():
+        partners = partners_for_merchant(merchant_id)
+        if partners:
+            total_spend += totals.spend
+        for partner in partners:
+            eligible = partner.partner_id in eligible_ids
+            benefit = cash_benefit(partner, totals.spend)
+            savings.append(PartnerSavings(
+                partner_id=partner.partner_id,
+                name=partner.name,
+                merchant_id=merchant_id,
+                benefit_type=partner.benefit_type,
+                benefit_value=partner.benefit_value,
+                eligible=eligible,
+                transaction_count=totals.transaction_count,
+                spend=round(totals.spend, 2),
+                realized_benefit=benefit if eligible or benefit is None else 0.0,
+                missed_benefit=benefit if not eligible or benefit is None else 0.0,
+            ))
+    savings.sort(key=lambda entry: (-entry.spend, entry.partner_id))
+
+    return PartnerSavingsReport(
+        user_id=normalized_user_id,
+        total_spend=round(total_spend, 2),
+        realized_benefit=round(sum(entry.realized_benefit or 0.0 for entry in savings), 2),
+        missed_benefit=round(sum(entry.missed_benefit or 0.0 for entry in savings), 2),
+        partners=savings,
+    )
@@ -1,40 +1,39 @@
-# backend/api/endpoints/transactions.py
+# backend/api/endpoints/schedule.py
 
 import json
 import uuid
-from fastapi import APIRouter, HTTPException, status
-from typing import List
-from api.models import Schedule
+from itertools import islice
+from fastapi import APIRouter, HTTPException, Query, status
+from typing import List, Optional
+from api.models import Schedule, ScheduleOccurrence
+from core import aio, indexes, repository
+from core.recurrence import merged_occurrences
 
 from datetime import datetime, timedelta, timezone
 
 router = APIRouter()
 
-SCHEDULES_FILE = "db/schedule.json"
-
-def read_schedules_data() -> List[Schedule]:
-    """Reads schedule data from the JSON file."""
+async def find_schedules(**filters) -> List[Schedule]:
+    """Reads the schedules matching the given field values."""
     try:
-        with open(SCHEDULES_FILE, "r") as f:
-            schedules_data = json.load(f)
-        return [Schedule(**s) for s in schedules_data]
+        return await repository.schedules.afind(**filters)
     except (FileNotFoundError, json.JSONDecodeError):
         # If the file doesn't exist or is empty, return an empty list
         return []
 
-def write_schedules_data(schedules: List[Schedule]):
-    """Writes the list of schedules back to the JSON file."""
-    with open(SCHEDULES_FILE, "w") as f:
-        json_data = [s.model_dump() for s in schedules]
-        json.dump(json_data, f, indent=4)
+async def user_schedules(user_id: str) -> List[Schedule]:
+    """Reads a user's schedules through the per-user index."""
+    try:
+        await aio.ready(indexes.schedules_by_user)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return []
+    return indexes.schedules_for_user(user_id)
 
 @router.post("/users/{user_id}/schedules", response_model=Schedule, status_code=status.HTTP_201_CREATED)
-def create_schedule_for_user(user_id: str, schedule_in: Schedule):
+async def create_schedule_for_user(user_id: str, schedule_in: Schedule):
     """
     Create a new scheduled transaction for a specific user.
     """
-    schedules = read_schedules_data()
-    
     # Exclude both user_id and schedule_id from the input model
     schedule_data = schedule_in.model_dump(exclude={'user_id', 'schedule_id'})
     
@@ -45,56 +44,79 @@ def create_schedule_for_user(user_id: str, schedule_in: Schedule):
         **schedule_data
     )
     
-    schedules.append(new_schedule)
-    write_schedules_data(schedules)
+    await repository.schedules.ainsert(new_schedule)
     
     return new_schedule
 
 @router.get("/users/{user_id}/schedules", response_model=List[Schedule])
-def get_schedules_for_user(user_id: str):
+async def get_schedules_for_user(user_id: str):
     """
     Retrieve all scheduled transactions for a specific user.
     """
-    schedules = read_schedules_data()
-    user_schedules = [s for s in schedules if s.user_id == user_id]
-        
-    return user_schedules
+    return await user_schedules(user_id)
+
+@router.get("/users/{user_id}/schedules/occurrences", response_model=List[ScheduleOccurrence])
+async def get_schedule_occurrences_for_user(
+    user_id: str,
+    start: Optional[datetime] = Query(None, alias="from"),
+    end: Optional[datetime] = Query(None, alias="to"),
+    limit: int = Query(1000, ge=1, le=10000),
+):
+    """
+    List the dates on which a user's scheduled transactions occur within
+    [from, to), across all of their schedules in chronological order.
+
+    The window defaults to the next 90 days. Occurrences are generated lazily
+    and merged, so only the first `limit` are ever computed, however long the
+    schedules run.
+    """
+    window_start = start or datetime.now(timezone.utc)
+    if window_start.tzinfo is None:
+        window_start = window_start.replace(tzinfo=timezone.utc)
+    window_end = end or window_start + timedelta(days=90)
+    if window_end.tzinfo is None:
+        window_end = window_end.replace(tzinfo=timezone.utc)
+    if window_end <= window_start:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="'to' must be after 'from'")
+
+    schedules = await user_schedules(user_id)
+    return [
+        ScheduleOccurrence(
+            schedule_id=schedule.schedule_id,
+            date=date,
+            description=schedule.description,
+            source_account_id=schedule.source_account_id,
+            destination_account_id=schedule.destination_account_id,
+            amount=schedule.amount,
+        )
+        for date, schedule in islice(merged_occurrences(schedules, window_start, window_end), limit)
+    ]
 
 @router.put("/schedules/{schedule_id}", response_model=Schedule)
-def update_schedule(schedule_id: str, schedule_update: Schedule):
+async def update_schedule(schedule_id: str, schedule_update: Schedule):
     """
     Update an existing scheduled transaction by its ID.
     """
-    schedules = read_schedules_data()
-    schedule_index = next((i for i, s in enumerate(schedules) if s.schedule_id == schedule_id), None)
+    existing_schedule = next(iter(await find_schedules(schedule_id=schedule_id)), None)
 
-    if schedule_index is None:
+    if existing_schedule is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Schedule not found")
     
-    # Get the existing schedule object and update its fields
-    existing_schedule = schedules[schedule_index]
+    # Update the existing schedule object's fields
     update_data = schedule_update.model_dump(exclude_unset=True) # Only include fields that were provided
     updated_schedule = existing_schedule.model_copy(update=update_data)
     
-    schedules[schedule_index] = updated_schedule
-    write_schedules_data(schedules)
+    await repository.schedules.aupdate(schedule_id, updated_schedule)
     
     return updated_schedule
 
 @router.delete("/schedules/{schedule_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_schedule(schedule_id: str):
+async def delete_schedule(schedule_id: str):
     """
     Delete a scheduled transaction by its ID.
     """
-    schedules = read_schedules_data()
-    
-    initial_length = len(schedules)
-    schedules_to_keep = [s for s in schedules if s.schedule_id != schedule_id]
-    
-    if len(schedules_to_keep) == initial_length:
+    if not await repository.schedules.adelete(schedule_id):
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Schedule not found")
     
-    write_schedules_data(schedules_to_keep)
-    
     # A 204 response does not return any content in the body
     return
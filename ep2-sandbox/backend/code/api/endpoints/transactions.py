@@ -1,50 +1,84 @@
 # backend/api/endpoints/transactions.py
 
-import json
-from fastapi import APIRouter, HTTPException
-from typing import List
-from api.models import Transaction, Account
+import base64
+import binascii
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from typing import Iterator, List, Optional, Tuple
+from api.models import Transaction
+from api.responses import encode_model, model_list_response
+from core import aio, indexes
 
-from datetime import datetime, timedelta, timezone
+from datetime import datetime
 
 router = APIRouter()
 
-TRANSACTIONS_FILE = "db/transactions.json"
-ACCOUNTS_FILE = "db/accounts.json"
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
 
-def read_transactions_data() -> List[Transaction]:
-    with open(TRANSACTIONS_FILE, "r") as f:
-        transactions_data = json.load(f)
-    return [Transaction(**tx) for tx in transactions_data]
 
-def read_accounts_data() -> List[Account]:
-    with open(ACCOUNTS_FILE, "r") as f:
-        accounts_data = json.load(f)
-    return [Account(**acc) for acc in accounts_data]
+def encode_cursor(timestamp: float, transaction_id: str) -> str:
+    """Returns an opaque cursor pointing just after (timestamp, transaction_id) in a date-ordered timeline."""
+    position = f"{timestamp!r}|{transaction_id}"
+    return base64.urlsafe_b64encode(position.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[float, str]:
+    """Returns the (timestamp, transaction_id) a cursor points after."""
+    try:
+        position = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        timestamp, transaction_id = position.split("|", 1)
+        return float(timestamp), transaction_id
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def ndjson_rows(transactions: List[Transaction], lo: int, hi: int) -> Iterator[bytes]:
+    # Index directly so a deep page does not step over the rows before it
+    for index in range(lo, hi):
+        yield encode_model(transactions[index]) + b"\n"
 
 @router.get("/users/{user_id}/transactions", response_model=List[Transaction])
-def get_user_transactions(user_id: str, history: int = 30):
-    """
-    Get all transactions for a user from the last N days.
+async def get_user_transactions(
+    request: Request,
+    user_id: str,
+    history: int = 30,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    cursor: Optional[str] = None,
+):
     """
-    # Calculate the cutoff date for the history period
-    now = datetime.now(timezone.utc)
-    cutoff_date = now - timedelta(days=history)
+    Get all transactions for a user from the last N days, oldest first.
+    If `start` and/or `end` are given, they define the window instead of `history`.
 
+    With `limit`, at most that many transactions are returned and, if more remain,
+    the X-Next-Cursor response header holds the `cursor` to pass for the next page.
+    With `Accept: application/x-ndjson`, rows are streamed one JSON object per line.
+    """
     normalized_user_id = user_id.replace("_", "-")
-    accounts = read_accounts_data()
-    user_account_ids = [acc.account_id for acc in accounts if acc.user_id == normalized_user_id]
-
-    if not user_account_ids:
+    await aio.ready(indexes.accounts_by_user, indexes.timelines_by_user)
+    if not indexes.accounts_for_user(normalized_user_id):
         raise HTTPException(status_code=404, detail="User or user accounts not found")
 
-    transactions = read_transactions_data()
-    
-    # Filter transactions by account and date
-    user_transactions = [
-        tx for tx in transactions 
-        if tx.account_id in user_account_ids and 
-           datetime.fromisoformat(tx.date.replace('Z', '+00:00')) >= cutoff_date
-    ]
-    
-    return user_transactions
+    if start is None and end is None:
+        start = indexes.history_start(history)
+
+    timeline = indexes.transaction_timeline(normalized_user_id)
+    lo, hi = timeline.bounds(
+        start=indexes.epoch_seconds(start) if start else None,
+        end=indexes.epoch_seconds(end) if end else None,
+    )
+    if cursor is not None:
+        lo = min(max(lo, timeline.position_after(*decode_cursor(cursor))), hi)
+
+    headers = {}
+    if limit is not None and hi - lo > limit:
+        hi = lo + limit
+        last = hi - 1
+        headers[NEXT_CURSOR_HEADER] = encode_cursor(timeline.timestamps[last], timeline.transactions[last].transaction_id)
+
+    if NDJSON_MEDIA_TYPE in request.headers.get("accept", ""):
+        return StreamingResponse(
+            ndjson_rows(timeline.transactions, lo, hi), media_type=NDJSON_MEDIA_TYPE, headers=headers
+        )
+
+    return model_list_response(timeline.transactions[lo:hi], headers=headers)
@@ -1,49 +1,82 @@
 # backend/api/endpoints/users.py
 
-import json
-from fastapi import APIRouter, HTTPException
-from typing import List
-from api.models import User, Account
+from fastapi import APIRouter, Depends, HTTPException
+from typing import Dict, List
+from api.conditional import ConditionalGet, ConditionalRoute
+from api.models import Account, Dashboard, NetWorth, User
+from api.responses import model_response
+from core import aggregates, aio, indexes, repository
 
-router = APIRouter()
+router = APIRouter(route_class=ConditionalRoute)
 
-USERS_DATA_FILE = "db/users.json"
-ACCOUNTS_DATA_FILE = "db/accounts.json"
+users_version = ConditionalGet(repository.users)
+profile_version = ConditionalGet(repository.users, repository.accounts)
 
-def read_users_data() -> List[User]:
-    with open(USERS_DATA_FILE, "r") as f:
-        users_data = json.load(f)
-    return [User(**user) for user in users_data]
+async def read_users_data() -> List[User]:
+    return await repository.users.aall()
 
-def read_accounts_data() -> List[Account]:
-    with open(ACCOUNTS_DATA_FILE, "r") as f:
-        accounts_data = json.load(f)
-    return [Account(**acc) for acc in accounts_data]
-
-@router.get("/users", response_model=List[User])
-def get_users():
+@router.get("/users", response_model=List[User], dependencies=[Depends(users_version)])
+async def get_users():
     """
     Get all users.
     """
-    return read_users_data()
+    return await read_users_data()
 
-@router.get("/users/{user_id}", response_model=User)
-def get_user(user_id: str):
+@router.get("/users/{user_id}", response_model=User, dependencies=[Depends(profile_version)])
+async def get_user(user_id: str):
     """
     Get user profile.
     """
     normalized_user_id = user_id.replace("_", "-")
+    await aio.ready(indexes.users_by_id, aggregates.user_balances)
     
-    users = read_users_data()
-    user = next((u for u in users if u.user_id == normalized_user_id), None)
+    user = indexes.user_by_id(normalized_user_id)
     
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
-    accounts = read_accounts_data()
-    user_accounts = [acc for acc in accounts if acc.user_id == normalized_user_id]
-    
-    net_worth = sum(acc.balance for acc in user_accounts)
-    user.net_worth = net_worth
+    totals = aggregates.user_balances.get(normalized_user_id)
+    net_worth = totals.net_worth if totals else 0
     
-    return user
+    # The cached user is shared between requests, so return an updated copy
+    return user.model_copy(update={"net_worth": net_worth})
+
+# No ETag: like /transactions, the dashboard's window ends now and so moves between any two requests
+@router.get("/users/{user_id}/dashboard", response_model=Dashboard)
+async def get_user_dashboard(user_id: str, history: int = 30):
+    """
+    Get everything the dashboard shows in one call: the user profile, their
+    accounts grouped by category, debts, investments, net worth and the
+    transactions from the last `history` days, oldest first, as /transactions
+    returns them.
+    """
+    normalized_user_id = user_id.replace("_", "-")
+    await aio.ready(indexes.users_by_id, indexes.accounts_by_user, indexes.timelines_by_user)
+    user = indexes.user_by_id(normalized_user_id)
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+
+    accounts_by_category: Dict[str, List[Account]] = {}
+    debts: List[Account] = []
+    investments: List[Account] = []
+    total_assets = total_liabilities = 0.0
+    for account in indexes.accounts_for_user(normalized_user_id):
+        accounts_by_category.setdefault(account.category, []).append(account)
+        if account.category == "liability":
+            debts.append(account)
+            total_liabilities += account.balance
+        else:
+            total_assets += account.balance
+            if account.category == "asset" and account.type == "investment":
+                investments.append(account)
+
+    net_worth = total_assets + total_liabilities
+    dashboard = Dashboard(
+        user=user.model_copy(update={"net_worth": net_worth}),
+        accounts=accounts_by_category,
+        debts=debts,
+        investments=investments,
+        net_worth=NetWorth(net_worth=net_worth, total_assets=total_assets, total_liabilities=total_liabilities),
+        recent_transactions=indexes.transaction_timeline(normalized_user_id).window(start=indexes.history_start(history).timestamp()),
+    )
+    return model_response(dashboard)
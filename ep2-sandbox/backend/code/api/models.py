@@ -1,7 +1,7 @@
 # app/api/models.py
 
 from pydantic import BaseModel, Field
-from typing import List, Optional, Dict, Any
+from typing import List, Literal, Optional, Dict, Any
 from uuid import uuid4
 import datetime
 
@@ -62,6 +62,8 @@ class LifeGoal(BaseModel):
     target_amount: float
     target_date: str
     current_amount_saved: float
+    # Account the goal is saved in; recurring schedules into it count toward the goal
+    account_id: Optional[str] = None
 
 class MarketData(BaseModel):
     timestamp: str
@@ -77,13 +79,42 @@ class Event(BaseModel):
 
 class NetWorth(BaseModel):
     net_worth: float
+    total_assets: Optional[float] = None
+    total_liabilities: Optional[float] = None
+
+class CashFlowBucket(BaseModel):
+    start: datetime.date
+    end: datetime.date
+    cash_flow: float
 
 class CashFlow(BaseModel):
-    cash_flow_last_30_days: float
+    # Only set for the default 30-day window, for clients of the original endpoint
+    cash_flow_last_30_days: Optional[float] = None
+    days: int
+    cash_flow: float
+    granularity: Optional[str] = None
+    buckets: Optional[List[CashFlowBucket]] = None
 
 class AverageCashFlow(BaseModel):
     average_monthly_cash_flow: float
 
+class BatchRequest(BaseModel):
+    method: Literal["GET", "POST", "PUT", "PATCH", "DELETE"] = "GET"
+    path: str  # e.g. "/api/users/user-001/goals", optionally with a query string
+    body: Optional[Any] = None
+
+class BatchResponse(BaseModel):
+    status: int
+    body: Optional[Any] = None
+
+class Dashboard(BaseModel):
+    user: User
+    accounts: Dict[str, List[Account]]  # keyed by account category
+    debts: List[Account]
+    investments: List[Account]
+    net_worth: NetWorth
+    recent_transactions: List[Transaction]
+
 class Schedule(BaseModel):
     user_id: str
     schedule_id: str
@@ -95,16 +126,64 @@ class Schedule(BaseModel):
     end_date: str
     amount: float
 
+class ScheduleOccurrence(BaseModel):
+    schedule_id: str
+    date: datetime.datetime
+    description: str
+    source_account_id: str
+    destination_account_id: str
+    amount: float
+
 class Meeting(BaseModel):
     meeting_id: str = Field(default_factory=lambda: f"meet-{uuid4()}")
     user_id: str
     advisor_name: str
     advisor_type: str
     meeting_time: datetime.datetime
+    duration_minutes: int = Field(60, gt=0, le=24 * 60)
     notes: Optional[str] = None
 
 class Advisor(BaseModel):
     advisor_id: str = Field(default_factory=lambda: f"adv-{uuid4()}")
     name: str
     advisor_type: str
-    availability: List[str] = []
\ No newline at end of file
+    availability: List[str] = []
+
+class TimeSlot(BaseModel):
+    start: datetime.datetime
+    end: datetime.datetime
+
+class GoalProjection(BaseModel):
+    goal_id: str
+    description: str
+    target_amount: float
+    target_date: str
+    current_amount_saved: float
+    months_remaining: int
+    monthly_contribution: float
+    projected_amount: float
+    on_track: bool
+    shortfall: float
+    required_monthly_contribution: float
+    projected_completion_date: Optional[datetime.date] = None
+    monthly_balances: Optional[List[float]] = None
+
+class PartnerSavings(BaseModel):
+    partner_id: str
+    name: str
+    merchant_id: str
+    benefit_type: str
+    benefit_value: float
+    eligible: bool
+    transaction_count: int
+    spend: float
+    # None for benefits without a cash value, e.g. an APR reduction
+    realized_benefit: Optional[float] = None
+    missed_benefit: Optional[float] = None
+
+class PartnerSavingsReport(BaseModel):
+    user_id: str
+    total_spend: float
+    realized_benefit: float
+    missed_benefit: float
+    partners: List[PartnerSavings]
@@ -0,0 +1,74 @@
+# app/api/responses.py
+
+import threading
+import weakref
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from fastapi.responses import JSONResponse, Response
+from pydantic import BaseModel
+
+try:
+    import orjson
+except ImportError:  # Fall back to the standard library encoder
+    orjson = None
+
+
+class FastJSONResponse(JSONResponse):
+    """A JSONResponse rendered with orjson when it is installed."""
+
+    def render(self, content: Any) -> bytes:
+        if orjson is None:
+            return super().render(content)
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+
+
+# id(model) -> (weak reference to the model, its JSON). Entries are dropped when
+# the model is garbage collected, so the cache lives exactly as long as the
+# cached collection rows it describes.
+_encoded: Dict[int, Tuple[weakref.ref, bytes]] = {}
+_encoded_lock = threading.RLock()
+
+
+def _forget(key: int):
+    with _encoded_lock:
+        _encoded.pop(key, None)
+
+
+def encode_model(item: BaseModel) -> bytes:
+    """
+    Returns the JSON encoding of a model, computed once per model instance.
+
+    Only pass models that are never mutated after construction, such as the
+    rows cached by the repository collections.
+    """
+    key = id(item)
+    entry = _encoded.get(key)
+    if entry is not None and entry[0]() is item:
+        return entry[1]
+    data = item.__pydantic_serializer__.to_json(item)
+    with _encoded_lock:
+        _encoded[key] = (weakref.ref(item, lambda _, key=key: _forget(key)), data)
+    return data
+
+
+def model_response(item: BaseModel, status_code: int = 200) -> Response:
+    """Returns a single validated model as JSON without response_model validation."""
+    body = item.__pydantic_serializer__.to_json(item)
+    return Response(content=body, status_code=status_code, media_type="application/json")
+
+
+def model_list_response(
+    items: Iterable[BaseModel], status_code: int = 200, headers: Optional[Dict[str, str]] = None
+) -> Response:
+    """
+    Returns a JSON array of already validated models without passing them through
+    FastAPI's response_model validation and serialization again. The route's
+    response_model is still used for the OpenAPI schema.
+    """
+    cached = _encoded.get
+    parts = []
+    for item in items:
+        entry = cached(id(item))
+        parts.append(entry[1] if entry is not None and entry[0]() is item else encode_model(item))
+    body = b"[" + b",".join(parts) + b"]"
+    return Response(content=body, status_code=status_code, headers=headers, media_type="application/json")
@@ -0,0 +1,181 @@
+# app/core/aggregates.py
+
+import threading
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+from api.models import Account, Transaction
+from core import repository
+from core.repository import Collection
+from core.sqlite_store import Change
+
+
+class BalanceTotals(NamedTuple):
+    net_worth: float
+    total_assets: float
+    total_liabilities: float
+    account_count: int
+
+
+def _account_delta(account: Account, sign: int) -> BalanceTotals:
+    is_liability = account.category == "liability"
+    return BalanceTotals(
+        net_worth=sign * account.balance,
+        total_assets=0.0 if is_liability else sign * account.balance,
+        total_liabilities=sign * account.balance if is_liability else 0.0,
+        account_count=sign,
+    )
+
+
+class UserBalanceAggregates:
+    """
+    Materialized per-user net worth, total assets and total liabilities.
+
+    Writes that go through the accounts collection are applied as O(1) deltas
+    via its change listener. If the collection version moves without a
+    published change (startup, a reload from disk), the totals are rebuilt
+    from the full account list on the next read.
+    """
+
+    def __init__(self, accounts: Collection):
+        self.accounts = accounts
+        self._totals: Dict[str, BalanceTotals] = {}
+        self._version: Optional[int] = None
+        self._lock = threading.RLock()
+        accounts.subscribe(self._on_change)
+
+    def _add(self, user_id: str, delta: BalanceTotals):
+        current = self._totals.get(user_id, BalanceTotals(0.0, 0.0, 0.0, 0))
+        totals = BalanceTotals(*(a + b for a, b in zip(current, delta)))
+        if totals.account_count:
+            self._totals[user_id] = totals
+        else:
+            self._totals.pop(user_id, None)
+
+    def _rebuild(self, version: int, accounts: List[Account]):
+        self._totals = {}
+        for account in accounts:
+            self._add(account.user_id, _account_delta(account, 1))
+        self._version = version
+
+    def _on_change(self, previous_version: int, version: int, changes: List[Change]):
+        with self._lock:
+            if self._version != previous_version:
+                # We were already stale; the next read rebuilds from scratch
+                return
+            for old, new in changes:
+                if old is not None:
+                    self._add(old.user_id, _account_delta(old, -1))
+                if new is not None:
+                    self._add(new.user_id, _account_delta(new, 1))
+            self._version = version
+
+    def is_fresh(self) -> bool:
+        """True if get() would be answered without reloading the accounts or rebuilding."""
+        return self.accounts.is_fresh() and self.accounts.version == self._version
+
+    def refresh(self):
+        version, accounts = self.accounts.snapshot()
+        if version != self._version:
+            # Writes change the list in place under the collection's lock, so rebuild under it too
+            with self.accounts.lock, self._lock:
+                version, accounts = self.accounts.snapshot()
+                if version != self._version:
+                    self._rebuild(version, accounts)
+
+    def get(self, user_id: str) -> Optional[BalanceTotals]:
+        """Returns the user's totals, or None if the user has no accounts."""
+        if self.accounts.cached()[0] != self._version:
+            self.refresh()
+        return self._totals.get(user_id)
+
+
+class MerchantSpend(NamedTuple):
+    spend: float
+    transaction_count: int
+
+
+def _transaction_delta(tx: Transaction, sign: int) -> Optional[MerchantSpend]:
+    # Only outgoing payments count as spend; refunds and deposits are ignored
+    if tx.amount >= 0:
+        return None
+    return MerchantSpend(spend=sign * -tx.amount, transaction_count=sign)
+
+
+class AccountMerchantSpend:
+    """
+    Materialized spend per merchant for each account.
+
+    Kept per account rather than per user so that it only depends on the
+    transactions collection; a user's totals are the sum over their few
+    accounts. Transaction writes are applied as O(1) deltas via the change
+    listener, and a reload rebuilds the totals on the next read.
+    """
+
+    def __init__(self, transactions: Collection):
+        self.transactions = transactions
+        self._spend: Dict[str, Dict[str, MerchantSpend]] = {}
+        self._version: Optional[int] = None
+        self._lock = threading.RLock()
+        transactions.subscribe(self._on_change)
+
+    def _add(self, tx: Transaction, sign: int):
+        delta = _transaction_delta(tx, sign)
+        if delta is None:
+            return
+        by_merchant = self._spend.setdefault(tx.account_id, {})
+        current = by_merchant.get(tx.merchant_id, MerchantSpend(0.0, 0))
+        totals = MerchantSpend(*(a + b for a, b in zip(current, delta)))
+        if totals.transaction_count:
+            by_merchant[tx.merchant_id] = totals
+        else:
+            del by_merchant[tx.merchant_id]
+            if not by_merchant:
+                del self._spend[tx.account_id]
+
+    def _rebuild(self, version: int, transactions: List[Transaction]):
+        self._spend = {}
+        for tx in transactions:
+            self._add(tx, 1)
+        self._version = version
+
+    def _on_change(self, previous_version: int, version: int, changes: List[Change]):
+        with self._lock:
+            if self._version != previous_version:
+                # We were already stale; the next read rebuilds from scratch
+                return
+            for old, new in changes:
+                if old is not None:
+                    self._add(old, -1)
+                if new is not None:
+                    self._add(new, 1)
+            self._version = version
+
+    def is_fresh(self) -> bool:
+        """True if reads would be answered without reloading the transactions or rebuilding."""
+        return self.transactions.is_fresh() and self.transactions.version == self._version
+
+    def refresh(self):
+        version, transactions = self.transactions.snapshot()
+        if version != self._version:
+            # Writes change the list in place under the collection's lock, so rebuild under it too
+            with self.transactions.lock, self._lock:
+                version, transactions = self.transactions.snapshot()
+                if version != self._version:
+                    self._rebuild(version, transactions)
+
+    def for_accounts(self, account_ids: Iterable[str]) -> Dict[str, MerchantSpend]:
+        """Returns the combined spend per merchant across the given accounts."""
+        if self.transactions.cached()[0] != self._version:
+            self.refresh()
+        combined: Dict[str, MerchantSpend] = {}
+        for account_id in account_ids:
+            for merchant_id, totals in self._spend.get(account_id, {}).items():
+                current = combined.get(merchant_id)
+                combined[merchant_id] = totals if current is None else MerchantSpend(
+                    current.spend + totals.spend, current.transaction_count + totals.transaction_count
+                )
+        return combined
+
+
+user_balances = UserBalanceAggregates(repository.accounts)
+merchant_spend = AccountMerchantSpend(repository.transactions)
@@ -0,0 +1,78 @@
+# app/core/aio.py
+
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, List, Protocol, TypeVar
+
+import anyio
+
+from core.config import WRITER_THREADS
+
+ResultT = TypeVar("ResultT")
+
+# Writes take file locks, fsync and wait on other workers, so they run on their
+# own threads instead of the event loop or the AnyIO threadpool that serves
+# requests. Concurrent writes to a JSON collection are still group committed.
+_writer = ThreadPoolExecutor(max_workers=WRITER_THREADS, thread_name_prefix="collection-writer")
+
+
+class Refreshable(Protocol):
+    """A collection or derived structure that can tell whether it can be read from memory."""
+
+    def is_fresh(self) -> bool:
+        ...
+
+    def refresh(self) -> Any:
+        ...
+
+
+async def ready(*sources: Refreshable):
+    """
+    Makes sure `sources` can be read without blocking: anything that needs a
+    reload from storage or a rebuild is brought up to date on a worker thread.
+    Afterwards their synchronous read methods are served from memory, without
+    waiting on any lock a writer may hold.
+    """
+    stale = [source for source in sources if not source.is_fresh()]
+    if stale:
+        await anyio.to_thread.run_sync(lambda: [source.refresh() for source in stale])
+
+
+async def run_write(fn: Callable[..., ResultT], *args: Any) -> ResultT:
+    """Runs a blocking write on the dedicated writer threads."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_writer, functools.partial(fn, *args))
+
+
+class AsyncCollectionMixin:
+    """
+    Async variants of the collection methods. Reads are served from memory once
+    the collection is fresh; writes run on the dedicated writer threads.
+    """
+
+    async def aall(self) -> List[Any]:
+        await ready(self)
+        return self.cached()[1]
+
+    async def afind(self, **filters: Any) -> List[Any]:
+        # Backends whose find() queries storage run it on a worker thread
+        return await anyio.to_thread.run_sync(functools.partial(self.find, **filters))
+
+    async def ainsert(self, item: Any):
+        return await run_write(self.insert, item)
+
+    async def ainsert_new(self, item: Any) -> bool:
+        return await run_write(self.insert_new, item)
+
+    async def ainsert_if(self, item: Any, condition: Callable[[], bool]) -> bool:
+        return await run_write(self.insert_if, item, condition)
+
+    async def aupdate(self, key: Any, item: Any) -> bool:
+        return await run_write(self.update, key, item)
+
+    async def adelete(self, key: Any) -> bool:
+        return await run_write(self.delete, key)
+
+    async def asave(self, items: List[Any]):
+        return await run_write(self.save, items)
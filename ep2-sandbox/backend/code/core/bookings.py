@@ -0,0 +1,174 @@
+# app/core/bookings.py
+
+import threading
+from bisect import bisect_left, bisect_right, insort
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from api.models import Meeting
+from core import repository
+from core.indexes import epoch_seconds
+from core.repository import Collection
+from core.sqlite_store import Change
+
+WEEKDAYS = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+
+
+class Booking(NamedTuple):
+    start: float
+    end: float
+    meeting_id: str
+
+
+def meeting_interval(meeting: Meeting) -> Booking:
+    """Returns the [start, end) epoch-second interval a meeting occupies."""
+    start = epoch_seconds(meeting.meeting_time)
+    return Booking(start, start + meeting.duration_minutes * 60, meeting.meeting_id)
+
+
+class AvailabilityWindow(NamedTuple):
+    weekday: int
+    start: timedelta
+    end: timedelta
+
+
+def parse_availability(entries: List[str]) -> List[AvailabilityWindow]:
+    """
+    Parses availability entries such as "Monday 10:00-12:00" (UTC) into weekly
+    windows. Entries that cannot be parsed are skipped.
+    """
+    windows = []
+    for entry in entries:
+        try:
+            day, hours = entry.split()
+            start, end = (datetime.strptime(part, "%H:%M") for part in hours.split("-"))
+            weekday = WEEKDAYS.index(day.lower())
+        except ValueError:
+            continue
+        opens = timedelta(hours=start.hour, minutes=start.minute)
+        closes = timedelta(hours=end.hour, minutes=end.minute)
+        if closes > opens:
+            windows.append(AvailabilityWindow(weekday, opens, closes))
+    return windows
+
+
+def availability_intervals(windows: List[AvailabilityWindow], start: float, end: float) -> Iterator[Tuple[float, float]]:
+    """Yields the weekly windows that fall within [start, end), in order and clipped to it."""
+    first_day = datetime.fromtimestamp(start, timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+    day = first_day
+    while day.timestamp() < end:
+        for window in sorted(windows, key=lambda w: w.start):
+            if window.weekday == day.weekday():
+                opens = max((day + window.start).timestamp(), start)
+                closes = min((day + window.end).timestamp(), end)
+                if closes > opens:
+                    yield opens, closes
+        day += timedelta(days=1)
+
+
+class AdvisorBookings:
+    """
+    Each advisor's booked meetings as [start, end) intervals sorted by start.
+
+    Stored bookings may overlap (e.g. meetings imported or written before
+    conflicts were checked), so each advisor's longest booking is tracked too:
+    a booking overlapping [start, end) must start within [start - longest, end),
+    which bisection finds. A conflict check costs O(log n + k) and a free-slot
+    query O(log n + k) for k meetings in the range. Writes through the meetings
+    collection are applied in place via its change listener; a reload from
+    storage rebuilds the index on the next read.
+    """
+
+    def __init__(self, meetings: Collection):
+        self.meetings = meetings
+        self._bookings: Dict[str, List[Booking]] = {}
+        # Upper bound on each advisor's booking length; not lowered on removal
+        self._longest: Dict[str, float] = {}
+        self._version: Optional[int] = None
+        self._lock = threading.RLock()
+        meetings.subscribe(self._on_change)
+
+    def _add(self, meeting: Meeting):
+        booking = meeting_interval(meeting)
+        insort(self._bookings.setdefault(meeting.advisor_name, []), booking)
+        self._longest[meeting.advisor_name] = max(self._longest.get(meeting.advisor_name, 0.0), booking.end - booking.start)
+
+    def _remove(self, meeting: Meeting):
+        bookings = self._bookings.get(meeting.advisor_name, [])
+        booking = meeting_interval(meeting)
+        index = bisect_left(bookings, booking)
+        if index < len(bookings) and bookings[index] == booking:
+            del bookings[index]
+
+    def _rebuild(self, version: int, meetings: List[Meeting]):
+        self._bookings = {}
+        for meeting in meetings:
+            self._bookings.setdefault(meeting.advisor_name, []).append(meeting_interval(meeting))
+        for bookings in self._bookings.values():
+            bookings.sort()
+        self._longest = {
+            advisor_name: max(booking.end - booking.start for booking in bookings)
+            for advisor_name, bookings in self._bookings.items()
+        }
+        self._version = version
+
+    def _on_change(self, previous_version: int, version: int, changes: List[Change]):
+        with self._lock:
+            if self._version != previous_version:
+                # We were already stale; the next read rebuilds from scratch
+                return
+            for old, new in changes:
+                if old is not None:
+                    self._remove(old)
+                if new is not None:
+                    self._add(new)
+            self._version = version
+
+    def is_fresh(self) -> bool:
+        """True if reads would be answered without reloading the meetings or rebuilding."""
+        return self.meetings.is_fresh() and self.meetings.version == self._version
+
+    def refresh(self):
+        version, meetings = self.meetings.snapshot()
+        if version != self._version:
+            # Writes change the list in place under the collection's lock, so rebuild under it too
+            with self.meetings.lock, self._lock:
+                version, meetings = self.meetings.snapshot()
+                if version != self._version:
+                    self._rebuild(version, meetings)
+
+    def bookings(self, advisor_name: str) -> List[Booking]:
+        """Returns the advisor's bookings sorted by start time."""
+        if self.meetings.cached()[0] != self._version:
+            self.refresh()
+        return self._bookings.get(advisor_name, [])
+
+    def _first_candidate(self, bookings: List[Booking], advisor_name: str, start: float) -> int:
+        """Returns the index of the first booking that could still be running at `start`."""
+        return bisect_right(bookings, (start - self._longest.get(advisor_name, 0.0),))
+
+    def conflict(self, advisor_name: str, start: float, end: float) -> Optional[Booking]:
+        """Returns a booking of the advisor that overlaps [start, end), or None."""
+        bookings = self.bookings(advisor_name)
+        for index in range(self._first_candidate(bookings, advisor_name, start), bisect_left(bookings, (end,))):
+            if bookings[index].end > start:
+                return bookings[index]
+        return None
+
+    def free_intervals(self, advisor_name: str, start: float, end: float) -> Iterator[Tuple[float, float]]:
+        """Yields the maximal gaps between the advisor's bookings within [start, end)."""
+        bookings = self.bookings(advisor_name)
+        # Skip the bookings that ended before `start`, however long they were
+        index = self._first_candidate(bookings, advisor_name, start)
+        cursor = start
+        while index < len(bookings) and bookings[index].start < end:
+            booking = bookings[index]
+            if booking.start > cursor:
+                yield cursor, booking.start
+            cursor = max(cursor, booking.end)
+            index += 1
+        if cursor < end:
+            yield cursor, end
+
+
+advisor_bookings = AdvisorBookings(repository.meetings)
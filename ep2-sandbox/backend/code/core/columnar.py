@@ -0,0 +1,302 @@
+# app/core/columnar.py
+
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from api.models import Account, Transaction
+from core import repository
+from core.indexes import parse_timestamp
+from core.repository import Collection
+from core.sqlite_store import Change
+
+SECONDS_PER_DAY = 86400
+
+
+def _intern(values: List[str]) -> Tuple[np.ndarray, List[str]]:
+    """Maps each string to a small integer code. Returns (codes, code -> string)."""
+    lookup: Dict[str, int] = {}
+    codes = np.fromiter((lookup.setdefault(value, len(lookup)) for value in values), dtype=np.int32, count=len(values))
+    return codes, list(lookup)
+
+
+class UserColumns:
+    """
+    One user's transactions column-wise, sorted by timestamp, plus their daily
+    net-flow buckets (UTC days, from their first to their last transaction
+    day) stored as a running total: entry i of daily_prefix is the flow on the
+    days before first_day + i, so it starts at 0 and has day_span + 1 entries.
+
+    Instances are never modified; with_row() and without_row() return updated
+    copies, so readers holding the previous columns are unaffected.
+    """
+
+    COLUMNS = ("timestamp", "amount_cents", "account_code", "category_code", "merchant_code")
+
+    def __init__(self, timestamp: np.ndarray, amount_cents: np.ndarray, account_code: np.ndarray,
+                 category_code: np.ndarray, merchant_code: np.ndarray, daily: Optional[Tuple[int, np.ndarray]] = None):
+        self.timestamp = timestamp
+        self.amount_cents = amount_cents
+        self.account_code = account_code
+        self.category_code = category_code
+        self.merchant_code = merchant_code
+        if daily is None:
+            daily = self._daily_prefix()
+        self.first_day, self.daily_prefix = daily
+        self.day_span = len(self.daily_prefix) - 1
+
+    def __len__(self) -> int:
+        return len(self.timestamp)
+
+    def window(self, start: Optional[float] = None, end: Optional[float] = None) -> slice:
+        """Returns the range of rows dated within [start, end]."""
+        lo = 0 if start is None else int(np.searchsorted(self.timestamp, start, side="left"))
+        hi = len(self) if end is None else int(np.searchsorted(self.timestamp, end, side="right"))
+        return slice(lo, max(lo, hi))
+
+    def _daily_prefix(self) -> Tuple[int, np.ndarray]:
+        days = self.timestamp // SECONDS_PER_DAY
+        first_day = int(days[0])
+        daily = np.zeros(int(days[-1]) - first_day + 2, dtype=np.int64)
+        np.add.at(daily, days - first_day + 1, self.amount_cents)
+        return first_day, np.cumsum(daily)
+
+    def _prefix_adding(self, day: int, cents: int) -> Tuple[int, np.ndarray]:
+        """Returns (first_day, daily_prefix) with `cents` added on `day`, widening the day range if needed."""
+        first_day, prefix = self.first_day, self.daily_prefix
+        if day < first_day:
+            prefix = np.concatenate((np.zeros(first_day - day, dtype=np.int64), prefix))
+            first_day = day
+        elif day > first_day + len(prefix) - 2:
+            prefix = np.concatenate((prefix, np.full(day - first_day - len(prefix) + 2, prefix[-1], dtype=np.int64)))
+        else:
+            prefix = prefix.copy()
+        prefix[day - first_day + 1:] += cents
+        return first_day, prefix
+
+    def with_row(self, row: Tuple[int, ...]) -> "UserColumns":
+        """Returns a copy with `row` (a value per COLUMNS) inserted in timestamp order."""
+        position = int(np.searchsorted(self.timestamp, row[0], side="right"))
+        columns = [np.insert(getattr(self, name), position, value) for name, value in zip(self.COLUMNS, row)]
+        return UserColumns(*columns, daily=self._prefix_adding(row[0] // SECONDS_PER_DAY, row[1]))
+
+    def without_row(self, row: Tuple[int, ...]) -> Optional["UserColumns"]:
+        """
+        Returns a copy with one row equal to `row` removed, or None if that was
+        the last row. Rows with equal values are interchangeable, so any match
+        will do. The day range is not narrowed; the extra days have no flow.
+        """
+        lo, hi = np.searchsorted(self.timestamp, [row[0], row[0] + 1])
+        matches = np.ones(hi - lo, dtype=bool)
+        for name, value in zip(self.COLUMNS[1:], row[1:]):
+            matches &= getattr(self, name)[lo:hi] == value
+        if not matches.any():
+            return self
+        if len(self) == 1:
+            return None
+        position = int(lo + np.argmax(matches))
+        columns = [np.delete(getattr(self, name), position) for name in self.COLUMNS]
+        return UserColumns(*columns, daily=self._prefix_adding(row[0] // SECONDS_PER_DAY, -row[1]))
+
+
+class TransactionColumns:
+    """
+    Transactions stored column-wise: amounts in integer cents, epoch-second
+    timestamps, and account/category/merchant IDs interned to integer codes.
+
+    Each user's rows are a separate UserColumns block ordered by timestamp, so
+    a date window is found with np.searchsorted and the flow over any range of
+    whole days is the difference of two entries of the user's daily prefix.
+    A write only replaces the block of the user it belongs to (see add() and
+    remove()).
+    """
+
+    def __init__(self, accounts: List[Account], transactions: List[Transaction]):
+        self.owner_by_account = {acc.account_id: acc.user_id for acc in accounts}
+        owned = [tx for tx in transactions if tx.account_id in self.owner_by_account]
+        count = len(owned)
+
+        user_codes, user_ids = _intern([self.owner_by_account[tx.account_id] for tx in owned])
+        timestamps = np.fromiter((int(parse_timestamp(tx.date)) for tx in owned), dtype=np.int64, count=count)
+        order = np.lexsort((timestamps, user_codes))
+
+        amounts = np.fromiter((tx.amount for tx in owned), dtype=np.float64, count=count)
+        account_codes, self.account_ids = _intern([tx.account_id for tx in owned])
+        category_codes, self.categories = _intern([tx.category for tx in owned])
+        merchant_codes, self.merchant_ids = _intern([tx.merchant_id for tx in owned])
+        columns = [
+            timestamps[order],
+            np.rint(amounts * 100).astype(np.int64)[order],
+            account_codes[order],
+            category_codes[order],
+            merchant_codes[order],
+        ]
+        offsets = np.searchsorted(user_codes[order], np.arange(len(user_ids) + 1))
+        self.users: Dict[str, UserColumns] = {
+            user_id: UserColumns(*(column[offsets[code]:offsets[code + 1]] for column in columns))
+            for code, user_id in enumerate(user_ids)
+        }
+        self._codes = [
+            {value: code for code, value in enumerate(values)}
+            for values in (self.account_ids, self.categories, self.merchant_ids)
+        ]
+        # Transactions whose account is unknown, kept so they can be added once it exists
+        self.orphans: Dict[str, List[Transaction]] = {}
+        for tx in transactions:
+            if tx.account_id not in self.owner_by_account:
+                self.orphans.setdefault(tx.account_id, []).append(tx)
+
+    def _row(self, tx: Transaction) -> Tuple[int, ...]:
+        codes = []
+        for lookup, values, value in zip(
+            self._codes, (self.account_ids, self.categories, self.merchant_ids), (tx.account_id, tx.category, tx.merchant_id)
+        ):
+            code = lookup.get(value)
+            if code is None:
+                code = lookup[value] = len(values)
+                values.append(value)
+            codes.append(code)
+        return (int(parse_timestamp(tx.date)), int(round(tx.amount * 100)), *codes)
+
+    def add(self, tx: Transaction):
+        """Adds a transaction to its owner's columns, in O(n + d) for the owner's n rows and d days."""
+        owner = self.owner_by_account.get(tx.account_id)
+        if owner is None:
+            self.orphans.setdefault(tx.account_id, []).append(tx)
+            return
+        columns = self.users.get(owner)
+        row = self._row(tx)
+        if columns is None:
+            self.users[owner] = UserColumns(*(np.array([value], dtype=np.int64) for value in row))
+        else:
+            self.users[owner] = columns.with_row(row)
+
+    def remove(self, tx: Transaction):
+        """Removes a transaction from its owner's columns, in O(n + d) like add()."""
+        owner = self.owner_by_account.get(tx.account_id)
+        if owner is None:
+            orphans = self.orphans.get(tx.account_id, [])
+            orphans[:] = [orphan for orphan in orphans if orphan.transaction_id != tx.transaction_id]
+            if not orphans:
+                self.orphans.pop(tx.account_id, None)
+            return
+        columns = self.users.get(owner)
+        if columns is None:
+            return
+        remaining = columns.without_row(self._row(tx))
+        if remaining is None:
+            del self.users[owner]
+        else:
+            self.users[owner] = remaining
+
+    def add_account(self, account: Account):
+        """Registers a new account and adds any transactions that were waiting for it."""
+        self.owner_by_account[account.account_id] = account.user_id
+        for tx in self.orphans.pop(account.account_id, []):
+            self.add(tx)
+
+    def net_flow(self, user_id: str, start: Optional[float] = None, end: Optional[float] = None) -> float:
+        """Sums a user's transaction amounts dated within [start, end]."""
+        columns = self.users.get(user_id)
+        if columns is None:
+            return 0.0
+        return int(columns.amount_cents[columns.window(start, end)].sum()) / 100
+
+    def cumulative_cents(self, user_id: str, days: np.ndarray) -> np.ndarray:
+        """
+        Returns the user's net flow in cents over all days before each of `days`
+        (UTC day numbers, i.e. epoch seconds // 86400).
+        """
+        days = np.asarray(days, dtype=np.int64)
+        columns = self.users.get(user_id)
+        if columns is None:
+            return np.zeros(days.shape, dtype=np.int64)
+        positions = np.clip(days - columns.first_day, 0, columns.day_span)
+        return columns.daily_prefix[positions]
+
+    def flow_between_days(self, user_id: str, first_day: int, last_day: int) -> float:
+        """Sums a user's transaction amounts dated on UTC days first_day..last_day inclusive."""
+        columns = self.users.get(user_id)
+        if columns is None or last_day < first_day:
+            return 0.0
+        lo = min(max(first_day - columns.first_day, 0), columns.day_span)
+        hi = min(max(last_day + 1 - columns.first_day, 0), columns.day_span)
+        return int(columns.daily_prefix[hi] - columns.daily_prefix[lo]) / 100
+
+    def bucketed_flow(self, user_id: str, boundaries: List[int]) -> List[float]:
+        """Returns the flow between each pair of consecutive day boundaries [b[i], b[i + 1])."""
+        return [int(cents) / 100 for cents in np.diff(self.cumulative_cents(user_id, boundaries))]
+
+
+class TransactionColumnIndex:
+    """
+    The TransactionColumns of the accounts and transactions collections, kept
+    up to date from their change listeners.
+
+    Transaction writes are applied with TransactionColumns.add() and remove(),
+    new accounts with add_account(). Deleting an account or changing its owner
+    is rare enough that it rebuilds on the next read instead, as does a version
+    jump without published changes (startup, a reload from storage).
+    """
+
+    def __init__(self, accounts: Collection, transactions: Collection):
+        self.accounts = accounts
+        self.transactions = transactions
+        self._columns: Optional[TransactionColumns] = None
+        self._versions: Optional[Tuple[int, int]] = None
+        self._lock = threading.RLock()
+        accounts.subscribe(self._on_accounts_change)
+        transactions.subscribe(self._on_transactions_change)
+
+    def _on_accounts_change(self, previous_version: int, version: int, changes: List[Change]):
+        with self._lock:
+            if self._versions is None or self._versions[0] != previous_version:
+                # We were already stale; the next read rebuilds from scratch
+                return
+            for old, new in changes:
+                if old is not None and (new is None or (old.account_id, old.user_id) != (new.account_id, new.user_id)):
+                    self._versions = None
+                    return
+                if old is None:
+                    self._columns.add_account(new)
+            self._versions = (version, self._versions[1])
+
+    def _on_transactions_change(self, previous_version: int, version: int, changes: List[Change]):
+        with self._lock:
+            if self._versions is None or self._versions[1] != previous_version:
+                return
+            for old, new in changes:
+                if old is not None:
+                    self._columns.remove(old)
+                if new is not None:
+                    self._columns.add(new)
+            self._versions = (self._versions[0], version)
+
+    def is_fresh(self) -> bool:
+        """True if get() would return the columns without reloading either collection or rebuilding."""
+        return (
+            self.accounts.is_fresh()
+            and self.transactions.is_fresh()
+            and (self.accounts.version, self.transactions.version) == self._versions
+        )
+
+    def refresh(self):
+        versions = (self.accounts.snapshot()[0], self.transactions.snapshot()[0])
+        if versions != self._versions:
+            # Writes change the lists in place under the collections' locks, so rebuild under them too
+            with self.accounts.lock, self.transactions.lock, self._lock:
+                account_version, accounts = self.accounts.snapshot()
+                transaction_version, transactions = self.transactions.snapshot()
+                versions = (account_version, transaction_version)
+                if versions != self._versions:
+                    self._columns = TransactionColumns(accounts, transactions)
+                    self._versions = versions
+
+    def get(self) -> TransactionColumns:
+        if (self.accounts.cached()[0], self.transactions.cached()[0]) != self._versions:
+            self.refresh()
+        return self._columns
+
+
+transaction_columns = TransactionColumnIndex(repository.accounts, repository.transactions)
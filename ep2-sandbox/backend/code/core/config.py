@@ -1,6 +1,37 @@
 # app/core/config.py
 
+import os
+
 # In a real application, this would load from environment variables or a config file.
 # For this sandbox, we can keep it simple.
 
 API_PREFIX = "/api"
+
+# Directory holding the JSON data files, relative to the working directory.
+DATA_DIR = os.environ.get("DATA_DIR", "db")
+
+# Storage engine for the collections in core/repository.py: "json" keeps the
+# db/*.json files as the source of truth, "sqlite" reads and writes SQLITE_PATH.
+# Populate the SQLite database once with `python -m core.sqlite_store import`.
+STORAGE_BACKEND = os.environ.get("STORAGE_BACKEND", "json").lower()
+SQLITE_PATH = os.environ.get("SQLITE_PATH", os.path.join(DATA_DIR, "cymbal_bank.sqlite3"))
+
+# Seconds between background compactions of the JSON write journals into db/*.json.
+JOURNAL_COMPACT_INTERVAL = float(os.environ.get("JOURNAL_COMPACT_INTERVAL", "30"))
+
+# Maximum number of sub-requests accepted by POST /api/batch.
+BATCH_MAX_REQUESTS = int(os.environ.get("BATCH_MAX_REQUESTS", "20"))
+
+# Threads dedicated to collection writes made from async endpoints (see core/aio.py).
+WRITER_THREADS = int(os.environ.get("WRITER_THREADS", "4"))
+
+# Connection pool size of the shared outbound HTTP client (see core/http_client.py).
+HTTP_MAX_CONNECTIONS = int(os.environ.get("HTTP_MAX_CONNECTIONS", "100"))
+
+# Metadata server that issues ID tokens for calls to the A2A service. Point
+# GCE_METADATA_HOST at a local fake metadata server to run outside Google Cloud.
+METADATA_HOST = os.environ.get("GCE_METADATA_HOST", "metadata.google.internal")
+METADATA_IDENTITY_URL = f"http://{METADATA_HOST}/computeMetadata/v1/instance/service-accounts/default/identity"
+
+# Cached ID tokens are refreshed in the background this many seconds before they expire.
+TOKEN_REFRESH_MARGIN = float(os.environ.get("TOKEN_REFRESH_MARGIN", "300"))
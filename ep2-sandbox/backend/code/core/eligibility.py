@@ -0,0 +1,106 @@
+# app/core/eligibility.py
+
+import threading
+from bisect import bisect_left, bisect_right
+from typing import Dict, List, Optional
+
+from api.models import BankPartner, User
+from core import repository
+from core.indexes import DerivedIndex
+
+
+def minimum_credit_score(partner: BankPartner) -> Optional[int]:
+    """Returns the partner's minimum credit score, or None if anyone is eligible."""
+    criteria = partner.eligibility_criteria
+    return criteria.minimum_credit_score if criteria else None
+
+
+def cash_benefit(partner: BankPartner, spend: float) -> Optional[float]:
+    """
+    Returns what a partner's benefit is worth on `spend`, or None if it has no
+    cash value: an APR reduction depends on the balance and term, not on spend.
+    """
+    if partner.benefit_type != "percentage_discount":
+        return None
+    return round(spend * partner.benefit_value, 2)
+
+
+class PartnerTiers:
+    """
+    Bank partners split into those open to everyone and those gated on a
+    minimum credit score, the latter sorted by that score. The partners a
+    score qualifies for are the unconditional ones plus a prefix of the sorted
+    list, found by one bisection; each distinct score's result is cached
+    until the partners change.
+    """
+
+    def __init__(self, partners: List[BankPartner]):
+        self.position = {partner.partner_id: index for index, partner in enumerate(partners)}
+        self.by_id = {partner.partner_id: partner for partner in partners}
+        self.by_merchant: Dict[str, List[BankPartner]] = {}
+        for partner in partners:
+            self.by_merchant.setdefault(partner.merchant_id, []).append(partner)
+        self.unconditional = [partner for partner in partners if minimum_credit_score(partner) is None]
+        gated = sorted(
+            (partner for partner in partners if minimum_credit_score(partner) is not None),
+            key=minimum_credit_score,
+        )
+        self.thresholds: List[int] = [minimum_credit_score(partner) for partner in gated]
+        self.gated: List[BankPartner] = gated
+        self._eligible: Dict[Optional[int], List[BankPartner]] = {}
+        self._lock = threading.Lock()
+
+    def eligible(self, credit_score: Optional[int]) -> List[BankPartner]:
+        """Returns the partners a user with `credit_score` can benefit from, in file order."""
+        cached = self._eligible.get(credit_score)
+        if cached is not None:
+            return cached
+        # Users without a credit score only qualify for unconditional partners
+        qualified = self.gated[: bisect_right(self.thresholds, credit_score)] if credit_score else []
+        eligible = sorted(self.unconditional + qualified, key=lambda partner: self.position[partner.partner_id])
+        with self._lock:
+            return self._eligible.setdefault(credit_score, eligible)
+
+
+class CreditScoreIndex:
+    """Users sorted by credit score, so the users at or above a score are a bisection away."""
+
+    def __init__(self, users: List[User]):
+        scored = sorted((user for user in users if user.credit_score), key=lambda user: user.credit_score)
+        self.scores: List[int] = [user.credit_score for user in scored]
+        self.scored: List[User] = scored
+        self.unscored: List[User] = [user for user in users if not user.credit_score]
+
+    def at_least(self, credit_score: int) -> List[User]:
+        """Returns the users whose credit score is at least `credit_score`, highest first."""
+        return self.scored[bisect_left(self.scores, credit_score):][::-1]
+
+    def everyone(self) -> List[User]:
+        """Returns every user, highest credit score first and users without one last."""
+        return self.scored[::-1] + self.unscored
+
+
+partner_tiers = DerivedIndex(PartnerTiers, repository.partners)
+users_by_credit_score = DerivedIndex(CreditScoreIndex, repository.users)
+
+
+def eligible_partners(credit_score: Optional[int]) -> List[BankPartner]:
+    """Returns the partners a user with the given credit score can benefit from."""
+    return partner_tiers.get().eligible(credit_score)
+
+
+def partner_by_id(partner_id: str) -> Optional[BankPartner]:
+    """Returns the partner with the given ID, or None."""
+    return partner_tiers.get().by_id.get(partner_id)
+
+
+def partners_for_merchant(merchant_id: str) -> List[BankPartner]:
+    """Returns the partners offering a benefit at a merchant, in file order."""
+    return partner_tiers.get().by_merchant.get(merchant_id, [])
+
+
+def eligible_users(partner: BankPartner) -> List[User]:
+    """Returns the users who can benefit from a partner, highest credit score first."""
+    threshold = minimum_credit_score(partner)
+    index = users_by_credit_score.get()
+    return index.everyone() if threshold is None else index.at_least(threshold)
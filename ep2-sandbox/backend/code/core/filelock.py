@@ -0,0 +1,53 @@
+# app/core/filelock.py
+
+import os
+import tempfile
+
+try:
+    import fcntl
+except ImportError:  # Windows: fall back to in-process locking only
+    fcntl = None
+
+
+class FileLock:
+    """
+    An exclusive inter-process lock held on `<path>.lock`, so that gunicorn
+    workers sharing the same db/ directory take turns writing a file.
+    Not re-entrant; combine with a threading lock for in-process callers.
+    """
+
+    def __init__(self, path: str):
+        self.lock_path = path + ".lock"
+        self._fd = None
+
+    def __enter__(self):
+        self._fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+        if fcntl:
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc_info):
+        if fcntl:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+        os.close(self._fd)
+        self._fd = None
+
+
+def atomic_write(path: str, data: str):
+    """
+    Writes `data` to a temporary file next to `path` and renames it into place,
+    so readers see either the old or the new contents and never a partial file.
+    """
+    directory = os.path.dirname(path) or "."
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=os.path.basename(path) + ".", suffix=".tmp")
+    try:
+        os.chmod(tmp_path, 0o644)
+        with os.fdopen(fd, "w") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
@@ -0,0 +1,41 @@
+# app/core/http_client.py
+
+from typing import Optional
+
+import httpx
+
+from core.config import HTTP_MAX_CONNECTIONS
+
+# Connect quickly, but give the agent time to answer
+DEFAULT_TIMEOUT = httpx.Timeout(30.0, connect=10.0)
+
+_client: Optional[httpx.AsyncClient] = None
+
+
+def open_client() -> httpx.AsyncClient:
+    """Creates the shared outbound HTTP client. Called from the app lifespan."""
+    global _client
+    if _client is None:
+        _client = httpx.AsyncClient(
+            timeout=DEFAULT_TIMEOUT,
+            limits=httpx.Limits(
+                max_connections=HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=HTTP_MAX_CONNECTIONS,
+            ),
+        )
+    return _client
+
+
+def get_client() -> httpx.AsyncClient:
+    """
+    Returns the shared client. Its connection pool keeps TCP/TLS connections to
+    the metadata server and the A2A service alive between requests.
+    """
+    return _client if _client is not None else open_client()
+
+
+async def close_client():
+    global _client
+    if _client is not None:
+        client, _client = _client, None
+        await client.aclose()
@@ -0,0 +1,110 @@
+# app/core/id_tokens.py
+
+import asyncio
+import base64
+import binascii
+import json
+import time
+from typing import Callable, Dict, NamedTuple, Optional
+
+import httpx
+
+from core import http_client
+from core.config import METADATA_IDENTITY_URL, TOKEN_REFRESH_MARGIN
+
+# A cached token is never handed out closer than this to its expiry, so it
+# cannot expire on the way to the A2A service
+EXPIRY_SKEW = 30.0
+
+
+class CachedToken(NamedTuple):
+    token: str
+    expires_at: float
+
+
+def token_expiry(token: str) -> Optional[float]:
+    """Returns the `exp` claim of a JWT, or None when it cannot be read."""
+    try:
+        payload = token.split(".")[1]
+        claims = json.loads(base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4)))
+        return float(claims["exp"])
+    except (IndexError, KeyError, TypeError, ValueError, binascii.Error):
+        return None
+
+
+class IdTokenCache:
+    """
+    Google ID tokens from the metadata server, cached per audience.
+
+    A token is served from memory until TOKEN_REFRESH_MARGIN seconds before
+    its `exp` claim. Within that margin the cached token is still returned
+    while a refresh runs in the background; once it is about to expire,
+    callers wait for the refresh. Either way only one fetch per audience is in
+    flight, so concurrent requests share it instead of each calling the
+    metadata server. Tokens whose expiry cannot be read are not cached.
+    """
+
+    def __init__(
+        self,
+        metadata_url: str = METADATA_IDENTITY_URL,
+        refresh_margin: float = TOKEN_REFRESH_MARGIN,
+        client: Optional[httpx.AsyncClient] = None,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.metadata_url = metadata_url
+        self.refresh_margin = refresh_margin
+        self._client = client
+        self._clock = clock
+        self._tokens: Dict[str, CachedToken] = {}
+        self._refreshes: Dict[str, asyncio.Task] = {}
+
+    async def get(self, audience: str) -> str:
+        """Returns a valid ID token for `audience`, fetching one only when needed."""
+        cached = self._tokens.get(audience)
+        now = self._clock()
+        if cached is not None and now < cached.expires_at - EXPIRY_SKEW:
+            if now >= cached.expires_at - self.refresh_margin:
+                self._refresh(audience)
+            return cached.token
+        return await asyncio.shield(self._refresh(audience))
+
+    def invalidate(self, audience: str):
+        """Drops the cached token, e.g. after the service rejected it."""
+        self._tokens.pop(audience, None)
+
+    def _refresh(self, audience: str) -> asyncio.Task:
+        """Returns the in-flight fetch for `audience`, starting one if there is none."""
+        task = self._refreshes.get(audience)
+        if task is None or task.get_loop() is not asyncio.get_running_loop():
+            task = asyncio.get_running_loop().create_task(self._fetch(audience))
+            self._refreshes[audience] = task
+            task.add_done_callback(lambda done: self._finish(audience, done))
+        return task
+
+    def _finish(self, audience: str, task: asyncio.Task):
+        if self._refreshes.get(audience) is task:
+            del self._refreshes[audience]
+        # A failed background refresh is retried by the next request; callers
+        # waiting on the task see the error themselves
+        if not task.cancelled():
+            task.exception()
+
+    async def _fetch(self, audience: str) -> str:
+        client = self._client or http_client.get_client()
+        response = await client.get(
+            self.metadata_url,
+            params={"audience": audience},
+            headers={"Metadata-Flavor": "Google"},
+            timeout=10.0,
+        )
+        response.raise_for_status()
+        token = response.text
+        expires_at = token_expiry(token)
+        if expires_at is not None:
+            self._tokens[audience] = CachedToken(token, expires_at)
+        else:
+            self._tokens.pop(audience, None)
+        return token
+
+
+id_tokens = IdTokenCache()
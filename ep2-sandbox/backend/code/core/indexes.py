@@ -0,0 +1,294 @@
+# app/core/indexes.py
+
+import threading
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, Generic, Iterable, List, Optional, Tuple, TypeVar
+
+from api.models import Account, LifeGoal, Schedule, Transaction, User
+from core import repository
+from core.repository import Collection, JsonCollection
+from core.sqlite_store import Change
+
+IndexT = TypeVar("IndexT")
+OwnedT = TypeVar("OwnedT", Account, LifeGoal, Schedule)
+
+
+class DerivedIndex(Generic[IndexT]):
+    """
+    A lookup structure built from one or more collections.
+
+    The index is rebuilt the first time it is read after any of its source
+    collections changed, and served from memory otherwise.
+    """
+
+    def __init__(self, build: Callable[..., IndexT], *sources: JsonCollection):
+        self.build = build
+        self.sources = sources
+        self._versions: Optional[Tuple[int, ...]] = None
+        self._value: Optional[IndexT] = None
+        self._lock = threading.Lock()
+
+    def is_fresh(self) -> bool:
+        """True if get() would return the cached value without reloading or rebuilding anything."""
+        return all(source.is_fresh() for source in self.sources) and (
+            tuple(source.version for source in self.sources) == self._versions
+        )
+
+    def refresh(self):
+        for source in self.sources:
+            source.snapshot()
+        self.get()
+
+    def get(self) -> IndexT:
+        """Returns the index over the sources as last synced; see aio.ready() to pick up other workers' writes."""
+        snapshots = [source.cached() for source in self.sources]
+        versions = tuple(version for version, _ in snapshots)
+        if versions != self._versions:
+            with self._lock:
+                if versions != self._versions:
+                    self._value = self.build(*(items for _, items in snapshots))
+                    self._versions = versions
+        return self._value
+
+
+def epoch_seconds(value: datetime) -> float:
+    """Converts a datetime to epoch seconds, treating naive values as UTC."""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+def history_start(history: int) -> datetime:
+    """Returns the start of a `history` days window ending now, shared by every endpoint with a `history` parameter."""
+    return datetime.now(timezone.utc) - timedelta(days=history)
+
+
+def parse_timestamp(date: str) -> float:
+    """Parses an ISO 8601 transaction date such as 2024-01-01T00:00:00Z into epoch seconds."""
+    return epoch_seconds(datetime.fromisoformat(date.replace("Z", "+00:00")))
+
+
+class TransactionTimeline:
+    """
+    A user's transactions sorted by date, with a parallel list of epoch
+    seconds so that date windows are answered by bisection. Transactions on
+    the same timestamp are ordered by transaction_id, so (timestamp,
+    transaction_id) is a stable position to resume a listing from.
+    """
+
+    def __init__(self, transactions: List[Transaction]):
+        dated = sorted(
+            ((parse_timestamp(tx.date), tx) for tx in transactions),
+            key=lambda pair: (pair[0], pair[1].transaction_id),
+        )
+        self.timestamps: List[float] = [ts for ts, _ in dated]
+        self.transactions: List[Transaction] = [tx for _, tx in dated]
+
+    def __len__(self) -> int:
+        return len(self.transactions)
+
+    def bounds(self, start: Optional[float] = None, end: Optional[float] = None) -> Tuple[int, int]:
+        """Returns the slice [lo, hi) of transactions dated within [start, end]; None leaves a side open."""
+        lo = 0 if start is None else bisect_left(self.timestamps, start)
+        hi = len(self.timestamps) if end is None else bisect_right(self.timestamps, end)
+        return lo, max(lo, hi)
+
+    def position_after(self, timestamp: float, transaction_id: str) -> int:
+        """Returns the index of the first transaction ordered after (timestamp, transaction_id)."""
+        lo = bisect_left(self.timestamps, timestamp)
+        hi = bisect_right(self.timestamps, timestamp, lo)
+        return bisect_right(self.transactions, transaction_id, lo, hi, key=lambda tx: tx.transaction_id)
+
+    def window(self, start: Optional[float] = None, end: Optional[float] = None) -> List[Transaction]:
+        """Returns the transactions dated within [start, end] in chronological order."""
+        lo, hi = self.bounds(start, end)
+        return self.transactions[lo:hi]
+
+    def replace(self, removed: Iterable[Transaction], added: Iterable[Transaction]) -> "TransactionTimeline":
+        """
+        Returns a copy with `removed` taken out and `added` inserted in order, in
+        O(n) for n transactions. This timeline is left as it was, so readers
+        still paging or streaming through it are unaffected.
+        """
+        timeline = TransactionTimeline([])
+        timeline.timestamps = list(self.timestamps)
+        timeline.transactions = list(self.transactions)
+        for tx in removed:
+            index = timeline.position_after(parse_timestamp(tx.date), tx.transaction_id) - 1
+            if index >= 0 and timeline.transactions[index].transaction_id == tx.transaction_id:
+                del timeline.timestamps[index]
+                del timeline.transactions[index]
+        for tx in added:
+            timestamp = parse_timestamp(tx.date)
+            index = timeline.position_after(timestamp, tx.transaction_id)
+            timeline.timestamps.insert(index, timestamp)
+            timeline.transactions.insert(index, tx)
+        return timeline
+
+
+EMPTY_TIMELINE = TransactionTimeline([])
+
+
+def _map_users_by_id(users: List[User]) -> Dict[str, User]:
+    return {user.user_id: user for user in users}
+
+
+def _group_by_user(items: List[OwnedT]) -> Dict[str, List[OwnedT]]:
+    by_user: Dict[str, List[OwnedT]] = defaultdict(list)
+    for item in items:
+        by_user[item.user_id].append(item)
+    return dict(by_user)
+
+
+class UserTimelines:
+    """
+    Each user's TransactionTimeline, kept up to date from the accounts and
+    transactions change listeners.
+
+    A transaction write only replaces the timeline of the user owning its
+    account, and an account write only moves that account's transactions when
+    its owner changes. Transactions whose account is unknown are parked until
+    the account appears. If either collection's version moves without a
+    published change (startup, a reload from storage), everything is rebuilt
+    on the next read.
+    """
+
+    def __init__(self, accounts: Collection, transactions: Collection):
+        self.accounts = accounts
+        self.transactions = transactions
+        self._timelines: Dict[str, TransactionTimeline] = {}
+        self._owners: Dict[str, str] = {}
+        self._orphans: Dict[str, List[Transaction]] = {}
+        self._versions: Optional[Tuple[int, int]] = None
+        self._lock = threading.RLock()
+        accounts.subscribe(self._on_accounts_change)
+        transactions.subscribe(self._on_transactions_change)
+
+    def _rebuild(self, versions: Tuple[int, int], accounts: List[Account], transactions: List[Transaction]):
+        self._owners = {account.account_id: account.user_id for account in accounts}
+        by_user: Dict[str, List[Transaction]] = defaultdict(list)
+        self._orphans = {}
+        for tx in transactions:
+            owner = self._owners.get(tx.account_id)
+            if owner is None:
+                self._orphans.setdefault(tx.account_id, []).append(tx)
+            else:
+                by_user[owner].append(tx)
+        self._timelines = {user_id: TransactionTimeline(user_transactions) for user_id, user_transactions in by_user.items()}
+        self._versions = versions
+
+    def _replace(self, user_id: str, removed: List[Transaction], added: List[Transaction]):
+        timeline = self._timelines.get(user_id, EMPTY_TIMELINE).replace(removed, added)
+        if timeline:
+            self._timelines[user_id] = timeline
+        else:
+            self._timelines.pop(user_id, None)
+
+    def _move_account(self, account_id: str, old_owner: Optional[str], new_owner: Optional[str]):
+        if old_owner is None:
+            moved = self._orphans.pop(account_id, [])
+        else:
+            moved = [tx for tx in self._timelines.get(old_owner, EMPTY_TIMELINE).transactions if tx.account_id == account_id]
+            self._replace(old_owner, moved, [])
+        if new_owner is None:
+            if moved:
+                self._orphans[account_id] = moved
+        else:
+            self._replace(new_owner, [], moved)
+
+    def _on_accounts_change(self, previous_version: int, version: int, changes: List[Change]):
+        with self._lock:
+            if self._versions is None or self._versions[0] != previous_version:
+                # We were already stale; the next read rebuilds from scratch
+                return
+            for old, new in changes:
+                if old is not None and new is not None and (old.account_id, old.user_id) == (new.account_id, new.user_id):
+                    # Balance updates and the like leave the account's transactions where they are
+                    continue
+                if old is not None:
+                    self._move_account(old.account_id, self._owners.pop(old.account_id, None), None)
+                if new is not None:
+                    self._owners[new.account_id] = new.user_id
+                    self._move_account(new.account_id, None, new.user_id)
+            self._versions = (version, self._versions[1])
+
+    def _on_transactions_change(self, previous_version: int, version: int, changes: List[Change]):
+        with self._lock:
+            if self._versions is None or self._versions[1] != previous_version:
+                return
+            removed: Dict[Optional[str], List[Transaction]] = defaultdict(list)
+            added: Dict[Optional[str], List[Transaction]] = defaultdict(list)
+            for old, new in changes:
+                if old is not None:
+                    removed[self._owners.get(old.account_id)].append(old)
+                if new is not None:
+                    added[self._owners.get(new.account_id)].append(new)
+            for tx in removed.pop(None, []):
+                orphans = self._orphans.get(tx.account_id, [])
+                orphans[:] = [orphan for orphan in orphans if orphan.transaction_id != tx.transaction_id]
+                if not orphans:
+                    self._orphans.pop(tx.account_id, None)
+            for tx in added.pop(None, []):
+                self._orphans.setdefault(tx.account_id, []).append(tx)
+            for user_id in removed.keys() | added.keys():
+                self._replace(user_id, removed.get(user_id, []), added.get(user_id, []))
+            self._versions = (self._versions[0], version)
+
+    def is_fresh(self) -> bool:
+        """True if reads would be answered without reloading either collection or rebuilding."""
+        return (
+            self.accounts.is_fresh()
+            and self.transactions.is_fresh()
+            and (self.accounts.version, self.transactions.version) == self._versions
+        )
+
+    def refresh(self):
+        versions = (self.accounts.snapshot()[0], self.transactions.snapshot()[0])
+        if versions != self._versions:
+            # Writes change the lists in place under the collections' locks, so rebuild under them too
+            with self.accounts.lock, self.transactions.lock, self._lock:
+                account_version, accounts = self.accounts.snapshot()
+                transaction_version, transactions = self.transactions.snapshot()
+                versions = (account_version, transaction_version)
+                if versions != self._versions:
+                    self._rebuild(versions, accounts, transactions)
+
+    def get(self, user_id: str) -> TransactionTimeline:
+        """Returns the user's date-sorted transaction timeline."""
+        if (self.accounts.cached()[0], self.transactions.cached()[0]) != self._versions:
+            self.refresh()
+        return self._timelines.get(user_id, EMPTY_TIMELINE)
+
+
+users_by_id = DerivedIndex(_map_users_by_id, repository.users)
+accounts_by_user = DerivedIndex(_group_by_user, repository.accounts)
+goals_by_user = DerivedIndex(_group_by_user, repository.goals)
+schedules_by_user = DerivedIndex(_group_by_user, repository.schedules)
+timelines_by_user = UserTimelines(repository.accounts, repository.transactions)
+
+
+def user_by_id(user_id: str) -> Optional[User]:
+    """Returns the user with the given ID, or None."""
+    return users_by_id.get().get(user_id)
+
+
+def accounts_for_user(user_id: str) -> List[Account]:
+    """Returns the accounts owned by a user, in file order."""
+    return accounts_by_user.get().get(user_id, [])
+
+
+def goals_for_user(user_id: str) -> List[LifeGoal]:
+    """Returns a user's goals, in file order."""
+    return goals_by_user.get().get(user_id, [])
+
+
+def schedules_for_user(user_id: str) -> List[Schedule]:
+    """Returns a user's scheduled transactions, in file order."""
+    return schedules_by_user.get().get(user_id, [])
+
+
+def transaction_timeline(user_id: str) -> TransactionTimeline:
+    """Returns the user's date-sorted transaction timeline."""
+    return timelines_by_user.get(user_id)
@@ -0,0 +1,102 @@
+# app/core/projections.py
+
+from datetime import datetime
+from collections import defaultdict
+from typing import Dict, List, NamedTuple
+
+import numpy as np
+
+from api.models import LifeGoal, Schedule
+from core.recurrence import add_months, parse_datetime, schedule_occurrences
+
+
+class GoalProjections(NamedTuple):
+    """Projections for G goals over H months; row g belongs to the g-th goal passed in."""
+
+    months_remaining: np.ndarray  # (G,) int: whole months until the target date
+    monthly_contribution: np.ndarray  # (G,) average planned contribution per remaining month
+    balances: np.ndarray  # (G, H) projected savings at the end of each month
+    projected_amount: np.ndarray  # (G,) projected savings at the target date
+    on_track: np.ndarray  # (G,) bool
+    shortfall: np.ndarray  # (G,)
+    required_monthly_contribution: np.ndarray  # (G,) level contribution that reaches the target
+    months_to_target: np.ndarray  # (G,) int: first month the target is reached, -1 if not by the target date
+
+
+def months_until(today: datetime, target: datetime) -> int:
+    """Returns the number of whole months from `today` until `target` (0 if it has passed)."""
+    months = (target.year - today.year) * 12 + target.month - today.month
+    if add_months(today, months) > target:
+        months -= 1
+    return max(months, 0)
+
+
+def project_goals(
+    goals: List[LifeGoal],
+    schedules: List[Schedule],
+    monthly_cash_flow: float,
+    today: datetime,
+) -> GoalProjections:
+    """
+    Projects all of a user's goals month by month in one set of array operations.
+
+    Each goal receives, every month until its target date:
+    - the occurrences of recurring schedules paying into its linked account
+      (`account_id`), bucketed into the months they fall in, and
+    - an even share of the user's average monthly cash flow, when positive,
+      split across the goals that are not yet funded.
+
+    Month m (1-based) covers [today + m - 1 months, today + m months).
+    """
+    count = len(goals)
+    targets = np.array([goal.target_amount for goal in goals], dtype=np.float64)
+    saved = np.array([goal.current_amount_saved for goal in goals], dtype=np.float64)
+    months = np.zeros(count, dtype=np.int64)
+    for g, goal in enumerate(goals):
+        try:
+            months[g] = months_until(today, parse_datetime(goal.target_date))
+        except ValueError:
+            # Unreadable target dates are treated as due now
+            months[g] = 0
+    horizon = max(int(months.max(initial=0)), 1)
+
+    scheduled = np.zeros((count, horizon), dtype=np.float64)
+    schedules_by_account: Dict[str, List[Schedule]] = defaultdict(list)
+    for schedule in schedules:
+        schedules_by_account[schedule.destination_account_id].append(schedule)
+    linked = [(g, goal.account_id) for g, goal in enumerate(goals) if goal.account_id in schedules_by_account]
+    if linked:
+        # boundaries[m] is the start of month m + 1; occurrences are bucketed with searchsorted
+        boundaries = np.array([add_months(today, m).timestamp() for m in range(horizon + 1)])
+        window_end = add_months(today, horizon)
+    for g, account_id in linked:
+        for schedule in schedules_by_account[account_id]:
+            try:
+                dates = [date.timestamp() for date, _ in schedule_occurrences(schedule, today, window_end)]
+            except ValueError:
+                continue
+            buckets = np.searchsorted(boundaries, dates, side="right") - 1
+            np.add.at(scheduled[g], buckets, schedule.amount)
+
+    unfunded = (saved < targets) & (months > 0)
+    share = max(monthly_cash_flow, 0.0) / max(int(unfunded.sum()), 1)
+    active = np.arange(1, horizon + 1)[None, :] <= months[:, None]
+    contributions = (scheduled + np.where(unfunded, share, 0.0)[:, None]) * active
+    balances = saved[:, None] + np.cumsum(contributions, axis=1)
+
+    # Goals due now receive nothing, so their "last month" column is just their savings
+    projected = balances[np.arange(count), np.maximum(months - 1, 0)]
+    reached = (balances >= targets[:, None]) & active
+    months_to_target = np.where(saved >= targets, 0, np.where(reached.any(axis=1), reached.argmax(axis=1) + 1, -1))
+    remaining = np.maximum(targets - saved, 0.0)
+
+    return GoalProjections(
+        months_remaining=months,
+        monthly_contribution=np.divide(contributions.sum(axis=1), months, out=np.zeros(count), where=months > 0),
+        balances=balances,
+        projected_amount=projected,
+        on_track=projected >= targets,
+        shortfall=np.maximum(targets - projected, 0.0),
+        required_monthly_contribution=np.divide(remaining, months, out=remaining.copy(), where=months > 0),
+        months_to_target=months_to_target,
+    )
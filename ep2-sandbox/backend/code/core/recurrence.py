@@ -0,0 +1,119 @@
+# app/core/recurrence.py
+
+import calendar
+import heapq
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Iterable, Iterator, Optional, Tuple
+
+from api.models import Schedule
+
+# Frequencies with a fixed step, and those that step by calendar months
+FIXED_STEPS = {
+    "daily": timedelta(days=1),
+    "weekly": timedelta(weeks=1),
+    "biweekly": timedelta(weeks=2),
+}
+MONTH_STEPS = {
+    "monthly": 1,
+    "quarterly": 3,
+    "yearly": 12,
+    "annually": 12,
+}
+
+
+def parse_datetime(value: str) -> datetime:
+    """Parses an ISO 8601 date such as 2024-08-12T00:00:00Z, treating naive values as UTC."""
+    parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def normalize_frequency(frequency: str) -> str:
+    return frequency.strip().lower().replace("-", "").replace(" ", "")
+
+
+def add_months(anchor: datetime, months: int) -> datetime:
+    """Moves `anchor` by whole months, clamping the day to the end of shorter months (Jan 31 -> Feb 28)."""
+    month_index = anchor.month - 1 + months
+    year, month = anchor.year + month_index // 12, month_index % 12 + 1
+    return anchor.replace(year=year, month=month, day=min(anchor.day, calendar.monthrange(year, month)[1]))
+
+
+def occurrences(
+    start: datetime,
+    frequency: str,
+    end: Optional[datetime] = None,
+    window_start: Optional[datetime] = None,
+    window_end: Optional[datetime] = None,
+) -> Iterator[datetime]:
+    """
+    Returns a lazy iterator over the occurrences of a series starting at
+    `start` and repeating at `frequency` up to `end` (inclusive), restricted
+    to [window_start, window_end).
+
+    The first occurrence in the window is computed directly rather than by
+    stepping from `start`, so a window far into a long series costs the same
+    as one at its beginning. Every occurrence is derived from `start`, so
+    monthly series anchored on the 31st return to it after shorter months.
+    Raises ValueError for an unknown frequency.
+    """
+    frequency = normalize_frequency(frequency)
+    first = start if window_start is None or window_start <= start else window_start
+
+    if frequency in FIXED_STEPS:
+        step = FIXED_STEPS[frequency]
+        nth: Callable[[int], datetime] = lambda n: start + n * step  # noqa: E731
+        n = -((start - first) // step)  # ceil((first - start) / step)
+    elif frequency in MONTH_STEPS:
+        months = MONTH_STEPS[frequency]
+        nth = lambda n: add_months(start, n * months)  # noqa: E731
+        # The last occurrence in or before first's month, then at most one step on
+        n = ((first.year - start.year) * 12 + first.month - start.month) // months
+        if nth(n) < first:
+            n += 1
+    else:
+        raise ValueError(f"Unknown frequency: {frequency!r}")
+    return _series(nth, n, end, window_end)
+
+
+def _series(nth: Callable[[int], datetime], n: int, end: Optional[datetime], window_end: Optional[datetime]) -> Iterator[datetime]:
+    while True:
+        try:
+            occurrence = nth(n)
+        except (OverflowError, ValueError):
+            # Past the largest representable date
+            return
+        if (end is not None and occurrence > end) or (window_end is not None and occurrence >= window_end):
+            return
+        yield occurrence
+        n += 1
+
+
+def schedule_occurrences(
+    schedule: Schedule, window_start: datetime, window_end: datetime
+) -> Iterator[Tuple[datetime, Schedule]]:
+    """
+    Returns a lazy iterator of (date, schedule) for each occurrence of a
+    schedule within [window_start, window_end). Raises ValueError if the
+    schedule's dates or frequency are invalid.
+    """
+    start = parse_datetime(schedule.start_date)
+    end = parse_datetime(schedule.end_date) if schedule.end_date else None
+    return ((occurrence, schedule) for occurrence in occurrences(start, schedule.frequency, end, window_start, window_end))
+
+
+def merged_occurrences(
+    schedules: Iterable[Schedule], window_start: datetime, window_end: datetime
+) -> Iterator[Tuple[datetime, Schedule]]:
+    """
+    Merges the occurrences of several schedules in chronological order. Only
+    one pending occurrence per schedule is held at a time (heapq.merge), so
+    taking the first k costs O(k log s) for s schedules, however long the
+    series are. Schedules with invalid dates or frequencies are skipped.
+    """
+    series = []
+    for schedule in schedules:
+        try:
+            series.append(schedule_occurrences(schedule, window_start, window_end))
+        except ValueError:
+            continue
+    return heapq.merge(*series, key=lambda pair: pair[0])
@@ -0,0 +1,486 @@
+# app/core/repository.py
+
+import json
+import os
+import threading
+from typing import Any, Callable, Dict, Generic, List, NamedTuple, Optional, Tuple, Type, TypeVar, Union
+
+from pydantic import BaseModel
+
+from api.models import Account, Advisor, BankPartner, LifeGoal, Meeting, Schedule, Transaction, User
+from core.aio import AsyncCollectionMixin, ready
+from core.config import DATA_DIR, JOURNAL_COMPACT_INTERVAL, SQLITE_PATH, STORAGE_BACKEND
+from core.filelock import FileLock, atomic_write
+from core.sqlite_store import Change, ChangeListener, SqliteCollection
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+
+class _PendingWrite:
+    """A write queued for the next group commit."""
+
+    def __init__(
+        self,
+        entries: List[Dict[str, Any]],
+        must_be_new: bool = False,
+        condition: Optional[Callable[[], bool]] = None,
+    ):
+        self.entries = entries
+        self.must_be_new = must_be_new
+        self.condition = condition
+        self.result = False
+        self.done = False
+        self.error: Optional[Exception] = None
+
+
+class JsonCollection(AsyncCollectionMixin, Generic[ModelT]):
+    """
+    A JSON array file under db/ parsed once into Pydantic models and kept in memory.
+
+    Every read stats the backing file and only re-parses it when its mtime or
+    size has changed, so the per-request cost does not depend on the file size.
+
+    Single-record writes are appended to a journal next to the file (one JSON
+    line per insert/update/delete) instead of rewriting it; compact() folds the
+    journal back into the file. Replaying an entry twice is harmless, so a crash
+    between rewriting the file and truncating the journal loses nothing.
+
+    Writers across gunicorn workers serialize on a FileLock, the JSON file is
+    only ever replaced by an atomic rename, and concurrent writers within a
+    worker share a single journal append and fsync (see _submit()).
+    """
+
+    def __init__(self, file_name: str, model: Type[ModelT], key: str, indent: int = 2, data_dir: str = DATA_DIR):
+        self.file_name = file_name
+        self.file_path = os.path.join(data_dir, file_name)
+        self.journal_path = self.file_path + ".journal"
+        self.model = model
+        self.key = key
+        self.indent = indent
+        # (version, items) is swapped as a single tuple; inserts and updates also change
+        # items in place, while deletes swap in a copy (see _apply_committed())
+        self._state: Tuple[int, List[ModelT]] = (0, [])
+        # Key -> index of its first item in _state's list, maintained by writers under _lock
+        self._positions: Dict[Any, int] = {}
+        self._stamp: Optional[Tuple[int, int]] = None
+        self._journal_offset = 0
+        self._journal_entries = 0
+        self.listeners: List[ChangeListener] = []
+        self._lock = threading.RLock()
+        self._file_lock = FileLock(self.file_path)
+        # Group commit state, see _submit()
+        self._pending: List[_PendingWrite] = []
+        self._committing = False
+        self._commit_cond = threading.Condition()
+
+    @property
+    def version(self) -> int:
+        """Incremented every time the cached contents change."""
+        return self._state[0]
+
+    @property
+    def lock(self) -> threading.RLock:
+        """Held while the cached list changes; see snapshot()."""
+        return self._lock
+
+    @property
+    def pending_journal_entries(self) -> int:
+        """Number of journal entries not yet compacted into the JSON file."""
+        return self._journal_entries
+
+    def _file_stamp(self) -> Tuple[int, int]:
+        stat = os.stat(self.file_path)
+        return stat.st_mtime_ns, stat.st_size
+
+    def _journal_size(self) -> int:
+        try:
+            return os.stat(self.journal_path).st_size
+        except FileNotFoundError:
+            return 0
+
+    def subscribe(self, listener: ChangeListener):
+        """Registers a listener called as listener(previous_version, version, changes) after writes."""
+        self.listeners.append(listener)
+
+    def _publish(self, previous_version: int, changes: List[Change]):
+        for listener in self.listeners:
+            listener(previous_version, self.version, changes)
+
+    def _index(self, items: List[ModelT]):
+        """Rebuilds the key -> position map for `items`."""
+        positions: Dict[Any, int] = {}
+        for index, item in enumerate(items):
+            positions.setdefault(getattr(item, self.key), index)
+        self._positions = positions
+
+    def _apply(self, items: List[ModelT], entry: Dict[str, Any]) -> Change:
+        """
+        Applies one journal entry to `items` in place, keeping the position map
+        in step. Returns the (old, new) pair it changed. Inserts and updates are
+        O(1); a delete shifts the items after it, as the list deletion does.
+        """
+        key = entry["key"]
+        positions = self._positions
+        index = positions.get(key)
+        old = None if index is None else items[index]
+        if entry["op"] == "delete":
+            if index is not None:
+                del items[index]
+                del positions[key]
+                # Backwards, so a duplicate key keeps its first position
+                for position in range(len(items) - 1, index - 1, -1):
+                    moved = getattr(items[position], self.key)
+                    if positions.get(moved, position) >= index:
+                        positions[moved] = position
+            return old, None
+        item = self.model(**entry["item"])
+        if index is None:
+            positions[key] = len(items)
+            items.append(item)
+        else:
+            items[index] = item
+        return old, item
+
+    def _apply_committed(self, entries: List[Dict[str, Any]]):
+        """
+        Applies journal entries that are already durable to the cached list and
+        publishes them. Caller holds _lock.
+
+        Inserts and updates change the shared list in place, so readers see
+        either the old or the new item; a delete would shift items under a
+        reader that is iterating, so it is applied to a copy instead.
+        """
+        items = self._state[1]
+        if any(entry["op"] == "delete" for entry in entries):
+            items = list(items)
+        changes = [self._apply(items, entry) for entry in entries]
+        previous_version = self.version
+        self._state = (previous_version + 1, items)
+        self._publish(previous_version, changes)
+
+    def _read_journal(self) -> List[Dict[str, Any]]:
+        """Returns the journal entries after the current offset, stopping at any partially written line."""
+        try:
+            with open(self.journal_path, "rb") as f:
+                f.seek(self._journal_offset)
+                tail = f.read()
+        except FileNotFoundError:
+            return []
+        complete = tail[: tail.rfind(b"\n") + 1]
+        entries = [json.loads(line) for line in complete.splitlines() if line.strip()]
+        self._journal_entries += len(entries)
+        self._journal_offset += len(complete)
+        return entries
+
+    def _load(self, stamp: Tuple[int, int]):
+        with open(self.file_path, "r") as f:
+            rows = json.load(f)
+        self._journal_offset = 0
+        self._journal_entries = 0
+        items = [self.model(**row) for row in rows]
+        self._index(items)
+        for entry in self._read_journal():
+            self._apply(items, entry)
+        self._state = (self.version + 1, items)
+        self._stamp = stamp
+
+    def snapshot(self) -> Tuple[int, List[ModelT]]:
+        """
+        Returns the current (version, models) pair, reloading if the file changed on disk.
+        The returned list is shared and must not be mutated by callers. Writes may
+        add or replace items in it; to read it consistently with its version (e.g.
+        to rebuild data kept up to date by a listener), hold `lock`.
+        Raises FileNotFoundError or json.JSONDecodeError like a plain json.load would.
+        """
+        stamp = self._file_stamp()
+        journal_size = self._journal_size()
+        if stamp != self._stamp or journal_size != self._journal_offset:
+            with self._lock:
+                stamp = self._file_stamp()
+                journal_size = self._journal_size()
+                if stamp != self._stamp or journal_size < self._journal_offset:
+                    self._load(stamp)
+                elif journal_size != self._journal_offset:
+                    # Another process appended to the journal; only replay the new entries
+                    self._apply_committed(self._read_journal())
+        return self._state
+
+    def all(self) -> List[ModelT]:
+        """Returns the cached models. See snapshot()."""
+        return self.snapshot()[1]
+
+    def cached(self) -> Tuple[int, List[ModelT]]:
+        """
+        Returns the (version, models) pair as of the last sync with the file,
+        loading it on first use, without taking a lock or touching the disk. Code
+        on the event loop reads this after aio.ready(), so a writer waiting on
+        another worker's file lock never stalls it.
+        """
+        if self._stamp is None:
+            return self.snapshot()
+        return self._state
+
+    def is_fresh(self) -> bool:
+        """True if snapshot() would be served from memory without reading the file or journal."""
+        try:
+            return self._stamp == self._file_stamp() and self._journal_size() == self._journal_offset
+        except OSError:
+            return False
+
+    def refresh(self):
+        self.snapshot()
+
+    def _write_snapshot(self, items: List[ModelT], changed: bool = True):
+        """
+        Atomically replaces the JSON file with `items` and empties the journal. Caller holds both locks.
+        Pass changed=False when `items` is the current contents, so the version (and derived data) is kept.
+        """
+        atomic_write(self.file_path, json.dumps([item.model_dump() for item in items], indent=self.indent, default=str))
+        if os.path.exists(self.journal_path):
+            os.truncate(self.journal_path, 0)
+        if changed:
+            self._state = (self.version + 1, list(items))
+            self._index(self._state[1])
+        self._stamp = self._file_stamp()
+        self._journal_offset = 0
+        self._journal_entries = 0
+
+    def save(self, items: List[ModelT]):
+        """Writes the whole collection to its JSON file, empties the journal and refreshes the cache."""
+        with self._lock, self._file_lock:
+            self._write_snapshot(items)
+
+    def _append(self, entries: List[Dict[str, Any]]):
+        """Makes `entries` durable with one journal append and fsync, then applies them. Caller holds both locks."""
+        data = "".join(json.dumps(entry) + "\n" for entry in entries).encode()
+        with open(self.journal_path, "ab") as f:
+            if f.tell() > self._journal_offset:
+                # A writer died mid-append; snapshot() read every complete line, so drop the partial one
+                f.truncate(self._journal_offset)
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+            self._journal_offset = f.tell()
+        self._journal_entries += len(entries)
+        self._apply_committed(entries)
+
+    def _commit(self, batch: List["_PendingWrite"]):
+        """
+        Applies a batch of pending writes under the inter-process lock and makes
+        them durable with a single journal append and fsync.
+        """
+        with self._lock, self._file_lock:
+            # Pick up anything other workers appended before we took the lock
+            self.snapshot()
+            accepted: List[Dict[str, Any]] = []
+            # Whether each key written by this batch exists once the accepted entries are applied
+            exists_after: Dict[Any, bool] = {}
+            for write in batch:
+                entries = write.entries
+                if write.condition is not None and accepted:
+                    # Conditions read the collection and its listeners, so commit the batch so far first
+                    self._append(accepted)
+                    accepted = []
+                key = entries[0]["key"]
+                exists = exists_after.get(key, key in self._positions)
+                if (entries[0]["op"] != "insert" and not exists) or (write.must_be_new and exists):
+                    write.result = False
+                    continue
+                if write.condition is not None and not write.condition():
+                    write.result = False
+                    continue
+                for entry in entries:
+                    accepted.append(entry)
+                    exists_after[entry["key"]] = entry["op"] != "delete"
+                write.result = True
+            if accepted:
+                self._append(accepted)
+
+    def _submit(
+        self,
+        entries: List[Dict[str, Any]],
+        must_be_new: bool = False,
+        condition: Optional[Callable[[], bool]] = None,
+    ) -> bool:
+        """
+        Queues a write and waits for it to be committed (group commit).
+
+        The first writer to arrive while no commit is running becomes the leader
+        and commits everything queued so far in one batch; writers arriving during
+        that commit queue up and are committed together by the next leader, so one
+        lock acquisition and fsync is shared by all concurrent writes.
+        """
+        write = _PendingWrite(entries, must_be_new, condition)
+        with self._commit_cond:
+            self._pending.append(write)
+            while not write.done and self._committing:
+                self._commit_cond.wait()
+            if write.done:
+                if write.error:
+                    raise write.error
+                return write.result
+            self._committing = True
+            batch, self._pending = self._pending, []
+        error = None
+        try:
+            self._commit(batch)
+        except Exception as e:
+            error = e
+        finally:
+            with self._commit_cond:
+                for pending in batch:
+                    pending.error = error
+                    pending.done = True
+                self._committing = False
+                self._commit_cond.notify_all()
+        if error:
+            raise error
+        return write.result
+
+    def compact(self) -> bool:
+        """Folds pending journal entries into the JSON file. Returns True if there were any."""
+        with self._lock, self._file_lock:
+            items = self.all()
+            if not self._journal_entries:
+                return False
+            self._write_snapshot(items, changed=False)
+            return True
+
+    def insert(self, item: ModelT):
+        """Appends a single item to the collection. Raises KeyError if an item with the same key exists."""
+        if not self.insert_new(item):
+            raise KeyError(f"{self.model.__name__} {getattr(item, self.key)!r} already exists")
+
+    def insert_new(self, item: ModelT) -> bool:
+        """Inserts `item` unless an item with the same key exists. Returns False if one does."""
+        entry = {"op": "insert", "key": getattr(item, self.key), "item": item.model_dump(mode="json")}
+        return self._submit([entry], must_be_new=True)
+
+    def insert_if(self, item: ModelT, condition: Callable[[], bool]) -> bool:
+        """
+        Inserts `item` if no item has its key and condition() holds. The condition
+        is evaluated under the inter-process write lock, once the collection and
+        its listeners reflect every earlier write, so check-then-insert is atomic
+        across workers. Returns False if the key exists or the condition did not hold.
+        """
+        entry = {"op": "insert", "key": getattr(item, self.key), "item": item.model_dump(mode="json")}
+        return self._submit([entry], must_be_new=True, condition=condition)
+
+    def update(self, key: Any, item: ModelT) -> bool:
+        """Replaces the item whose key field equals `key`. Returns False if there is none."""
+        new_key = getattr(item, self.key)
+        if new_key != key:
+            # The record is being re-keyed; drop the old entry and insert the new one
+            return self._submit([
+                {"op": "delete", "key": key},
+                {"op": "insert", "key": new_key, "item": item.model_dump(mode="json")},
+            ])
+        return self._submit([{"op": "update", "key": key, "item": item.model_dump(mode="json")}])
+
+    def delete(self, key: Any) -> bool:
+        """Removes the item whose key field equals `key`. Returns False if there is none."""
+        return self._submit([{"op": "delete", "key": key}])
+
+    @staticmethod
+    def _matching(items: List[ModelT], filters: Dict[str, Any]) -> List[ModelT]:
+        return [item for item in items if all(getattr(item, field) == value for field, value in filters.items())]
+
+    def find(self, **filters: Any) -> List[ModelT]:
+        """Returns the items whose fields equal all of the given values."""
+        return self._matching(self.all(), filters)
+
+    async def afind(self, **filters: Any) -> List[ModelT]:
+        await ready(self)
+        return self._matching(self.cached()[1], filters)
+
+
+Collection = Union[JsonCollection, SqliteCollection]
+
+
+class CollectionSpec(NamedTuple):
+    file_name: str
+    model: Type[BaseModel]
+    key: str
+    # Fields that get a secondary index when the collection is stored in SQLite
+    indexed: Tuple[Tuple[str, ...], ...] = ()
+    indent: int = 2
+
+    @property
+    def table(self) -> str:
+        return os.path.splitext(self.file_name)[0]
+
+
+COLLECTION_SPECS: Dict[str, CollectionSpec] = {
+    spec.table: spec
+    for spec in (
+        CollectionSpec("users.json", User, "user_id"),
+        CollectionSpec("accounts.json", Account, "account_id", indexed=(("user_id",),), indent=4),
+        CollectionSpec(
+            "transactions.json", Transaction, "transaction_id",
+            indexed=(("account_id", "date"), ("date",)),
+        ),
+        CollectionSpec("life_goals.json", LifeGoal, "goal_id", indexed=(("user_id",),)),
+        CollectionSpec("schedule.json", Schedule, "schedule_id", indexed=(("user_id",),), indent=4),
+        CollectionSpec("meetings.json", Meeting, "meeting_id", indexed=(("user_id",), ("advisor_name", "meeting_time"))),
+        CollectionSpec("advisors.json", Advisor, "advisor_id"),
+        CollectionSpec("bank_partners.json", BankPartner, "partner_id", indexed=(("merchant_id",),)),
+    )
+}
+
+
+def _open_collection(table: str) -> Collection:
+    spec = COLLECTION_SPECS[table]
+    if STORAGE_BACKEND == "sqlite":
+        return SqliteCollection(SQLITE_PATH, spec.table, spec.model, spec.key, spec.indexed)
+    return JsonCollection(spec.file_name, spec.model, spec.key, indent=spec.indent)
+
+
+users: Collection = _open_collection("users")
+accounts: Collection = _open_collection("accounts")
+transactions: Collection = _open_collection("transactions")
+goals: Collection = _open_collection("life_goals")
+schedules: Collection = _open_collection("schedule")
+meetings: Collection = _open_collection("meetings")
+advisors: Collection = _open_collection("advisors")
+partners: Collection = _open_collection("bank_partners")
+
+
+class JournalCompactor(threading.Thread):
+    """Background thread that periodically folds each JSON collection's journal back into its file."""
+
+    def __init__(self, collections: List[JsonCollection], interval: float):
+        super().__init__(name="journal-compactor", daemon=True)
+        self.collections = collections
+        self.interval = interval
+        self._stopped = threading.Event()
+
+    def run(self):
+        while not self._stopped.wait(self.interval):
+            self.compact_all()
+
+    def compact_all(self):
+        for collection in self.collections:
+            try:
+                collection.compact()
+            except (FileNotFoundError, json.JSONDecodeError):
+                continue
+
+    def stop(self):
+        """Stops the thread after a final compaction."""
+        self._stopped.set()
+        self.join()
+        self.compact_all()
+
+
+def start_compactor(interval: float = JOURNAL_COMPACT_INTERVAL) -> Optional[JournalCompactor]:
+    """Starts journal compaction for the JSON backend. Returns None when nothing needs compacting."""
+    collections = [
+        collection
+        for collection in (users, accounts, transactions, goals, schedules, meetings, advisors, partners)
+        if isinstance(collection, JsonCollection)
+    ]
+    if not collections:
+        return None
+    compactor = JournalCompactor(collections, interval)
+    compactor.start()
+    return compactor
@@ -0,0 +1,72 @@
+# app/core/sequences.py
+
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from core import repository
+from core.repository import Collection
+from core.sqlite_store import Change
+
+
+def split_key(key: str) -> Optional[Tuple[str, int]]:
+    """Splits a key such as acc-mw-i-002 into its prefix and number ("acc-mw-i-", 2)."""
+    prefix, dash, number = key.rpartition("-")
+    if not dash or not number.isdigit():
+        return None
+    return prefix + dash, int(number)
+
+
+class KeySequences:
+    """
+    The highest number in use after each key prefix of a collection, so the
+    next key for a prefix is allocated in O(1) instead of scanning every key.
+
+    Counters are rebuilt from the existing keys on first use and whenever the
+    collection is reloaded, and advanced in place by inserts published through
+    its change listener. allocate() hands out each number once per process;
+    callers insert with insert_new() and allocate again if another worker
+    committed the same key first.
+    """
+
+    def __init__(self, collection: Collection):
+        self.collection = collection
+        self._highest: Dict[str, int] = {}
+        self._version: Optional[int] = None
+        self._lock = threading.Lock()
+        collection.subscribe(self._on_change)
+
+    def _advance(self, key: str):
+        parts = split_key(key)
+        if parts is not None:
+            prefix, number = parts
+            if number > self._highest.get(prefix, 0):
+                self._highest[prefix] = number
+
+    def _rebuild(self, version: int, items: List):
+        # Numbers handed out but not yet committed are kept; deletes never lower a counter
+        for item in items:
+            self._advance(getattr(item, self.collection.key))
+        self._version = version
+
+    def _on_change(self, previous_version: int, version: int, changes: List[Change]):
+        with self._lock:
+            if self._version != previous_version:
+                # We were already stale; the next allocation rebuilds
+                return
+            for _, new in changes:
+                if new is not None:
+                    self._advance(getattr(new, self.collection.key))
+            self._version = version
+
+    def allocate(self, prefix: str) -> int:
+        """Returns the next unused number after `prefix`, starting at 1."""
+        version, items = self.collection.cached()
+        with self._lock:
+            if version != self._version:
+                self._rebuild(version, items)
+            number = self._highest.get(prefix, 0) + 1
+            self._highest[prefix] = number
+            return number
+
+
+account_sequences = KeySequences(repository.accounts)
@@ -0,0 +1,495 @@
+# app/core/sqlite_store.py
+
+import argparse
+import datetime
+import json
+import os
+import sqlite3
+import threading
+import typing
+from typing import Any, Callable, Dict, Generic, List, Optional, Sequence, Tuple, Type, TypeVar
+
+from pydantic import BaseModel
+
+from core.aio import AsyncCollectionMixin
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+# An (old, new) pair describing one record written through a collection: old is
+# None for inserts and new is None for deletes.
+Change = Tuple[Optional[BaseModel], Optional[BaseModel]]
+# Called with (previous_version, version, changes) when a write moves a collection
+# from previous_version to version. Reloads from storage are not published;
+# listeners notice the version jump and rebuild instead.
+ChangeListener = Callable[[int, int, List[Change]], None]
+
+_SQL_TYPES = {str: "TEXT", int: "INTEGER", float: "REAL", bool: "INTEGER", datetime.datetime: "TEXT"}
+
+
+def _column_type(annotation: Any) -> Optional[str]:
+    """Returns the SQLite type for a scalar field, or None for fields stored as JSON text."""
+    if typing.get_origin(annotation) is typing.Union:
+        args = [arg for arg in typing.get_args(annotation) if arg is not type(None)]
+        if len(args) != 1:
+            return None
+        annotation = args[0]
+    return _SQL_TYPES.get(annotation)
+
+
+def connect(db_path: str) -> sqlite3.Connection:
+    connection = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("PRAGMA synchronous=NORMAL")
+    # Wait for other workers' write transactions instead of failing with "database is locked"
+    connection.execute("PRAGMA busy_timeout=10000")
+    return connection
+
+
+# Every write to a collection's table is logged here by triggers as (seq, table,
+# key), so other workers can re-read just the rows that changed; a NULL key means
+# the whole table was replaced. Rows older than CHANGE_LOG_RETENTION are pruned,
+# and a worker that has fallen behind the pruned point reloads its tables.
+CHANGE_LOG = "_changes"
+CHANGE_LOG_RETENTION = 100_000
+_CHANGE_LOG_PRUNE_EVERY = 1_000
+# Rows fetched per "key IN (...)" query, below SQLite's bound parameter limit
+_FETCH_CHUNK = 500
+
+
+def _column_default(info: Any) -> str:
+    """Returns the DEFAULT clause for a field's scalar default, or "" if it has none (NULL)."""
+    default = info.get_default()
+    if isinstance(default, bool):
+        return f" DEFAULT {int(default)}"
+    if isinstance(default, (int, float)):
+        return f" DEFAULT {default!r}"
+    if isinstance(default, str):
+        return " DEFAULT '{}'".format(default.replace("'", "''"))
+    return ""
+
+
+def create_change_log(connection: sqlite3.Connection):
+    connection.execute(
+        f"CREATE TABLE IF NOT EXISTS {CHANGE_LOG} (seq INTEGER PRIMARY KEY AUTOINCREMENT, tbl TEXT NOT NULL, key)"
+    )
+    connection.execute(f"CREATE INDEX IF NOT EXISTS idx_{CHANGE_LOG}_tbl_seq ON {CHANGE_LOG} (tbl, seq)")
+    connection.execute(
+        f"CREATE TABLE IF NOT EXISTS {CHANGE_LOG}_pruned (id INTEGER PRIMARY KEY CHECK (id = 0), seq INTEGER NOT NULL)"
+    )
+    connection.execute(f"INSERT OR IGNORE INTO {CHANGE_LOG}_pruned VALUES (0, 0)")
+
+
+def _last_change(connection: sqlite3.Connection) -> int:
+    return connection.execute(f"SELECT COALESCE(MAX(seq), 0) FROM {CHANGE_LOG}").fetchone()[0]
+
+
+class SqliteCollection(AsyncCollectionMixin, Generic[ModelT]):
+    """
+    A table in the SQLite database exposing the same interface as JsonCollection.
+
+    Each model field becomes a column; lists and nested models are stored as JSON
+    text. Writes are single-row statements applied to the in-memory copy in place.
+    The full table is kept in memory for the derived indexes; when another
+    connection (e.g. another gunicorn worker) has committed, as reported by PRAGMA
+    data_version, only the rows named in the change log since the last sync are
+    re-read.
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        table: str,
+        model: Type[ModelT],
+        key: str,
+        indexed: Sequence[Tuple[str, ...]] = (),
+    ):
+        self.db_path = db_path
+        self.table = table
+        self.model = model
+        self.key = key
+        self.indexed = indexed
+        self.fields = list(model.model_fields)
+        self.json_fields = {name for name, info in model.model_fields.items() if _column_type(info.annotation) is None}
+        self._state: Tuple[int, List[ModelT]] = (0, [])
+        self._positions: Dict[Any, int] = {}
+        self._data_version: Optional[int] = None
+        # Change log position the cached list reflects; None until the first load
+        self._change_seq: Optional[int] = None
+        self._connection: Optional[sqlite3.Connection] = None
+        self.listeners: List[ChangeListener] = []
+        self._lock = threading.RLock()
+
+    @property
+    def version(self) -> int:
+        """Incremented every time the cached contents change."""
+        return self._state[0]
+
+    @property
+    def lock(self) -> threading.RLock:
+        """Held while the cached list changes; see snapshot()."""
+        return self._lock
+
+    def subscribe(self, listener: ChangeListener):
+        """Registers a listener called as listener(previous_version, version, changes) after writes."""
+        self.listeners.append(listener)
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        if self._connection is None:
+            with self._lock:
+                if self._connection is None:
+                    connection = connect(self.db_path)
+                    self.create_table(connection)
+                    self._connection = connection
+        return self._connection
+
+    def create_table(self, connection: sqlite3.Connection):
+        """
+        Creates the table, its indexes and change log triggers if missing. A table
+        created by an older model gains the missing fields' columns, filled with
+        the field's default where it is a scalar and NULL otherwise.
+        """
+        columns = []
+        for name, info in self.model.model_fields.items():
+            column = f"{name} {_column_type(info.annotation) or 'TEXT'}"
+            if name == self.key:
+                column += " PRIMARY KEY"
+            columns.append(column)
+        with connection:
+            # One worker at a time, so two don't both add the same column
+            connection.execute("BEGIN IMMEDIATE")
+            connection.execute(f"CREATE TABLE IF NOT EXISTS {self.table} ({', '.join(columns)})")
+            existing = {row[1] for row in connection.execute(f"PRAGMA table_info({self.table})")}
+            for name, info in self.model.model_fields.items():
+                if name not in existing:
+                    column_type = _column_type(info.annotation) or "TEXT"
+                    connection.execute(
+                        f"ALTER TABLE {self.table} ADD COLUMN {name} {column_type}{_column_default(info)}"
+                    )
+            for fields in self.indexed:
+                index_name = f"idx_{self.table}_{'_'.join(fields)}"
+                connection.execute(f"CREATE INDEX IF NOT EXISTS {index_name} ON {self.table} ({', '.join(fields)})")
+            create_change_log(connection)
+            self._create_triggers(connection)
+
+    def _create_triggers(self, connection: sqlite3.Connection):
+        log = f"INSERT INTO {CHANGE_LOG} (tbl, key) VALUES"
+        table, key = self.table, self.key
+        connection.execute(
+            f"CREATE TRIGGER IF NOT EXISTS {table}_log_insert AFTER INSERT ON {table} "
+            f"BEGIN {log} ('{table}', NEW.{key}); END"
+        )
+        connection.execute(
+            f"CREATE TRIGGER IF NOT EXISTS {table}_log_update AFTER UPDATE ON {table} "
+            f"BEGIN {log} ('{table}', OLD.{key}), ('{table}', NEW.{key}); END"
+        )
+        connection.execute(
+            f"CREATE TRIGGER IF NOT EXISTS {table}_log_delete AFTER DELETE ON {table} "
+            f"BEGIN {log} ('{table}', OLD.{key}); END"
+        )
+
+    def replace_rows(self, connection: sqlite3.Connection, rows: List[List[Any]]):
+        """
+        Replaces the table's contents with `rows` inside the caller's write
+        transaction. The triggers are dropped meanwhile, so the change log gets a
+        single entry telling other workers to reload the table.
+        """
+        placeholders = ", ".join("?" for _ in self.fields)
+        for operation in ("insert", "update", "delete"):
+            connection.execute(f"DROP TRIGGER IF EXISTS {self.table}_log_{operation}")
+        connection.execute(f"DELETE FROM {self.table}")
+        connection.executemany(
+            f"INSERT INTO {self.table} ({', '.join(self.fields)}) VALUES ({placeholders})",
+            rows,
+        )
+        self._create_triggers(connection)
+        connection.execute(f"INSERT INTO {CHANGE_LOG} (tbl, key) VALUES (?, NULL)", (self.table,))
+
+    def to_row(self, item: ModelT) -> List[Any]:
+        data = item.model_dump(mode="json")
+        return [
+            json.dumps(data[name]) if name in self.json_fields and data[name] is not None else data[name]
+            for name in self.fields
+        ]
+
+    def from_row(self, row: Sequence[Any]) -> ModelT:
+        data: Dict[str, Any] = {}
+        for name, value in zip(self.fields, row):
+            data[name] = json.loads(value) if name in self.json_fields and value is not None else value
+        return self.model(**data)
+
+    def _select(self, where: str = "", params: Sequence[Any] = ()) -> List[ModelT]:
+        sql = f"SELECT {', '.join(self.fields)} FROM {self.table} {where} ORDER BY rowid"
+        return [self.from_row(row) for row in self.connection.execute(sql, params)]
+
+    def _select_keys(self, keys: List[Any]) -> Dict[Any, ModelT]:
+        """Returns the current rows for `keys`, by key; keys without a row are left out."""
+        rows: Dict[Any, ModelT] = {}
+        for start in range(0, len(keys), _FETCH_CHUNK):
+            chunk = keys[start:start + _FETCH_CHUNK]
+            where = f"WHERE {self.key} IN ({', '.join('?' for _ in chunk)})"
+            for item in self._select(where, chunk):
+                rows[getattr(item, self.key)] = item
+        return rows
+
+    def _index(self, items: List[ModelT]):
+        """Rebuilds the key -> position map for `items`."""
+        self._positions = {getattr(item, self.key): index for index, item in enumerate(items)}
+
+    def _apply(self, items: List[ModelT], key: Any, item: Optional[ModelT]) -> Change:
+        """
+        Sets the row for `key` in `items` to `item`, or removes it if `item` is
+        None, keeping the position map in step. Returns the (old, new) pair it
+        changed. Inserts and updates are O(1); a delete shifts the items after it,
+        as the list deletion does.
+        """
+        positions = self._positions
+        index = positions.get(key)
+        old = None if index is None else items[index]
+        if item is None:
+            if index is not None:
+                del items[index]
+                del positions[key]
+                for position in range(index, len(items)):
+                    positions[getattr(items[position], self.key)] = position
+            return old, None
+        if index is None:
+            positions[key] = len(items)
+            items.append(item)
+        else:
+            items[index] = item
+        return old, item
+
+    def _apply_committed(self, rows: List[Tuple[Any, Optional[ModelT]]], change_seq: int):
+        """
+        Applies committed (key, row) pairs to the cached list, a None row meaning
+        the key was deleted, and publishes them. Caller holds _lock.
+
+        Inserts and updates change the shared list in place, so readers see
+        either the old or the new item; a delete would shift items under a
+        reader that is iterating, so it is applied to a copy instead.
+        """
+        self._change_seq = change_seq
+        items = self._state[1]
+        if any(item is None for _, item in rows):
+            items = list(items)
+        changes = [self._apply(items, key, item) for key, item in rows]
+        changes = [change for change in changes if change != (None, None)]
+        if not changes:
+            return
+        previous_version = self.version
+        self._state = (previous_version + 1, items)
+        for listener in self.listeners:
+            listener(previous_version, self.version, changes)
+
+    def _reload(self, change_seq: int):
+        items = self._select()
+        self._index(items)
+        self._state = (self.version + 1, items)
+        self._change_seq = change_seq
+
+    def _catch_up(self, connection: sqlite3.Connection):
+        """
+        Brings the cached list up to date with other connections' commits, inside
+        the caller's transaction. Caller holds _lock.
+        """
+        change_seq = _last_change(connection)
+        pruned = connection.execute(f"SELECT seq FROM {CHANGE_LOG}_pruned").fetchone()[0]
+        if self._change_seq is None or self._change_seq < pruned:
+            self._reload(change_seq)
+            return
+        keys = [
+            key
+            for (key,) in connection.execute(
+                f"SELECT key FROM {CHANGE_LOG} WHERE tbl = ? AND seq > ? ORDER BY seq",
+                (self.table, self._change_seq),
+            )
+        ]
+        if None in keys:
+            self._reload(change_seq)
+            return
+        keys = list(dict.fromkeys(keys))
+        current = self._select_keys(keys)
+        self._apply_committed([(key, current.get(key)) for key in keys], change_seq)
+
+    def snapshot(self) -> Tuple[int, List[ModelT]]:
+        """
+        Returns the current (version, models) pair, first applying the rows other
+        connections have changed since the last call. The returned list must not be
+        mutated.
+        """
+        with self._lock:
+            connection = self.connection
+            data_version = connection.execute("PRAGMA data_version").fetchone()[0]
+            if data_version != self._data_version:
+                if connection.in_transaction:
+                    self._catch_up(connection)
+                else:
+                    with connection:
+                        # One read transaction, so the change log and the rows agree
+                        connection.execute("BEGIN")
+                        self._catch_up(connection)
+                self._data_version = data_version
+            return self._state
+
+    def all(self) -> List[ModelT]:
+        """Returns the cached models. See snapshot()."""
+        return self.snapshot()[1]
+
+    def cached(self) -> Tuple[int, List[ModelT]]:
+        """
+        Returns the (version, models) pair as of the last sync with the database,
+        loading it on first use, without taking a lock or touching the connection.
+        Code on the event loop reads this after aio.ready(), so a writer waiting
+        in BEGIN IMMEDIATE never stalls it.
+        """
+        if self._change_seq is None:
+            return self.snapshot()
+        return self._state
+
+    def is_fresh(self) -> bool:
+        """True if snapshot() would be served from memory; never waits for a writer."""
+        if self._connection is None or not self._lock.acquire(blocking=False):
+            return False
+        try:
+            return self._connection.execute("PRAGMA data_version").fetchone()[0] == self._data_version
+        finally:
+            self._lock.release()
+
+    def refresh(self):
+        self.snapshot()
+
+    def _write(
+        self,
+        sql: str,
+        params: Sequence[Any],
+        rows: List[Tuple[Any, Optional[ModelT]]],
+        condition: Optional[Callable[[], bool]] = None,
+    ) -> bool:
+        """
+        Runs one write statement and applies `rows` to the cached list if it
+        changed anything. Returns False if it did not or `condition` failed.
+        """
+        with self._lock:
+            connection = self.connection
+            with connection:
+                connection.execute("BEGIN IMMEDIATE")
+                # Sync with other writers first so the in-memory copy stays a faithful mirror
+                self.snapshot()
+                if condition is not None and not condition():
+                    return False
+                if connection.execute(sql, params).rowcount == 0:
+                    return False
+                change_seq = _last_change(connection)
+                if change_seq // _CHANGE_LOG_PRUNE_EVERY > self._change_seq // _CHANGE_LOG_PRUNE_EVERY:
+                    self._prune(connection, change_seq - CHANGE_LOG_RETENTION)
+            self._apply_committed(rows, change_seq)
+            return True
+
+    def _prune(self, connection: sqlite3.Connection, before: int):
+        if before > 0:
+            connection.execute(f"DELETE FROM {CHANGE_LOG} WHERE seq <= ?", (before,))
+            connection.execute(f"UPDATE {CHANGE_LOG}_pruned SET seq = MAX(seq, ?)", (before,))
+
+    def save(self, items: List[ModelT]):
+        """Replaces the whole table with `items`."""
+        with self._lock:
+            self.snapshot()
+            connection = self.connection
+            with connection:
+                connection.execute("BEGIN IMMEDIATE")
+                self.replace_rows(connection, [self.to_row(item) for item in items])
+                change_seq = _last_change(connection)
+            items = list(items)
+            self._index(items)
+            self._state = (self.version + 1, items)
+            self._change_seq = change_seq
+
+    def _insert_sql(self) -> str:
+        placeholders = ", ".join("?" for _ in self.fields)
+        return f"INSERT OR IGNORE INTO {self.table} ({', '.join(self.fields)}) VALUES ({placeholders})"
+
+    def insert(self, item: ModelT):
+        """Inserts a single row. Raises KeyError if a row with the same key exists."""
+        if not self.insert_new(item):
+            raise KeyError(f"{self.model.__name__} {getattr(item, self.key)!r} already exists")
+
+    def insert_new(self, item: ModelT) -> bool:
+        """Inserts `item` unless a row with the same key exists. Returns False if one does."""
+        return self._write(self._insert_sql(), self.to_row(item), [(getattr(item, self.key), item)])
+
+    def insert_if(self, item: ModelT, condition: Callable[[], bool]) -> bool:
+        """
+        Inserts `item` if no row has its key and condition() holds. The condition
+        is evaluated inside the write transaction, once the in-memory copy and its
+        listeners reflect every other worker's commit, so check-then-insert is
+        atomic across workers. Returns False if the key exists or the condition
+        did not hold.
+        """
+        return self._write(self._insert_sql(), self.to_row(item), [(getattr(item, self.key), item)], condition)
+
+    def update(self, key: Any, item: ModelT) -> bool:
+        """Replaces the row whose key equals `key`. Returns False if there is none."""
+        assignments = ", ".join(f"{name} = ?" for name in self.fields)
+        new_key = getattr(item, self.key)
+        rows = [(key, item)] if new_key == key else [(key, None), (new_key, item)]
+        return self._write(f"UPDATE {self.table} SET {assignments} WHERE {self.key} = ?", [*self.to_row(item), key], rows)
+
+    def delete(self, key: Any) -> bool:
+        """Deletes the row whose key equals `key`. Returns False if there is none."""
+        return self._write(f"DELETE FROM {self.table} WHERE {self.key} = ?", [key], [(key, None)])
+
+    def find(self, **filters: Any) -> List[ModelT]:
+        """Returns the rows whose columns equal all of the given values, using the table's indexes."""
+        unknown = set(filters) - set(self.fields)
+        if unknown:
+            raise AttributeError(f"{self.model.__name__} has no field(s) {', '.join(sorted(unknown))}")
+        where = "WHERE " + " AND ".join(f"{name} = ?" for name in filters) if filters else ""
+        with self._lock:
+            return self._select(where, list(filters.values()))
+
+
+def import_json(db_path: str, data_dir: str, specs) -> Dict[str, int]:
+    """
+    Loads every collection's JSON file from `data_dir` into the SQLite database at
+    `db_path`, replacing any rows already there. Returns the row count per table.
+    """
+    counts = {}
+    connection = connect(db_path)
+    try:
+        for spec in specs:
+            collection = SqliteCollection(db_path, spec.table, spec.model, spec.key, spec.indexed)
+            collection.create_table(connection)
+            file_path = os.path.join(data_dir, spec.file_name)
+            if not os.path.exists(file_path):
+                continue
+            with open(file_path, "r") as f:
+                rows = [collection.to_row(spec.model(**row)) for row in json.load(f)]
+            with connection:
+                connection.execute("BEGIN IMMEDIATE")
+                collection.replace_rows(connection, rows)
+            counts[spec.table] = len(rows)
+    finally:
+        connection.close()
+    return counts
+
+
+def main():
+    from core.config import DATA_DIR, SQLITE_PATH
+    from core.repository import COLLECTION_SPECS
+
+    parser = argparse.ArgumentParser(description="Manage the SQLite storage backend.")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+    import_parser = subcommands.add_parser("import", help="Import db/*.json into the SQLite database.")
+    import_parser.add_argument("--data-dir", default=DATA_DIR)
+    import_parser.add_argument("--db", default=SQLITE_PATH)
+    args = parser.parse_args()
+
+    if args.command == "import":
+        counts = import_json(args.db, args.data_dir, COLLECTION_SPECS.values())
+        for table, count in counts.items():
+            print(f"{table}: {count} rows")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,36 @@
 
-from fastapi import FastAPI, HTTPException
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from api.endpoints import users, accounts, goals, transactions, financials, partners, schedule, meeting
+from fastapi.responses import StreamingResponse
+from typing import AsyncIterator
+from api.endpoints import users, accounts, goals, transactions, financials, partners, schedule, meeting, batch
+from api.responses import FastJSONResponse
+from core import http_client, repository
+from core.id_tokens import id_tokens
 from core.config import API_PREFIX
-import requests
+import httpx
 import os
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Fold the JSON write journals back into db/*.json in the background
+    compactor = repository.start_compactor()
+    # One pooled client for outbound calls to the metadata server and the A2A service
+    http_client.open_client()
+    yield
+    await http_client.close_client()
+    if compactor:
+        compactor.stop()
+
+
 app = FastAPI(
     title="Cymbal Bank API",
     description="API for the Cymbal Bank, providing access to financial data.",
     version="0.1.0",
+    lifespan=lifespan,
+    default_response_class=FastJSONResponse,
 )
 
 # CORS Middleware
@@ -19,6 +40,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],  # Allows all methods
     allow_headers=["*"],  # Allows all headers
+    expose_headers=[transactions.NEXT_CURSOR_HEADER],  # Lets the frontend read pagination cursors
 )
 
 # Include routers
@@ -30,9 +52,10 @@ app.include_router(financials.router, prefix=API_PREFIX, tags=["Financials"])
 app.include_router(partners.router, prefix=API_PREFIX, tags=["Partners"])
 app.include_router(schedule.router, prefix=API_PREFIX, tags=["Schedule"])
 app.include_router(meeting.router, prefix=API_PREFIX, tags=["Meeting"])
+app.include_router(batch.router, prefix=API_PREFIX, tags=["Batch"])
 
 @app.get("/", tags=["Root"])
-def read_root():
+async def read_root():
     """
     Root endpoint for health checks.
     """
@@ -41,69 +64,88 @@ def read_root():
 A2A_AGENT_URL = os.environ.get("A2A_AGENT_URL", "https://a2a-ep2-33wwy4ha3a-uw.a.run.app")
 
 
+SSE_MEDIA_TYPE = "text/event-stream"
+
+
+async def fetch_id_token() -> str:
+    """Returns a Google Cloud ID token for the A2A service, cached until shortly before it expires."""
+    try:
+        return await id_tokens.get(A2A_AGENT_URL)
+    except httpx.HTTPStatusError as e:
+        raise HTTPException(status_code=500, detail=f"Failed to fetch token: {e.response.status_code}")
+
+
 @app.get("/token", tags=["Authentication"])
-def get_auth_token():
+async def get_auth_token():
     """
     Get Google Cloud ID token for A2A service authentication.
     This endpoint fetches the token from the metadata server and returns it to the frontend.
     """
     try:
-        # Fetch ID token from Google Cloud metadata server
-        metadata_url = "http://metadata.google.internal/computeMetadata/v1/instance/service-accounts/default/identity"
-        params = {"audience": A2A_AGENT_URL}
-        headers = {"Metadata-Flavor": "Google"}
-
-        response = requests.get(metadata_url, params=params, headers=headers, timeout=10)
+        return {"token": await fetch_id_token(), "status": "success"}
+    except httpx.HTTPError as e:
+        raise HTTPException(status_code=500, detail=f"Error fetching token: {str(e)}")
 
-        if response.status_code == 200:
-            return {"token": response.text, "status": "success"}
-        else:
-            raise HTTPException(status_code=500, detail=f"Failed to fetch token: {response.status_code}")
 
-    except requests.exceptions.RequestException as e:
-        raise HTTPException(status_code=500, detail=f"Error fetching token: {str(e)}")
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Unexpected error: {str(e)}")
+async def relay_stream(response: httpx.Response) -> AsyncIterator[bytes]:
+    """Yields the decoded upstream body as it arrives and closes the upstream response afterwards."""
+    try:
+        async for chunk in response.aiter_bytes():
+            yield chunk
+    finally:
+        await response.aclose()
 
 
 @app.post("/proxy/a2a", tags=["Proxy"])
-async def proxy_a2a_request(request: dict):
+async def proxy_a2a_request(request: dict, http_request: Request):
     """
     Proxy requests to the A2A service with proper authentication.
     This eliminates CORS issues by handling all communication server-side.
+
+    JSON-RPC `message/stream` requests, or requests sent with
+    `Accept: text/event-stream`, are relayed as a server-sent event stream,
+    chunk by chunk as the agent produces them.
     """
+    stream = request.get("method") == "message/stream" or SSE_MEDIA_TYPE in http_request.headers.get("accept", "")
     try:
-        # Get authentication token
-        metadata_url = "http://metadata.google.internal/computeMetadata/v1/instance/service-accounts/default/identity"
-        params = {"audience": A2A_AGENT_URL}
-        headers = {"Metadata-Flavor": "Google"}
-
-        token_response = requests.get(metadata_url, params=params, headers=headers, timeout=10)
-        print(token_response)
-
-        if token_response.status_code != 200:
-            raise HTTPException(status_code=500, detail="Failed to get authentication token")
-
-        auth_token = token_response.text
-        print (auth_token)
-
-        # Forward request to A2A service
-        a2a_url = A2A_AGENT_URL
+        auth_token = await fetch_id_token()
         a2a_headers = {
             "Content-Type": "application/json",
-            "Authorization": f"Bearer {auth_token}"
+            "Authorization": f"Bearer {auth_token}",
         }
-
-        a2a_response = requests.post(a2a_url, json=request, headers=a2a_headers, timeout=30)
-        print(a2a_response.json())
-
-        if a2a_response.status_code == 200:
-            return a2a_response.json()
-        else:
-            raise HTTPException(status_code=a2a_response.status_code, detail=f"A2A service error: {a2a_response.text}")
-
-    except requests.exceptions.RequestException as e:
+        client = http_client.get_client()
+
+        if not stream:
+            a2a_response = await client.post(A2A_AGENT_URL, json=request, headers=a2a_headers)
+            if a2a_response.status_code == 401:
+                id_tokens.invalidate(A2A_AGENT_URL)
+            if a2a_response.status_code != 200:
+                raise HTTPException(status_code=a2a_response.status_code, detail=f"A2A service error: {a2a_response.text}")
+            return Response(content=a2a_response.content, media_type="application/json")
+
+        a2a_headers["Accept"] = SSE_MEDIA_TYPE
+        upstream = client.build_request(
+            "POST",
+            A2A_AGENT_URL,
+            json=request,
+            headers=a2a_headers,
+            # Events can be far apart while the agent works; only bound the connect
+            timeout=httpx.Timeout(None, connect=10.0),
+        )
+        a2a_response = await client.send(upstream, stream=True)
+        if a2a_response.status_code == 401:
+            id_tokens.invalidate(A2A_AGENT_URL)
+        if a2a_response.status_code != 200:
+            detail = (await a2a_response.aread()).decode("utf-8", errors="replace")
+            await a2a_response.aclose()
+            raise HTTPException(status_code=a2a_response.status_code, detail=f"A2A service error: {detail}")
+        return StreamingResponse(
+            relay_stream(a2a_response),
+            media_type=a2a_response.headers.get("content-type", SSE_MEDIA_TYPE),
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+
+    except HTTPException:
+        raise
+    except httpx.HTTPError as e:
         raise HTTPException(status_code=500, detail=f"Proxy error: {str(e)}")
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Unexpected error: {str(e)}")
-
@@ -1,6 +1,6 @@
 import React, { useEffect, useState } from 'react';
 import { useSearchParams } from 'react-router-dom';
-import { fetchTransactions, fetchAccounts } from '@/services/api';
+import { fetchDashboard } from '@/services/api';
 import Sidebar from '@/components/Sidebar';
 import Chatbot from '@/components/Chatbot';
 
@@ -58,12 +58,9 @@ const DashboardPage: React.FC = () => {
     if (userId) {
       const loadData = async () => {
         try {
-          const [accountsData, transactionsData] = await Promise.all([
-            fetchAccounts(userId),
-            fetchTransactions(userId),
-          ]);
-          setAccounts(accountsData);
-          setTransactions(transactionsData); // Only show 5 most recent
+          const dashboard = await fetchDashboard(userId);
+          setAccounts(Object.values(dashboard.accounts as Record<string, Account[]>).flat());
+          setTransactions(dashboard.recent_transactions);
         } catch (err) {
           setError('Failed to load data.');
         } finally {
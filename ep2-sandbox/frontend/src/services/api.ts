@@ -25,10 +25,35 @@ export const fetchUser = async (userId: string) => {
   return response.json();
 };
 
+const TRANSACTIONS_PAGE_SIZE = 500;
+
+// Fetches the last year of transactions page by page, following the
+// X-Next-Cursor header so no single response grows with account activity.
 export const fetchTransactions = async (userId: string) => {
-  const response = await fetch(`${API_URL}/users/${userId}/transactions?history=365`);
+  const transactions = [];
+  let cursor: string | null = null;
+  do {
+    const params = new URLSearchParams({ history: '365', limit: String(TRANSACTIONS_PAGE_SIZE) });
+    if (cursor) {
+      params.set('cursor', cursor);
+    }
+    const response = await fetch(`${API_URL}/users/${userId}/transactions?${params}`);
+    if (!response.ok) {
+      throw new Error('Could not fetch transactions');
+    }
+    transactions.push(...(await response.json()));
+    cursor = response.headers.get('X-Next-Cursor');
+  } while (cursor);
+  return transactions;
+};
+
+// Profile, accounts, debts, investments, net worth and the last 30 days of
+// transactions (the endpoint's default window) in a single request. The full
+// year is on the transactions page, which pages through it with fetchTransactions.
+export const fetchDashboard = async (userId: string) => {
+  const response = await fetch(`${API_URL}/users/${userId}/dashboard`);
   if (!response.ok) {
-    throw new Error('Could not fetch transactions');
+    throw new Error('Could not fetch dashboard');
   }
   return response.json();
 };
@@ -0,0 +1,51 @@
+# tests/conftest.py
+
+"""
+The app runs from backend/code and imports its packages as top-level `main`,
+`api` and `core`, while the tests import them as `backend.main`,
+`backend.core...`. Importing both names would load two copies of every module,
+each with its own collections, listeners and caches, so patches and assertions
+could hit a copy the app never uses. `backend.<name>` is therefore resolved to
+the module the app imports as `<name>`.
+"""
+
+import importlib
+import importlib.abc
+import importlib.util
+import os
+import shutil
+import sys
+import tempfile
+
+CODE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "backend", "code"))
+sys.path.insert(0, CODE_DIR)
+if "DATA_DIR" not in os.environ:
+    # Tests write through the API, so run them against a scratch copy of db/
+    os.environ["DATA_DIR"] = shutil.copytree(os.path.join(CODE_DIR, "db"), tempfile.mkdtemp(), dirs_exist_ok=True)
+
+
+class _BackendAlias(importlib.abc.MetaPathFinder, importlib.abc.Loader):
+    """Resolves `backend.<name>` imports to the already importable module `<name>`."""
+
+    def __init__(self):
+        self._specs = {}
+
+    def find_spec(self, fullname, path, target=None):
+        if fullname == "backend" or fullname.startswith("backend."):
+            return importlib.util.spec_from_loader(fullname, self, is_package=True)
+        return None
+
+    def create_module(self, spec):
+        if spec.name == "backend":
+            return None
+        module = importlib.import_module(spec.name[len("backend."):])
+        # The import system stamps the alias spec on the module; keep the real one
+        self._specs[spec.name] = module.__spec__
+        return module
+
+    def exec_module(self, module):
+        if module.__spec__.name in self._specs:
+            module.__spec__ = self._specs.pop(module.__spec__.name)
+
+
+sys.meta_path.insert(0, _BackendAlias())
@@ -16,7 +16,8 @@ client = TestClient(app)
 
 # Helper to get the absolute path for data files
 def get_data_path(filename):
-    return os.path.join(os.path.dirname(__file__), '..', 'db', filename)
+    from backend.core.config import DATA_DIR
+    return os.path.join(DATA_DIR, filename)
 
 # --- Test Data Loading ---
 @pytest.fixture(scope="module")
@@ -29,6 +30,15 @@ def db_data():
             data[key] = json.load(f)
     return data
 
+def test_backend_imports_are_the_app_modules():
+    """Test that backend.* imports resolve to the modules the app itself uses (see conftest.py)."""
+    import importlib
+    from backend.core import repository
+
+    assert repository is importlib.import_module("core.repository")
+    assert importlib.import_module("backend.core.http_client") is importlib.import_module("core.http_client")
+    assert repository.__spec__.name == "core.repository"
+
 # --- Root Endpoint Tests ---
 def test_read_root():
     """Test the health check endpoint."""
@@ -72,6 +82,42 @@ def test_get_user_accounts(db_data):
         assert "sub_type" in account
         assert "description" in account
 
+def test_get_user_dashboard_matches_individual_endpoints(db_data):
+    """Test that the dashboard returns the same data as the endpoints it replaces."""
+    user_id = "user-001"
+    response = client.get(f"/api/users/{user_id}/dashboard", params={"history": 3650})
+    assert response.status_code == 200
+    dashboard = response.json()
+
+    assert dashboard["user"] == client.get(f"/api/users/{user_id}").json()
+    assert dashboard["debts"] == client.get(f"/api/users/{user_id}/debts").json()
+    assert dashboard["investments"] == client.get(f"/api/users/{user_id}/investments").json()
+    assert dashboard["net_worth"] == client.get(f"/api/users/{user_id}/networth").json()
+    accounts = [acc for category in dashboard["accounts"].values() for acc in category]
+    assert sorted(accounts, key=lambda acc: acc["account_id"]) == sorted(
+        client.get(f"/api/users/{user_id}/accounts").json(), key=lambda acc: acc["account_id"]
+    )
+    assert all(acc["category"] == category for category, accs in dashboard["accounts"].items() for acc in accs)
+    transaction_ids = [tx["transaction_id"] for tx in dashboard["recent_transactions"]]
+    expected = client.get(f"/api/users/{user_id}/transactions", params={"history": 3650}).json()
+    assert transaction_ids == [tx["transaction_id"] for tx in expected]
+
+    assert client.get("/api/users/non-existent-user/dashboard").status_code == 404
+
+def test_dashboard_and_transactions_share_history_cutoff(db_data):
+    """Test that the dashboard and /transactions cut a `history` window at the same instant."""
+    from datetime import datetime, timezone
+    user_id = "user-001"
+    today = datetime.now(timezone.utc).date()
+    account_ids = {acc["account_id"] for acc in db_data["accounts"] if acc["user_id"] == user_id}
+    dates = {tx["date"][:10] for tx in db_data["transactions"] if tx["account_id"] in account_ids}
+    # A window reaching back to a transaction's day starts after that day's midnight
+    for history in sorted({(today - datetime.fromisoformat(date).date()).days for date in dates})[:5]:
+        dashboard = client.get(f"/api/users/{user_id}/dashboard", params={"history": history})
+        assert "ETag" not in dashboard.headers
+        transactions = client.get(f"/api/users/{user_id}/transactions", params={"history": history}).json()
+        assert dashboard.json()["recent_transactions"] == transactions
+
 # --- Transactions Endpoint Tests ---
 def test_get_user_transactions(db_data):
     """Test fetching transactions for a user."""
@@ -85,6 +131,67 @@ def test_get_user_transactions(db_data):
     for tx in response.json():
         assert tx["account_id"] in user_account_ids
 
+def test_get_user_transactions_date_window(db_data):
+    """Test fetching transactions for an explicit start/end window."""
+    user_id = "user-001"
+    user_account_ids = [acc["account_id"] for acc in db_data["accounts"] if acc["user_id"] == user_id]
+    expected = [
+        tx["transaction_id"] for tx in db_data["transactions"]
+        if tx["account_id"] in user_account_ids and "2024-01-01" <= tx["date"][:10] <= "2024-03-31"
+    ]
+
+    response = client.get(
+        f"/api/users/{user_id}/transactions",
+        params={"start": "2024-01-01T00:00:00Z", "end": "2024-03-31T23:59:59Z"},
+    )
+    assert response.status_code == 200
+    dates = [tx["date"] for tx in response.json()]
+    assert dates == sorted(dates)
+    assert sorted(tx["transaction_id"] for tx in response.json()) == sorted(expected)
+
+def test_list_responses_skip_revalidation(db_data):
+    """Test that list responses serialized from cached row JSON match the models they came from."""
+    from backend.api import responses
+    from backend.core import indexes
+
+    user_id = "user-001"
+    timeline = indexes.transaction_timeline(user_id)
+    response = client.get(f"/api/users/{user_id}/transactions", params={"history": 3650})
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/json"
+    assert response.json() == [tx.model_dump(mode="json") for tx in timeline.transactions]
+
+    tx = timeline.transactions[0]
+    assert responses.encode_model(tx) is responses.encode_model(tx)
+
+def test_get_user_transactions_pages_and_ndjson(db_data):
+    """Test that following X-Next-Cursor pages through the same rows as one unpaginated request."""
+    user_id = "user-001"
+    params = {"history": 3650}
+    expected = client.get(f"/api/users/{user_id}/transactions", params=params).json()
+
+    pages = []
+    cursor = None
+    while True:
+        page_params = {**params, "limit": 10, **({"cursor": cursor} if cursor else {})}
+        response = client.get(f"/api/users/{user_id}/transactions", params=page_params)
+        assert response.status_code == 200
+        assert len(response.json()) <= 10
+        pages.extend(response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+    assert pages == expected
+
+    response = client.get(
+        f"/api/users/{user_id}/transactions", params=params, headers={"Accept": "application/x-ndjson"}
+    )
+    assert response.headers["content-type"] == "application/x-ndjson"
+    assert [json.loads(line) for line in response.text.splitlines()] == expected
+
+    response = client.get(f"/api/users/{user_id}/transactions", params={"cursor": "not-a-cursor"})
+    assert response.status_code == 400
+
 def test_get_user_transactions_user_not_found():
     """Test fetching transactions for a non-existent user."""
     response = client.get("/api/users/non-existent-user/transactions")
@@ -129,6 +236,8 @@ def test_update_goal_success(db_data):
     finally:
         with open(goals_file_path, "w") as f:
             f.write(original_data)
+        if os.path.exists(goals_file_path + ".journal"):
+            os.remove(goals_file_path + ".journal")
 
 def test_update_goal_not_found():
     """Test updating a goal that does not exist."""
@@ -223,6 +332,38 @@ def test_get_user_cash_flow_no_recent_transactions():
     assert response.status_code == 200
     assert response.json()["cash_flow_last_30_days"] == 0
 
+def test_get_user_cash_flow_buckets(db_data):
+    """Test that the cash flow over N days is split into buckets that add up to the total."""
+    user_id = "user-001"
+    response = client.get(f"/api/users/{user_id}/cashflow", params={"days": 1000, "granularity": "month"})
+    assert response.status_code == 200
+    data = response.json()
+    assert data["days"] == 1000
+    assert "cash_flow_last_30_days" not in data
+    assert data["cash_flow"] == pytest.approx(sum(bucket["cash_flow"] for bucket in data["buckets"]))
+    assert all(bucket["start"] <= bucket["end"] for bucket in data["buckets"])
+    assert all(bucket["start"][8:] == "01" for bucket in data["buckets"][1:])
+
+    response = client.get(f"/api/users/{user_id}/cashflow", params={"granularity": "year"})
+    assert response.status_code == 422
+
+def test_daily_prefix_sums_match_rows(db_data):
+    """Test that whole-day windows answered from prefix sums match a row-by-row sum."""
+    from datetime import date
+    from backend.core import columnar
+
+    transaction_columns = columnar.transaction_columns.get()
+    user_id = "user-001"
+    account_ids = {acc["account_id"] for acc in db_data["accounts"] if acc["user_id"] == user_id}
+    for first, last in [("2024-01-01", "2024-03-31"), ("2024-02-15", "2024-02-15"), ("2023-01-01", "2030-01-01")]:
+        expected = sum(
+            tx["amount"] for tx in db_data["transactions"]
+            if tx["account_id"] in account_ids and first <= tx["date"][:10] <= last
+        )
+        first_day = (date.fromisoformat(first) - date(1970, 1, 1)).days
+        last_day = (date.fromisoformat(last) - date(1970, 1, 1)).days
+        assert transaction_columns.flow_between_days(user_id, first_day, last_day) == pytest.approx(expected)
+
 def test_get_user_average_cash_flow_success(db_data):
     """Test calculating average cash flow for a user."""
     user_id = "user-001"
@@ -231,15 +372,86 @@ def test_get_user_average_cash_flow_success(db_data):
     assert "average_monthly_cash_flow" in response.json()
     assert isinstance(response.json()["average_monthly_cash_flow"], float)
 
+# --- Conditional GET Tests ---
+@pytest.mark.parametrize("path", [
+    "/api/users/user-001",
+    "/api/users/user-001/accounts",
+    "/api/users/user-001/networth",
+    "/api/partners",
+    "/api/advisors",
+])
+def test_conditional_get_returns_304_for_matching_etag(path):
+    """Test that read endpoints return an ETag and answer a matching If-None-Match with 304."""
+    response = client.get(path)
+    assert response.status_code == 200
+    etag = response.headers["ETag"]
+    assert "Last-Modified" in response.headers
+
+    response = client.get(path, headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["ETag"] == etag
+
+    response = client.get(path, headers={"If-None-Match": '"stale"'})
+    assert response.status_code == 200
+
+def test_conditional_get_etag_depends_on_path_and_query():
+    """Test that users and query variants of a route do not share an ETag."""
+    etag = client.get("/api/users/user-001/cashflow?days=30").headers["ETag"]
+    assert client.get("/api/users/user-002/cashflow?days=30").headers["ETag"] != etag
+    assert client.get("/api/users/user-001/cashflow?days=60").headers["ETag"] != etag
+    assert client.get("/api/users/user-001/cashflow?days=30", headers={"If-None-Match": etag}).status_code == 304
+    response = client.get("/api/users/user-002/cashflow?days=30", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+
+def test_conditional_get_etag_changes_on_write(tmp_path):
+    """Test that a write through the collection changes the ETag."""
+    from backend.api.conditional import ConditionalGet
+    from backend.api.models import Holding
+    from backend.core.repository import JsonCollection
+
+    (tmp_path / "holdings.json").write_text(json.dumps([{"symbol": "AAA", "value": 1.0}]))
+    holdings = JsonCollection("holdings.json", Holding, "symbol", data_dir=str(tmp_path))
+    conditional = ConditionalGet(holdings)
+
+    etag, _ = conditional.validator()
+    assert conditional.validator()[0] == etag
+    holdings.insert(Holding(symbol="BBB", value=2.0))
+    assert conditional.validator()[0] != etag
+
+# --- Batch Endpoint Tests ---
+def test_batch_runs_sub_requests_in_order(db_data):
+    """Test that a batch returns each sub-request's status and body, in order."""
+    user_id = "user-001"
+    paths = [f"/api/users/{user_id}", f"/api/meetings/{user_id}", "/api/users/non-existent-user", f"/api/partners/user/{user_id}"]
+    response = client.post("/api/batch", json=[{"path": path} for path in paths])
+    assert response.status_code == 200
+
+    results = response.json()
+    assert len(results) == len(paths)
+    for path, result in zip(paths, results):
+        expected = client.get(path)
+        assert result["status"] == expected.status_code
+        assert result["body"] == expected.json()
+
+def test_batch_rejects_oversized_and_nested_batches():
+    """Test the batch size cap and that batches cannot contain batches."""
+    from backend.core.config import BATCH_MAX_REQUESTS
+
+    response = client.post("/api/batch", json=[{"path": "/api/users"}] * (BATCH_MAX_REQUESTS + 1))
+    assert response.status_code == 413
+    response = client.post("/api/batch", json=[{"method": "POST", "path": "/api/batch", "body": []}])
+    assert response.status_code == 422
+
 # --- Data Integrity and Error Handling Tests ---
-@patch('backend.api.endpoints.financials.load_data')
+@patch('backend.api.endpoints.financials.indexes.accounts_for_user')
 def test_financials_endpoint_file_not_found(mock_load_data):
     """Test that a 404 is raised if a data file is not found."""
     mock_load_data.side_effect = FileNotFoundError
     response = client.get("/api/users/user-001/debts")
     assert response.status_code == 404
 
-@patch('backend.api.endpoints.financials.load_data')
+@patch('backend.api.endpoints.financials.load_user_accounts')
 def test_get_debts_with_malformed_data_key_error(mock_load_data):
     """Test that the endpoint handles malformed account data with a KeyError."""
     malformed_account = {
@@ -253,3 +465,652 @@ def test_get_debts_with_malformed_data_key_error(mock_load_data):
     response = client.get("/api/users/user-001/debts")
     # A KeyError on the server should result in a 500 Internal Server Error
     assert response.status_code == 500
+
+# --- Repository Cache Tests ---
+def test_repository_caches_until_file_changes(tmp_path):
+    """Test that a collection is parsed once and reloaded only when the file changes."""
+    from backend.api.models import Holding
+    from backend.core.repository import JsonCollection
+
+    data_file = tmp_path / "holdings.json"
+    data_file.write_text(json.dumps([{"symbol": "VTI", "value": 100.0}]))
+    collection = JsonCollection("holdings.json", Holding, "symbol", data_dir=str(tmp_path))
+
+    first = collection.all()
+    assert collection.all() is first
+    assert first[0].symbol == "VTI"
+
+    data_file.write_text(json.dumps([{"symbol": "VTI", "value": 100.0}, {"symbol": "BND", "value": 50.0}]))
+    reloaded = collection.all()
+    assert [h.symbol for h in reloaded] == ["VTI", "BND"]
+
+    collection.save(reloaded[:1])
+    assert collection.all() == reloaded[:1]
+    assert json.loads(data_file.read_text()) == [{"symbol": "VTI", "value": 100.0}]
+
+def test_indexes_match_linear_scan(db_data):
+    """Test that the per-user indexes return the same rows as a full scan."""
+    from backend.core import indexes
+
+    for user in db_data["users"]:
+        user_id = user["user_id"]
+        account_ids = [acc["account_id"] for acc in db_data["accounts"] if acc["user_id"] == user_id]
+        expected_tx_ids = [tx["transaction_id"] for tx in db_data["transactions"] if tx["account_id"] in account_ids]
+
+        assert [acc.account_id for acc in indexes.accounts_for_user(user_id)] == account_ids
+        timeline = indexes.transaction_timeline(user_id)
+        assert sorted(tx.transaction_id for tx in timeline.transactions) == sorted(expected_tx_ids)
+        expected_goal_ids = [goal["goal_id"] for goal in db_data["life_goals"] if goal["user_id"] == user_id]
+        assert [goal.goal_id for goal in indexes.goals_for_user(user_id)] == expected_goal_ids
+
+def test_sqlite_import_and_row_writes(tmp_path, db_data):
+    """Test importing the JSON files into SQLite and writing single rows."""
+    from backend.api.models import LifeGoal
+    from backend.core.repository import COLLECTION_SPECS
+    from backend.core.sqlite_store import SqliteCollection, import_json
+
+    db_path = str(tmp_path / "bank.sqlite3")
+    counts = import_json(db_path, os.path.dirname(get_data_path("users.json")), COLLECTION_SPECS.values())
+    assert counts["accounts"] == len(db_data["accounts"])
+
+    spec = COLLECTION_SPECS["accounts"]
+    accounts = SqliteCollection(db_path, spec.table, spec.model, spec.key, spec.indexed)
+    assert [acc.account_id for acc in accounts.all()] == [acc["account_id"] for acc in db_data["accounts"]]
+    assert all(acc.user_id == "user-001" for acc in accounts.find(user_id="user-001"))
+
+    goals = SqliteCollection(db_path, "life_goals", LifeGoal, "goal_id", (("user_id",),))
+    goal = LifeGoal(user_id="user-001", description="Test", target_amount=10, target_date="2030-01-01", current_amount_saved=1)
+    goals.insert(goal)
+    with pytest.raises(KeyError):
+        goals.insert(goal)
+    assert goals.update(goal.goal_id, goal.model_copy(update={"description": "Updated"}))
+    assert goals.find(goal_id=goal.goal_id)[0].description == "Updated"
+    assert goals.delete(goal.goal_id)
+    assert not goals.delete(goal.goal_id)
+
+def test_sqlite_migrates_columns_and_syncs_changed_rows(tmp_path):
+    """Test that older tables gain new model fields and other connections' writes are applied row by row."""
+    import sqlite3
+    from backend.api.models import Meeting
+    from backend.core.sqlite_store import SqliteCollection
+
+    db_path = str(tmp_path / "bank.sqlite3")
+    connection = sqlite3.connect(db_path)
+    connection.execute(
+        "CREATE TABLE meetings (meeting_id TEXT PRIMARY KEY, user_id TEXT, advisor_name TEXT, advisor_type TEXT, meeting_time TEXT)"
+    )
+    connection.execute("INSERT INTO meetings VALUES ('m1', 'user-001', 'Alice', 'Mortgage', '2026-11-02T10:00:00')")
+    connection.commit()
+    connection.close()
+
+    meetings = SqliteCollection(db_path, "meetings", Meeting, "meeting_id")
+    other = SqliteCollection(db_path, "meetings", Meeting, "meeting_id")
+    [old] = meetings.all()
+    assert (old.duration_minutes, old.notes) == (60, None)
+
+    changes = []
+    meetings.subscribe(lambda previous, version, batch: changes.extend(batch))
+    added = old.model_copy(update={"meeting_id": "m2"})
+    other.insert(added)
+    assert other.update("m1", old.model_copy(update={"notes": "Bring payslips"}))
+    assert [(meeting.meeting_id, meeting.notes) for meeting in meetings.all()] == [("m1", "Bring payslips"), ("m2", None)]
+    assert changes == [(None, added), (old, meetings.all()[0])]
+
+    listed = meetings.all()
+    assert meetings.update("m2", added.model_copy(update={"duration_minutes": 30}))
+    assert listed[1].duration_minutes == 30
+    assert other.delete("m1")
+    assert [meeting.meeting_id for meeting in meetings.all()] == ["m2"]
+
+def test_journal_writes_and_compaction(tmp_path):
+    """Test that single-record writes are journaled, visible to other readers and compacted."""
+    from backend.api.models import Holding
+    from backend.core.repository import JsonCollection
+
+    data_file = tmp_path / "holdings.json"
+    data_file.write_text(json.dumps([{"symbol": "VTI", "value": 100.0}]))
+    writer = JsonCollection("holdings.json", Holding, "symbol", data_dir=str(tmp_path))
+    reader = JsonCollection("holdings.json", Holding, "symbol", data_dir=str(tmp_path))
+    assert len(reader.all()) == 1
+
+    writer.insert(Holding(symbol="BND", value=50.0))
+    assert writer.update("VTI", Holding(symbol="VTI", value=120.0))
+    assert writer.delete("BND")
+    assert not writer.delete("BND")
+
+    # The snapshot file is untouched; the journal holds one line per write
+    assert json.loads(data_file.read_text()) == [{"symbol": "VTI", "value": 100.0}]
+    assert len((tmp_path / "holdings.json.journal").read_text().splitlines()) == 3
+    assert reader.all() == [Holding(symbol="VTI", value=120.0)]
+
+    assert writer.compact()
+    assert json.loads(data_file.read_text()) == [{"symbol": "VTI", "value": 120.0}]
+    assert (tmp_path / "holdings.json.journal").read_text() == ""
+    assert reader.all() == [Holding(symbol="VTI", value=120.0)]
+
+def test_journal_writes_keep_key_positions(tmp_path):
+    """Test that writes find records through the key -> position map and deletes leave earlier lists intact."""
+    from backend.api.models import Holding
+    from backend.core.repository import JsonCollection
+
+    (tmp_path / "holdings.json").write_text(json.dumps([{"symbol": s, "value": 1.0} for s in "ABCDE"]))
+    writer = JsonCollection("holdings.json", Holding, "symbol", data_dir=str(tmp_path))
+    reader = JsonCollection("holdings.json", Holding, "symbol", data_dir=str(tmp_path))
+    listed = writer.all()
+
+    assert writer.update("D", Holding(symbol="D", value=2.0))
+    writer.insert(Holding(symbol="F", value=3.0))
+    assert writer.all() is listed  # inserts and updates are applied in place
+    assert writer.delete("B")
+    assert [h.symbol for h in listed] == ["A", "B", "C", "D", "E", "F"]
+    assert writer.update("E", Holding(symbol="G", value=4.0))
+    assert not writer.insert_new(Holding(symbol="F", value=5.0))
+    with pytest.raises(KeyError):
+        writer.insert(Holding(symbol="F", value=5.0))
+
+    expected = [("A", 1.0), ("C", 1.0), ("D", 2.0), ("F", 3.0), ("G", 4.0)]
+    for collection in (writer, reader):
+        assert [(h.symbol, h.value) for h in collection.all()] == expected
+        assert collection._positions == {symbol: i for i, (symbol, _) in enumerate(expected)}
+
+def test_journal_append_drops_torn_tail(tmp_path):
+    """Test that a partial journal line left by a crashed writer is dropped before the next append."""
+    from backend.api.models import Holding
+    from backend.core.repository import JsonCollection
+
+    (tmp_path / "holdings.json").write_text("[]")
+    writer = JsonCollection("holdings.json", Holding, "symbol", data_dir=str(tmp_path))
+    writer.insert(Holding(symbol="VTI", value=100.0))
+    with open(writer.journal_path, "ab") as f:
+        f.write(b'{"op": "insert", "key": "BN')
+
+    restarted = JsonCollection("holdings.json", Holding, "symbol", data_dir=str(tmp_path))
+    assert [h.symbol for h in restarted.all()] == ["VTI"]
+    restarted.insert(Holding(symbol="BND", value=50.0))
+    reloaded = JsonCollection("holdings.json", Holding, "symbol", data_dir=str(tmp_path))
+    assert [h.symbol for h in reloaded.all()] == ["VTI", "BND"]
+    assert [h.symbol for h in writer.all()] == ["VTI", "BND"]
+
+def test_concurrent_writes_are_group_committed(tmp_path):
+    """Test that concurrent writers all land in the journal and the file is replaced atomically."""
+    import threading
+    from backend.api.models import Holding
+    from backend.core.repository import JsonCollection
+
+    (tmp_path / "holdings.json").write_text("[]")
+    collection = JsonCollection("holdings.json", Holding, "symbol", data_dir=str(tmp_path))
+
+    def write_many(thread_id):
+        for i in range(25):
+            collection.insert(Holding(symbol=f"{thread_id}-{i}", value=float(i)))
+
+    threads = [threading.Thread(target=write_many, args=(t,)) for t in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    reader = JsonCollection("holdings.json", Holding, "symbol", data_dir=str(tmp_path))
+    assert len(reader.all()) == 200
+    assert collection.compact()
+    assert len(json.loads((tmp_path / "holdings.json").read_text())) == 200
+    assert not list(tmp_path.glob("*.tmp"))
+
+def test_columnar_aggregates_match_rows(db_data):
+    """Test that the columnar store reproduces per-user sums computed row by row."""
+    from backend.core import columnar
+
+    transaction_columns = columnar.transaction_columns.get()
+    for user in db_data["users"]:
+        user_id = user["user_id"]
+        account_ids = {acc["account_id"] for acc in db_data["accounts"] if acc["user_id"] == user_id}
+        expected_flow = sum(tx["amount"] for tx in db_data["transactions"] if tx["account_id"] in account_ids)
+
+        assert transaction_columns.net_flow(user_id) == pytest.approx(expected_flow)
+
+def test_columnar_store_follows_transaction_writes(tmp_path):
+    """Test that transaction writes update the owner's columns and daily prefix sums without a rebuild."""
+    from datetime import date
+    from backend.api.models import Account, Transaction
+    from backend.core.columnar import TransactionColumnIndex
+    from backend.core.repository import JsonCollection
+
+    def tx(transaction_id, account_id, day, amount):
+        return {"transaction_id": transaction_id, "account_id": account_id, "merchant_id": "m1",
+                "date": f"2024-01-{day:02d}T12:00:00Z", "description": "", "amount": amount, "category": "c"}
+
+    (tmp_path / "accounts.json").write_text(json.dumps([
+        {"account_id": "acc-1", "user_id": "user-001", "category": "asset", "type": "cash",
+         "sub_type": "checking", "description": "Checking", "balance": 0.0},
+    ]))
+    (tmp_path / "transactions.json").write_text(json.dumps([tx("t1", "acc-1", 10, -5.0)]))
+    accounts = JsonCollection("accounts.json", Account, "account_id", data_dir=str(tmp_path))
+    transactions = JsonCollection("transactions.json", Transaction, "transaction_id", data_dir=str(tmp_path))
+    index = TransactionColumnIndex(accounts, transactions)
+    columns = index.get()
+    jan = (date(2024, 1, 1) - date(1970, 1, 1)).days - 1  # so jan + d is January d
+
+    transactions.insert(Transaction(**tx("t2", "acc-1", 3, 20.0)))   # before the first day
+    transactions.insert(Transaction(**tx("t3", "acc-1", 25, -2.5)))  # after the last day
+    transactions.insert(Transaction(**tx("t4", "acc-2", 12, 7.0)))   # account not created yet
+    transactions.delete("t1")
+    assert index.is_fresh() and index.get() is columns
+    assert columns.flow_between_days("user-001", jan + 1, jan + 31) == 17.5
+    assert columns.flow_between_days("user-001", jan + 4, jan + 24) == 0.0
+    assert columns.bucketed_flow("user-001", [jan + 1, jan + 10, jan + 32]) == [20.0, -2.5]
+
+    accounts.insert(Account(account_id="acc-2", user_id="user-001", category="asset", type="cash",
+                            sub_type="savings", description="Savings", balance=0.0))
+    assert index.get() is columns
+    assert columns.net_flow("user-001") == 24.5
+
+def test_balance_aggregates_follow_account_writes(tmp_path):
+    """Test that per-user totals are updated in place by account writes."""
+    from backend.api.models import Account
+    from backend.core.aggregates import UserBalanceAggregates
+    from backend.core.repository import JsonCollection
+
+    (tmp_path / "accounts.json").write_text(json.dumps([
+        {"account_id": "acc-1", "user_id": "user-001", "category": "asset", "type": "cash",
+         "sub_type": "checking", "description": "Checking", "balance": 1000.0},
+        {"account_id": "acc-2", "user_id": "user-001", "category": "liability", "type": "loan",
+         "sub_type": "student", "description": "Loan", "balance": -400.0},
+    ]))
+    accounts = JsonCollection("accounts.json", Account, "account_id", data_dir=str(tmp_path))
+    balances = UserBalanceAggregates(accounts)
+    assert balances.get("user-001").net_worth == 600.0
+
+    card = Account(account_id="acc-3", user_id="user-001", category="liability", type="credit card",
+                   sub_type="card", description="Card", balance=-100.0)
+    accounts.insert(card)
+    version = balances._version
+    totals = balances.get("user-001")
+    assert balances._version == version  # applied as a delta, not rebuilt
+    assert totals == (500.0, 1000.0, -500.0, 3)
+
+    accounts.delete("acc-1")
+    assert balances.get("user-001") == (-500.0, 0.0, -500.0, 2)
+    assert balances.get("user-002") is None
+
+def test_timelines_follow_transaction_and_account_writes(tmp_path):
+    """Test that a write only replaces the timeline of the user it affects."""
+    from backend.api.models import Account, Transaction
+    from backend.core.indexes import UserTimelines
+    from backend.core.repository import JsonCollection
+
+    def account(account_id, user_id):
+        return {"account_id": account_id, "user_id": user_id, "category": "asset", "type": "cash",
+                "sub_type": "checking", "description": "Checking", "balance": 0.0}
+
+    def tx(transaction_id, account_id, day):
+        return {"transaction_id": transaction_id, "account_id": account_id, "merchant_id": "m1",
+                "date": f"2024-01-{day:02d}T00:00:00Z", "description": "", "amount": -1.0, "category": "c"}
+
+    (tmp_path / "accounts.json").write_text(json.dumps([account("acc-1", "user-001"), account("acc-2", "user-002")]))
+    (tmp_path / "transactions.json").write_text(json.dumps([tx("t1", "acc-1", 3), tx("t2", "acc-2", 1)]))
+    accounts = JsonCollection("accounts.json", Account, "account_id", data_dir=str(tmp_path))
+    transactions = JsonCollection("transactions.json", Transaction, "transaction_id", data_dir=str(tmp_path))
+    timelines = UserTimelines(accounts, transactions)
+    first, second = timelines.get("user-001"), timelines.get("user-002")
+
+    transactions.insert(Transaction(**tx("t3", "acc-1", 2)))
+    transactions.insert(Transaction(**tx("t4", "acc-3", 4)))  # account not created yet
+    assert timelines.is_fresh()
+    assert [t.transaction_id for t in timelines.get("user-001").transactions] == ["t3", "t1"]
+    assert [t.transaction_id for t in first.transactions] == ["t1"]  # earlier readers keep their copy
+    assert timelines.get("user-002") is second
+
+    accounts.insert(Account(**account("acc-3", "user-002")))
+    accounts.update("acc-1", Account(**account("acc-1", "user-002")))
+    assert [t.transaction_id for t in timelines.get("user-002").transactions] == ["t2", "t3", "t1", "t4"]
+    assert len(timelines.get("user-001")) == 0
+    assert timelines.is_fresh()
+
+def test_async_collection_reads_and_writes(tmp_path):
+    """Test that async writes go through the writer threads and stale readers are refreshed before reading."""
+    import asyncio
+    from backend.api.models import Holding
+    from backend.core.repository import JsonCollection
+
+    (tmp_path / "holdings.json").write_text("[]")
+    writer = JsonCollection("holdings.json", Holding, "symbol", data_dir=str(tmp_path))
+    reader = JsonCollection("holdings.json", Holding, "symbol", data_dir=str(tmp_path))
+    assert reader.all() == []
+
+    async def scenario():
+        await asyncio.gather(*(writer.ainsert(Holding(symbol=f"S{i}", value=float(i))) for i in range(10)))
+        assert not reader.is_fresh()
+        holdings = await reader.aall()
+        assert reader.is_fresh()
+        assert await reader.afind(symbol="S3") == [Holding(symbol="S3", value=3.0)]
+        assert await writer.adelete("S0")
+        return holdings
+
+    assert len(asyncio.run(scenario())) == 10
+    assert len(reader.all()) == 9
+
+def test_reads_after_ready_do_not_wait_for_writers(tmp_path):
+    """Test that reads on the event loop after aio.ready() are served without the collection's lock."""
+    import asyncio
+    import threading
+    from backend.api.conditional import ConditionalGet
+    from backend.api.models import Holding
+    from backend.core import aio
+    from backend.core.indexes import DerivedIndex
+    from backend.core.sqlite_store import SqliteCollection
+
+    holdings = SqliteCollection(str(tmp_path / "bank.sqlite3"), "holdings", Holding, "symbol")
+    holdings.insert(Holding(symbol="VTI", value=100.0))
+    total = DerivedIndex(lambda items: sum(h.value for h in items), holdings)
+    version = ConditionalGet(holdings)
+    asyncio.run(aio.ready(total))
+
+    # A writer thread holds the lock, e.g. while waiting in BEGIN IMMEDIATE for another worker
+    locked, release = threading.Event(), threading.Event()
+
+    def writer():
+        with holdings.lock:
+            locked.set()
+            release.wait()
+
+    thread = threading.Thread(target=writer)
+    thread.start()
+    locked.wait()
+    try:
+        results = []
+        reader = threading.Thread(target=lambda: results.append((holdings.cached()[1], total.get(), version.validator())))
+        reader.start()
+        reader.join(timeout=5)
+        assert results and results[0][:2] == ([Holding(symbol="VTI", value=100.0)], 100.0)
+    finally:
+        release.set()
+        thread.join()
+
+def a2a_transport(stream_events):
+    """A fake metadata server and A2A service for the proxy tests."""
+    import httpx
+
+    def handler(request):
+        if request.url.host == "metadata.google.internal":
+            return httpx.Response(200, text="id-token")
+        assert request.headers["authorization"] == "Bearer id-token"
+        if json.loads(request.content)["method"] == "message/stream":
+            body = b"".join(f"data: {json.dumps(event)}\n\n".encode() for event in stream_events)
+            return httpx.Response(200, content=body, headers={"content-type": "text/event-stream"})
+        return httpx.Response(200, json={"jsonrpc": "2.0", "id": "1", "result": {"status": "ok"}})
+
+    return httpx.MockTransport(handler)
+
+def test_proxy_a2a_json_and_stream():
+    """Test that the proxy authenticates through the shared client and relays both JSON and SSE responses."""
+    import httpx
+    from backend.core import http_client
+
+    events = [{"result": {"kind": "status-update"}}, {"result": {"kind": "artifact-update", "final": True}}]
+    with patch.object(http_client, "_client", httpx.AsyncClient(transport=a2a_transport(events))):
+        payload = {"jsonrpc": "2.0", "id": "1", "method": "message/send", "params": {}}
+        response = client.post("/proxy/a2a", json=payload)
+        assert response.status_code == 200
+        assert response.json()["result"] == {"status": "ok"}
+
+        payload["method"] = "message/stream"
+        response = client.post("/proxy/a2a", json=payload)
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        data = [json.loads(line[len("data: "):]) for line in response.text.splitlines() if line]
+        assert data == events
+
+def test_id_token_cache_against_fake_metadata_server():
+    """Test that ID tokens are fetched once, shared by concurrent callers and refreshed before they expire."""
+    import asyncio
+    import base64
+    import threading
+    import httpx
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    from backend.core.id_tokens import IdTokenCache
+
+    issued = []
+    clock = {"now": 1_000_000.0}
+
+    class FakeMetadataServer(BaseHTTPRequestHandler):
+        def do_GET(self):
+            assert self.headers["Metadata-Flavor"] == "Google"
+            claims = json.dumps({"aud": "https://agent", "exp": clock["now"] + 3600}).encode()
+            token = f"header.{base64.urlsafe_b64encode(claims).decode().rstrip('=')}.sig{len(issued)}"
+            issued.append(token)
+            self.send_response(200)
+            self.end_headers()
+            self.wfile.write(token.encode())
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeMetadataServer)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    async def scenario():
+        async with httpx.AsyncClient() as http:
+            tokens = IdTokenCache(
+                metadata_url=f"http://127.0.0.1:{server.server_port}/identity",
+                refresh_margin=300,
+                client=http,
+                clock=lambda: clock["now"],
+            )
+            first = await asyncio.gather(*(tokens.get("https://agent") for _ in range(20)))
+            assert set(first) == {issued[0]} and len(issued) == 1
+
+            clock["now"] += 3400  # inside the refresh margin: cached token, refresh in background
+            assert await tokens.get("https://agent") == issued[0]
+            await tokens._refreshes["https://agent"]
+            assert len(issued) == 2
+            assert await tokens.get("https://agent") == issued[1]
+
+            clock["now"] += 3590  # about to expire: callers wait for a new token
+            assert await tokens.get("https://agent") == issued[2]
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        server.shutdown()
+
+def test_key_sequences_allocate_unique_ids_across_workers(tmp_path):
+    """Test that per-prefix counters continue from existing IDs and that a key taken by another worker is detected."""
+    from backend.api.models import Account
+    from backend.core.repository import JsonCollection
+    from backend.core.sequences import KeySequences
+
+    def account(account_id):
+        return Account(account_id=account_id, user_id="user-001", category="asset", type="savings",
+                       sub_type="savings", description="Savings", balance=0.0)
+
+    (tmp_path / "accounts.json").write_text(json.dumps([
+        account("acc-mw-s-001").model_dump(), account("acc-mw-s-007").model_dump(), account("acc-mw-c-002").model_dump(),
+    ]))
+    worker_a = JsonCollection("accounts.json", Account, "account_id", data_dir=str(tmp_path))
+    worker_b = JsonCollection("accounts.json", Account, "account_id", data_dir=str(tmp_path))
+    sequences_a, sequences_b = KeySequences(worker_a), KeySequences(worker_b)
+
+    assert sequences_a.allocate("acc-mw-s-") == 8
+    assert sequences_a.allocate("acc-mw-s-") == 9
+    assert sequences_a.allocate("acc-jd-i-") == 1
+    assert sequences_b.allocate("acc-mw-c-") == 3
+
+    # Both workers allocate 003 for the same prefix; only the first insert wins
+    assert sequences_a.allocate("acc-mw-c-") == 3
+    assert worker_b.insert_new(account("acc-mw-c-003"))
+    assert not worker_a.insert_new(account("acc-mw-c-003"))
+    assert sequences_a.allocate("acc-mw-c-") == 4
+    assert len(worker_a.all()) == 4
+
+def test_advisor_bookings_conflicts_and_free_slots():
+    """Test that overlapping bookings are rejected and free slots exclude booked meetings."""
+    # Alice Johnson is available on Mondays 10:00-12:00 and Wednesdays 14:00-16:00 (UTC)
+    meeting = {"user_id": "user-001", "advisor_name": "Alice Johnson", "advisor_type": "Mortgage",
+               "meeting_time": "2030-01-07T10:30:00", "duration_minutes": 30}
+    booked = client.post("/api/meetings", json=meeting)
+    assert booked.status_code == 201
+    try:
+        overlapping = {**meeting, "meeting_time": "2030-01-07T10:00:00", "duration_minutes": 45}
+        assert client.post("/api/meetings", json=overlapping).status_code == 409
+        # A free slot does not let a request overwrite another meeting by reusing its ID
+        reused = {**meeting, "meeting_id": booked.json()["meeting_id"], "meeting_time": "2030-01-07T11:30:00"}
+        assert client.post("/api/meetings", json=reused).status_code == 409
+        assert client.get("/api/meetings/user-001").json().count(booked.json()) == 1
+
+        response = client.get("/api/advisors/adv-mortgage-001/free-slots?from=2030-01-07T00:00:00Z&to=2030-01-10T00:00:00Z")
+        assert response.status_code == 200
+        assert [(slot["start"][:16], slot["end"][:16]) for slot in response.json()] == [
+            ("2030-01-07T10:00", "2030-01-07T10:30"),
+            ("2030-01-07T11:00", "2030-01-07T12:00"),
+            ("2030-01-09T14:00", "2030-01-09T16:00"),
+        ]
+        assert client.get("/api/advisors/adv-unknown/free-slots").status_code == 404
+    finally:
+        client.delete(f"/api/meetings/{booked.json()['meeting_id']}")
+
+def test_bookings_insert_if_is_checked_across_workers(tmp_path):
+    """Test that conflicts are found among overlapping stored bookings and checked under the write lock."""
+    from datetime import datetime, timezone
+    from backend.api.models import Meeting
+    from backend.core.bookings import AdvisorBookings, meeting_interval
+    from backend.core.repository import JsonCollection
+
+    def at(hour, minute=0):
+        return datetime(2030, 1, 7, hour, minute, tzinfo=timezone.utc).timestamp()
+
+    def meeting(meeting_id, hour, minute, minutes):
+        return Meeting(meeting_id=meeting_id, user_id="user-001", advisor_name="Alice Johnson", advisor_type="Mortgage",
+                       meeting_time=datetime(2030, 1, 7, hour, minute), duration_minutes=minutes)
+
+    # A long meeting overlapped by a later short one, as older data may contain
+    (tmp_path / "meetings.json").write_text(json.dumps(
+        [meeting("m1", 9, 0, 180).model_dump(mode="json"), meeting("m2", 9, 30, 15).model_dump(mode="json")]
+    ))
+    worker_a = JsonCollection("meetings.json", Meeting, "meeting_id", data_dir=str(tmp_path))
+    worker_b = JsonCollection("meetings.json", Meeting, "meeting_id", data_dir=str(tmp_path))
+    bookings_a, bookings_b = AdvisorBookings(worker_a), AdvisorBookings(worker_b)
+    assert bookings_a.conflict("Alice Johnson", at(11), at(11, 30)).meeting_id == "m1"
+    assert list(bookings_a.free_intervals("Alice Johnson", at(11), at(13))) == [(at(12), at(13))]
+
+    def book(collection, bookings, meeting_id):
+        item = meeting(meeting_id, 13, 0, 30)
+        start, end, _ = meeting_interval(item)
+        return collection.insert_if(item, lambda: bookings.conflict(item.advisor_name, start, end) is None)
+
+    # Worker B's index is current before worker A books, but B's insert still sees A's meeting
+    assert bookings_b.conflict("Alice Johnson", at(13), at(13, 30)) is None
+    assert book(worker_a, bookings_a, "m3")
+    assert not book(worker_b, bookings_b, "m4")
+    assert [item.meeting_id for item in worker_b.all()] == ["m1", "m2", "m3"]
+
+def test_schedule_occurrences_are_merged_in_order():
+    """Test that a user's schedules are expanded lazily and merged chronologically within the window."""
+    from datetime import datetime, timezone
+    from backend.core.recurrence import occurrences
+
+    jan_31 = datetime(2024, 1, 31, tzinfo=timezone.utc)
+    window = (datetime(2024, 2, 1, tzinfo=timezone.utc), datetime(2024, 6, 1, tzinfo=timezone.utc))
+    assert [d.day for d in occurrences(jan_31, "monthly", None, *window)] == [29, 31, 30, 31]
+    far_future = next(occurrences(jan_31, "daily", None, datetime(3000, 1, 1, tzinfo=timezone.utc)))
+    assert far_future == datetime(3000, 1, 1, tzinfo=timezone.utc)
+
+    # user-003 has two monthly schedules starting 2024-08-12
+    response = client.get("/api/users/user-003/schedules/occurrences?from=2025-01-01T00:00:00Z&to=2025-04-01T00:00:00Z")
+    assert response.status_code == 200
+    occurrences_found = response.json()
+    assert [o["date"][:10] for o in occurrences_found] == ["2025-01-12"] * 2 + ["2025-02-12"] * 2 + ["2025-03-12"] * 2
+    assert len({o["schedule_id"] for o in occurrences_found}) == 2
+
+    limited = client.get("/api/users/user-003/schedules/occurrences?from=2025-01-01T00:00:00Z&to=2028-01-01T00:00:00Z&limit=3")
+    assert len(limited.json()) == 3
+
+def test_goal_projections_combine_schedules_and_cash_flow():
+    """Test that goal projections add linked schedule occurrences and a share of cash flow month by month."""
+    from datetime import datetime, timezone
+    from backend.api.models import LifeGoal, Schedule
+    from backend.core.projections import project_goals
+
+    goals = [
+        LifeGoal(user_id="u", description="House", target_amount=2000, current_amount_saved=500,
+                 target_date="2026-01-01", account_id="acc-x"),
+        LifeGoal(user_id="u", description="Car", target_amount=10000, current_amount_saved=0, target_date="2025-07-01"),
+        LifeGoal(user_id="u", description="Done", target_amount=100, current_amount_saved=200, target_date="2024-01-01"),
+    ]
+    schedules = [Schedule(user_id="u", schedule_id="s1", source_account_id="acc-c", destination_account_id="acc-x",
+                          description="Saving", frequency="monthly", start_date="2024-01-15T00:00:00Z",
+                          end_date="2030-01-01T00:00:00Z", amount=100.0)]
+    projections = project_goals(goals, schedules, monthly_cash_flow=300.0, today=datetime(2025, 1, 1, tzinfo=timezone.utc))
+
+    assert projections.months_remaining.tolist() == [12, 6, 0]
+    # House: 12 x (100 scheduled + 150 cash flow share); Car: 6 x 150
+    assert projections.projected_amount.tolist() == [3500.0, 900.0, 200.0]
+    assert projections.on_track.tolist() == [True, False, True]
+    assert projections.shortfall.tolist() == [0.0, 9100.0, 0.0]
+    assert projections.months_to_target.tolist() == [6, -1, 0]
+    assert projections.required_monthly_contribution[1] == pytest.approx(10000 / 6)
+
+    response = client.get("/api/goals/user-without-goals/projections")
+    assert response.status_code == 200
+    assert response.json() == []
+
+def test_partner_eligibility_by_credit_score():
+    """Test that partner eligibility is answered from the sorted credit-score indexes in both directions."""
+    from backend.api.models import BankPartner, User
+    from backend.core.eligibility import CreditScoreIndex, PartnerTiers
+
+    def partner(partner_id, minimum=None):
+        criteria = {"minimum_credit_score": minimum} if minimum is not None else None
+        return BankPartner(partner_id=partner_id, merchant_id="m", name=partner_id, category="c",
+                           benefit_type="t", benefit_value=0.1, eligibility_criteria=criteria)
+
+    tiers = PartnerTiers([partner("p1", 720), partner("p2"), partner("p3", 680), partner("p4", 720)])
+    assert [p.partner_id for p in tiers.eligible(None)] == ["p2"]
+    assert [p.partner_id for p in tiers.eligible(700)] == ["p2", "p3"]
+    assert [p.partner_id for p in tiers.eligible(720)] == ["p1", "p2", "p3", "p4"]
+    assert tiers.eligible(720) is tiers.eligible(720)
+
+    users = [User(user_id=f"u{score}", name="n", age=30, risk_tolerance="low", credit_score=score,
+                  financial_blurb="", goals=[]) for score in (700, None, 750, 680)]
+    index = CreditScoreIndex(users)
+    assert [u.user_id for u in index.at_least(700)] == ["u750", "u700"]
+    assert [u.user_id for u in index.everyone()] == ["u750", "u700", "u680", "uNone"]
+
+    # partner_005 requires a credit score of 720
+    response = client.get("/api/partners/partner_005/eligible-users")
+    assert response.status_code == 200
+    assert all(user["credit_score"] >= 720 for user in response.json())
+    for user in response.json():
+        benefits = client.get(f"/api/partners/user/{user['user_id']}").json()
+        assert "partner_005" in [p["partner_id"] for p in benefits]
+    assert client.get("/api/partners/partner_unknown/eligible-users").status_code == 404
+
+def test_partner_savings_join_merchant_spend(tmp_path):
+    """Test that merchant spend is maintained incrementally and joined against partner merchants."""
+    from backend.api.models import Transaction
+    from backend.core.aggregates import AccountMerchantSpend
+    from backend.core.repository import JsonCollection
+
+    def tx(transaction_id, merchant_id, amount):
+        return {"transaction_id": transaction_id, "account_id": "acc-1", "merchant_id": merchant_id,
+                "date": "2024-01-01T00:00:00Z", "description": "", "amount": amount, "category": "c"}
+
+    (tmp_path / "transactions.json").write_text(json.dumps([tx("t1", "m1", -10.0), tx("t2", "m1", 4.0)]))
+    transactions = JsonCollection("transactions.json", Transaction, "transaction_id", data_dir=str(tmp_path))
+    spend = AccountMerchantSpend(transactions)
+    # The refund neither adds to the spend nor counts as a spending transaction
+    assert spend.for_accounts(["acc-1"]) == {"m1": (10.0, 1)}
+    transactions.insert(Transaction(**tx("t3", "m2", -5.0)))
+    transactions.delete("t1")
+    assert spend.for_accounts(["acc-1", "acc-unknown"]) == {"m2": (5.0, 1)}
+
+    # user-002 (credit score 720) pays their mortgage at SecureHome Mortgage, which requires 720
+    response = client.get("/api/users/user-002/partner-savings")
+    assert response.status_code == 200
+    report = response.json()
+    mortgage = next(p for p in report["partners"] if p["partner_id"] == "partner_005")
+    # An APR reduction has no cash value derived from spend
+    assert mortgage["eligible"] and mortgage["realized_benefit"] is None and mortgage["missed_benefit"] is None
+    streaming = next(p for p in report["partners"] if p["partner_id"] == "partner_003")
+    assert streaming["realized_benefit"] == round(streaming["spend"] * 0.15, 2) and streaming["missed_benefit"] == 0.0
+    assert report["realized_benefit"] == round(sum(p["realized_benefit"] or 0.0 for p in report["partners"]), 2)
+    assert client.get("/api/users/non-existent-user/partner-savings").status_code == 404